@@ -110,6 +110,9 @@ class ResourceContainer(ApiObject):
     expunge_task = None
     synchronize_task = "beehive_resource.task_v2.container.resource_container_task"
 
+    # ttl of the shared ext_id index
+    extid_index_ttl = 3600
+
     def __init__(self, *args, **kvargs):
         ApiObject.__init__(self, *args, **kvargs)
 
@@ -584,6 +587,7 @@ class ResourceContainer(ApiObject):
 
         # create object and permission
         resource_class(self.controller, oid=model.id).register_object(model.objid.split("//"), desc=desc)
+        self.update_extid_index(self.controller, self.oid, ext_id, model.id)
 
         self.logger.info("Add resource %s with uuid %s" % (name, model.uuid))
         return model
@@ -685,6 +689,7 @@ class ResourceContainer(ApiObject):
 
         # create object and permission
         resource_class(self.controller, oid=model.id).register_object(model.objid.split("//"), desc=desc)
+        self.update_extid_index(self.controller, self.oid, ext_id, model.id)
 
         self.logger.info("Add resource %s with uuid %s" % (name, model.uuid))
         return model
@@ -702,6 +707,8 @@ class ResourceContainer(ApiObject):
         try:
             # change resource state
             self.manager.update_resource(oid=resource, **params)
+            if "ext_id" in params:
+                self.update_extid_index(self.controller, self.oid, params.get("ext_id"), resource)
             self.logger.info("Update resource %s with params %s" % (resource, params))
         except QueryError as ex:
             self.logger.error(ex, exc_info=False)
@@ -1581,8 +1588,84 @@ class ResourceContainer(ApiObject):
         """
         return self.controller.index_resources_by_extid(entity_class=entity_class, container=self.oid)
 
+    @staticmethod
+    def get_extid_index_key(container_id):
+        return "resource.extid.%s" % container_id
+
+    def load_extid_index(self, force=False):
+        """Load the container ext_id -> resource id index in shared cache. Index is loaded with a single query and
+        kept aligned by add_resource, update_resource, Resource.update_internal and Resource.expunge_internal.
+
+        Index is a hint: a missing ext_id is always searched in the database and an indexed resource is always read
+        from the database, so an update lost by the index costs a query but never returns a wrong resource.
+
+        :param force: if True reload index also if it is already loaded [default=False]
+        :return: True if index is loaded
+        """
+        try:
+            redis = self.controller.redis_cache
+            key = self.get_extid_index_key(self.oid)
+            if force is False and redis.exists(key) == 1:
+                return True
+
+            # build the new index in a temporary key and replace the old one at once
+            index = self.manager.get_resource_extid_index(self.oid)
+            tmp_key = "%s:%s" % (key, id_gen())
+            pipe = redis.pipeline(transaction=True)
+            pipe.hset(tmp_key, "__loaded__", 0)
+            for pos in range(0, len(index), 5000):
+                pipe.hset(tmp_key, mapping={ext_id: oid for ext_id, oid in index[pos : pos + 5000]})
+            pipe.expire(tmp_key, self.extid_index_ttl)
+            pipe.rename(tmp_key, key)
+            pipe.execute()
+            self.logger.debug("Load container %s ext_id index: %s items" % (self.oid, len(index)))
+            return True
+        except Exception as ex:
+            self.logger.warning("Container %s ext_id index can not be loaded: %s" % (self.oid, ex))
+            return False
+
+    @staticmethod
+    def update_extid_index(controller, container_id, ext_id, oid=None):
+        """Update container ext_id index if it is loaded
+
+        :param controller: resource controller
+        :param container_id: container id
+        :param ext_id: remote platform entity id
+        :param oid: resource id. If None remove ext_id from index [optional]
+        """
+        if container_id is None or ext_id is None or ext_id == "":
+            return
+        try:
+            redis = controller.redis_cache
+            key = ResourceContainer.get_extid_index_key(container_id)
+            if redis.exists(key) == 0:
+                return
+            if oid is None:
+                redis.hdel(key, ext_id)
+            else:
+                redis.hset(key, ext_id, oid)
+        except Exception as ex:
+            logger.warning("Container %s ext_id index can not be updated: %s" % (container_id, ex))
+
+    def __get_resource_id_by_extid(self, ext_id):
+        """Get resource id from container ext_id index
+
+        :param ext_id: remote platform entity id
+        :return: resource id or None if ext_id is not indexed or index is not available
+        """
+        try:
+            oid = self.controller.redis_cache.hget(self.get_extid_index_key(self.oid), ext_id)
+        except Exception as ex:
+            self.logger.warning("Container %s ext_id index can not be read: %s" % (self.oid, ex))
+            return None
+        if oid is not None:
+            oid = int(oid)
+        return oid
+
     def get_resource_by_extid(self, ext_id):
-        """Get resource by remote platform id
+        """Get resource by remote platform id. Resource id is read from the container ext_id index and the resource is
+        read by id. When ext_id is not in the index the resource is searched by ext_id in the database and added to
+        the index.
 
         :param ext_id: remote platform entity id
         :return: Resource instance
@@ -1591,7 +1674,20 @@ class ResourceContainer(ApiObject):
         if ext_id is None:
             return None
         try:
-            entity = self.manager.get_resource_by_extid(ext_id, container=self.oid)
+            entity = None
+            oid = self.__get_resource_id_by_extid(ext_id)
+            if oid is not None:
+                try:
+                    entity = self.manager.get_entity(ModelResource, oid)
+                except QueryError:
+                    entity = None
+                if entity is None or entity.ext_id != ext_id or entity.container_id != self.oid:
+                    self.update_extid_index(self.controller, self.oid, ext_id)
+                    entity = None
+            if entity is None:
+                entity = self.manager.get_resource_by_extid(ext_id, container=self.oid)
+                if self.load_extid_index() is True:
+                    self.update_extid_index(self.controller, self.oid, ext_id, entity.id)
             entity_class = import_class(entity.type.objclass)
             res = entity_class(
                 self.controller,
@@ -1609,6 +1705,37 @@ class ResourceContainer(ApiObject):
             self.logger.warning(ex)
             return None
 
+    def get_resources_by_extids(self, ext_ids):
+        """Get resources by remote platform id with a single query
+
+        :param ext_ids: list of remote platform entity id
+        :return: dict {ext_id: Resource instance}. Ext_ids without a resource are not in the dict
+        :raise ApiManagerError:
+        """
+        ext_ids = [ext_id for ext_id in ext_ids if ext_id is not None and ext_id != ""]
+        res = {}
+        try:
+            entities = self.manager.get_resources_by_extids(ext_ids, container=self.oid)
+        except QueryError as ex:
+            self.logger.warning(ex)
+            return res
+
+        for entity in entities:
+            entity_class = import_class(entity.type.objclass)
+            obj = entity_class(
+                self.controller,
+                oid=entity.id,
+                objid=entity.objid,
+                name=entity.name,
+                active=entity.active,
+                desc=entity.desc,
+                model=entity,
+            )
+            obj.container = self
+            res[entity.ext_id] = obj
+        self.logger.info("Get %s resources by %s ext_ids" % (len(res), len(ext_ids)))
+        return res
+
     #
     # link
     #
@@ -2086,6 +2213,7 @@ class Resource(ApiResource):
     def __init__(self, *args, **kvargs):
         ApiObject.__init__(self, *args, **kvargs)
         self.container: ResourceContainer = None
+        self.container_id = None
         self.ext_id = None
         self.ext_obj = None
         self.parent = None
@@ -2213,6 +2341,20 @@ class Resource(ApiResource):
         """
         return self.manager.count_resource(parent_id=self.oid)
 
+    def get_descendants(self, max_depth=None, objdefs=None, entities=False, run_customize=False):
+        """Get the resources below this one in the parent tree. Tree is read one depth level at a time.
+
+        :param max_depth: max depth to read. Children have depth 1 [optional]
+        :param objdefs: return only resources with these definitions [optional]
+        :param entities: if True return resource instances, otherwise return lightweight records [default=False]
+        :param run_customize: with entities if True run customize [default=False]
+        :return: list of records or resource instances ordered by depth
+        """
+        self.verify_permisssions("view")
+        return self.controller.get_resource_descendants_internal(
+            self.oid, max_depth=max_depth, objdefs=objdefs, entities=entities, run_customize=run_customize
+        )
+
     def set_container(self, container):
         """Set container
 
@@ -2916,6 +3058,10 @@ class Resource(ApiResource):
             # self.logger.debug('+++++ TRYFIX - self.manager: %s' % type(self.manager))
             self.manager: ResourceDbManager
             self.manager.update_resource(**kvargs)
+            if "ext_id" in kvargs:
+                ResourceContainer.update_extid_index(self.controller, self.container_id, self.ext_id)
+                ResourceContainer.update_extid_index(self.controller, self.container_id, kvargs.get("ext_id"), self.oid)
+                self.ext_id = kvargs.get("ext_id")
             self.logger.debug("Update %s %s with data %s" % (self.objdef, self.oid, kvargs))
 
             # session = self.manager.get_session().hash_key
@@ -3410,6 +3556,7 @@ class Resource(ApiResource):
         try:
             # remove resource
             self.manager.expunge_resource(oid=self.oid)
+            ResourceContainer.update_extid_index(self.controller, self.container_id, self.ext_id)
 
             if self.register is True:
                 # remove object and permissions
@@ -2,15 +2,17 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from os import path
 from inspect import getfile, isclass
 from logging import getLogger
-from datetime import datetime
+from datetime import datetime, timedelta
 import ujson as json
 from beecell.simple import import_class, jsonDumps
 from beecell.types.type_string import compat, truncate
 from beecell.types.type_date import format_date
 from beecell.types.type_id import id_gen
+from six import ensure_binary, ensure_str
 from beecell.db import QueryError, TransactionError
 from beehive.common.data import trace, operation, cache
 from beehive.common.apimanager import ApiController, ApiManagerError
@@ -21,6 +23,7 @@ from beehive_resource.container import (
     ResourceContainer,
     Resource,
 )
+from beehive_resource.util import QueryCounter
 from beehive_resource.model import (
     ResourceDbManager,
     Resource as ModelResource,
@@ -41,6 +44,10 @@ class ResourceController(ApiController):
 
     version = "v1.0"  #: version
 
+    task_profile_prefix = "resource.task.profile"  #: redis key prefix of the task step profiles
+    task_profile_days = 7  #: days task step profiles are kept
+    task_profile_max = 1000  #: max number of task step profiles kept every day
+
     def __init__(self, module):
         ApiController.__init__(self, module)
 
@@ -82,6 +89,13 @@ class ResourceController(ApiController):
         for container_class in self.container_classes.values():
             container_class(self).register_async_methods()
 
+    @property
+    def redis_cache(self):
+        """Redis client shared by the api cache. Use for atomic structures like bitmaps, sets and locks that the
+        cache manager does not expose.
+        """
+        return self.module.api_manager.redis_manager
+
     def convert_timestamp(self, timestamp):
         """ """
         timestamp = datetime.fromtimestamp(timestamp)
@@ -337,6 +351,9 @@ class ResourceController(ApiController):
         run_customize=True,
         objdef=None,
         entity_class=None,
+        cursor=None,
+        with_total=True,
+        cursor_info=None,
         *args,
         **kvargs,
     ):
@@ -358,6 +375,11 @@ class ResourceController(ApiController):
         :param customize: function used to customize entities. Signature def customize(entities, *args, **kvargs)
         :param run_customize: if True run customize [default=True]
         :param entity_class: entity_class you expect to receive [optional]
+        :param cursor: keyset pagination cursor. Use empty string for the first page, then the value returned by
+            cursor_info. When set page and field are ignored and entities are ordered by id [optional]
+        :param with_total: with cursor if False do not count entities and return None as total [default=True]
+        :param cursor_info: dict filled with key next_cursor, the cursor of the next page or None if the current page
+            is the last one. Used with cursor [optional]
         :param args: custom params
         :param kvargs: custom params
         :return: (list of entity instances, total)
@@ -366,6 +388,9 @@ class ResourceController(ApiController):
         res = []
         tags = []
 
+        if cursor is not None:
+            kvargs.update(keyset=True, keyset_id=self.decode_cursor(cursor), with_total=with_total)
+
         if entity_class is not None and objdef is not None and entity_class.objdef != objdef:
             raise ApiManagerError("entity_class objdef and objdef mismatch")
 
@@ -387,6 +412,9 @@ class ResourceController(ApiController):
                 *args,
                 **kvargs,
             )
+            if cursor is not None and cursor_info is not None:
+                # cursor is computed before objdef filter, or a page with filtered entities stops the pagination
+                cursor_info["next_cursor"] = self.get_next_cursor(entities, size)
 
             # total = 0
             for entity in entities:
@@ -402,7 +430,8 @@ class ResourceController(ApiController):
 
                 # bypass object that does not match objdef
                 if objdef is not None and objclass.objdef != objdef:
-                    total -= 1
+                    if total is not None:
+                        total -= 1
                     continue
 
                 obj = objclass(
@@ -426,6 +455,44 @@ class ResourceController(ApiController):
             self.logger.warning(ex, exc_info=True)
             return [], 0
 
+    @staticmethod
+    def encode_cursor(oid):
+        """Encode the keyset pagination cursor of an entity
+
+        :param oid: entity id
+        :return: opaque cursor
+        """
+        return ensure_str(urlsafe_b64encode(ensure_binary("id:%s" % oid)))
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a keyset pagination cursor
+
+        :param cursor: opaque cursor. Empty string is the first page
+        :return: entity id or None
+        :raise ApiManagerError:
+        """
+        if cursor == "":
+            return None
+        try:
+            key, oid = ensure_str(urlsafe_b64decode(ensure_binary(cursor))).split(":")
+            if key != "id":
+                raise ValueError(key)
+            return int(oid)
+        except Exception:
+            raise ApiManagerError("pagination cursor %s is not valid" % cursor, code=400)
+
+    def get_next_cursor(self, entities, size):
+        """Get the keyset pagination cursor of the page after entities
+
+        :param entities: records of the current page returned by the query
+        :param size: page size
+        :return: opaque cursor or None if current page is the last one
+        """
+        if size is None or size <= 0 or len(entities) < size:
+            return None
+        return self.encode_cursor(entities[-1].id)
+
     #
     # container
     #
@@ -676,10 +743,11 @@ class ResourceController(ApiController):
     # resource
     #
     @trace(entity="Resource", op="view")
-    def index_resources_by_id(self, entity_class=None):
+    def index_resources_by_id(self, entity_class=None, oids=None):
         """Get indexed resources. This method does not verify authorization. Use only for internal assignment.
 
         :param entity_class: parent resource class [optional]
+        :param oids: list of resource id to index. If None index all the resources [optional]
         :return: dictionary {'parent_id':{'id':.., 'uuid':.., 'name':..}}
         :raises ApiManagerError: raise :class:`ApiManagerError`
         """
@@ -688,7 +756,9 @@ class ResourceController(ApiController):
                 type = entity_class.objdef
             else:
                 type = None
-            entities = self.manager.get_resources_by_type(type=type)
+            if oids is not None and len(oids) == 0:
+                return {}
+            entities = self.manager.get_resources_by_type(type=type, ids=oids)
             resp = {}
             for entity in entities:
                 entity_class = import_class(entity.type.objclass)
@@ -851,40 +921,52 @@ class ResourceController(ApiController):
         # get containers
         container_idx = {}
         class_idx = {}
-        flavor_idx = self.index_resources_by_id(entity_class=ComputeFlavor)
-        # set parent
-        for entity in entities:
-            index = "%s-%s" % (entity.objdef, entity.model.container_id)
-            cid = entity.model.container_id
-            if index in class_idx:
-                class_idx[index]["entities"].append(entity)
-            else:
-                # get connection
-                if cid not in container_idx:
-                    container_idx[cid] = self.get_container(cid, connect=True)
-                class_idx[index] = {
-                    "class": entity.__class__,
-                    "container": container_idx[cid],
-                    "entities": [entity],
-                }
-                # self.logger.debug('Append new entity type: %s' % entity.objdef)
-            links, tot = entity.get_out_links(type="flavor")
-            if tot > 0:
-                entity.flavor = flavor_idx.get(links[0].model.end_resource_id)
 
-            entity.set_physical_entity(entity=None)
-            # set container
-            entity.set_container(container_idx[cid])
+        with QueryCounter(self.manager.get_session()) as counter:
+            # get flavors of all the entities with a single query
+            flavor_idx = self.get_directed_linked_resources_internal(
+                resources=[e.oid for e in entities],
+                link_type="flavor",
+                objdef=ComputeFlavor.objdef,
+                run_customize=False,
+            )
+
             # set parent
-            if parents is not None and entity.model.parent_id is not None:
-                entity.set_parent(parents.get(entity.model.parent_id, {}))
-            # set error reason
-            entity.reason = entity.get_errors()
+            for entity in entities:
+                index = "%s-%s" % (entity.objdef, entity.model.container_id)
+                cid = entity.model.container_id
+                if index in class_idx:
+                    class_idx[index]["entities"].append(entity)
+                else:
+                    # get connection
+                    if cid not in container_idx:
+                        container_idx[cid] = self.get_container(cid, connect=True)
+                    class_idx[index] = {
+                        "class": entity.__class__,
+                        "container": container_idx[cid],
+                        "entities": [entity],
+                    }
+                    # self.logger.debug('Append new entity type: %s' % entity.objdef)
+                flavors = flavor_idx.get(entity.oid, [])
+                if len(flavors) > 0:
+                    entity.flavor = flavors[0]
+
+                entity.set_physical_entity(entity=None)
+                # set container
+                entity.set_container(container_idx[cid])
+                # set parent
+                if parents is not None and entity.model.parent_id is not None:
+                    entity.set_parent(parents.get(entity.model.parent_id, {}))
+                # set error reason
+                entity.reason = entity.get_errors()
 
-        # execute custom post_list
-        for item in class_idx.values():
-            item["class"].customize_list(self, item["entities"], container=item["container"], *args, **kvargs)
+            # execute custom post_list
+            for item in class_idx.values():
+                item["class"].customize_list(self, item["entities"], container=item["container"], *args, **kvargs)
 
+        self.logger.debug(
+            "Customize %s resources with %s queries in %.3fs" % (len(entities), counter.count, counter.elapsed)
+        )
         return entities
 
     @trace(entity="Resource", op="view")
@@ -1039,6 +1121,65 @@ class ResourceController(ApiController):
         self.logger.info("Get linked resources: %s" % truncate(res))
         return res, total
 
+    def __get_linked_entities(self, models, run_customize=False, customize_func="customize_list"):
+        """Create the entities of linked resource records
+
+        :param models: linked resource records with field resource
+        :param run_customize: if True run customize [default=False]
+        :param customize_func: customize function to run [default=customize_list]
+        :return: dict like {<resource_id>: [<list o linked resource instances>]}
+        """
+        resp = {}
+        container_idx = {}
+        class_idx = {}
+
+        for model in models:
+            entity_class = import_class(model.objclass)
+            entity = entity_class(
+                self,
+                oid=model.id,
+                objid=model.objid,
+                name=model.name,
+                active=model.active,
+                desc=model.desc,
+                model=model,
+            )
+            entity.link_attr = model.link_attr
+            entity.link_type = model.link_type
+            entity.link_creation = model.link_creation
+            try:
+                resp[model.resource].append(entity)
+            except:
+                resp[model.resource] = [entity]
+
+            if run_customize is True:
+                index = "%s-%s" % (model.objdef, model.container_id)
+                cid = model.container_id
+                if index in class_idx:
+                    class_idx[index]["entities"].append(entity)
+                else:
+                    # get connection
+                    if cid not in container_idx.keys():
+                        container_idx[cid] = self.get_container(cid)
+                    class_idx[index] = {
+                        "class": entity.__class__,
+                        "container": container_idx[cid],
+                        "entities": [entity],
+                    }
+                    self.logger.debug("Append new entity type: %s" % model.objdef)
+
+                entity.set_physical_entity(entity=None)
+                # set container
+                entity.set_container(container_idx[cid])
+
+        # execute custom post_list
+        if run_customize is True:
+            for item in class_idx.values():
+                func = getattr(item["class"], customize_func)
+                func(self, item["entities"], container=item["container"])
+
+        return resp
+
     def __get_linked_resources_internal(self, query_method, resources, *args, **kwargs):
         """Get direct linked resources. Use this method for internal query without authorization.
 
@@ -1064,55 +1205,7 @@ class ResourceController(ApiController):
                 models = []
             else:
                 models = query_method(resources, link_type, container_id, objdef, objdefs)
-            resp = {}
-            container_idx = {}
-            class_idx = {}
-
-            for model in models:
-                entity_class = import_class(model.objclass)
-                entity = entity_class(
-                    self,
-                    oid=model.id,
-                    objid=model.objid,
-                    name=model.name,
-                    active=model.active,
-                    desc=model.desc,
-                    model=model,
-                )
-                entity.link_attr = model.link_attr
-                entity.link_type = model.link_type
-                entity.link_creation = model.link_creation
-                try:
-                    resp[model.resource].append(entity)
-                except:
-                    resp[model.resource] = [entity]
-
-                if run_customize is True:
-                    index = "%s-%s" % (model.objdef, model.container_id)
-                    cid = model.container_id
-                    if index in class_idx:
-                        class_idx[index]["entities"].append(entity)
-                    else:
-                        # get connection
-                        if cid not in container_idx.keys():
-                            container_idx[cid] = self.get_container(cid)
-                        class_idx[index] = {
-                            "class": entity.__class__,
-                            "container": container_idx[cid],
-                            "entities": [entity],
-                        }
-                        self.logger.debug("Append new entity type: %s" % model.objdef)
-
-                    entity.set_physical_entity(entity=None)
-                    # set container
-                    entity.set_container(container_idx[cid])
-
-            # execute custom post_list
-            if run_customize is True:
-                for item in class_idx.values():
-                    func = getattr(item["class"], customize_func)
-                    func(self, item["entities"], container=item["container"])
-
+            resp = self.__get_linked_entities(models, run_customize=run_customize, customize_func=customize_func)
             self.logger.info("Get direct linked resources: %s" % truncate(resp))
 
             return resp
@@ -1120,6 +1213,34 @@ class ResourceController(ApiController):
             self.logger.warning("", exc_info=True)
             return {}
 
+    @trace(entity="Resource", op="view")
+    def get_aggregated_linked_resources_internal(self, resources, physical_objdefs, site_objdef, run_customize=True):
+        """Get zone, physical, site and indirect linked resources of some aggregated resources with a single query.
+        Use this method for internal query without authorization.
+
+        :param resources: aggregated resource id list
+        :param physical_objdefs: physical resource definitions
+        :param site_objdef: site definition
+        :param run_customize: if True run customize_list of physical resources [default=True]
+        :return: dict like {"zone": {<resource_id>: [..]}, "physical": {<zone resource id>: [..]},
+            "site": {<resource_id>: [..]}, "indirect": {<resource_id>: [..]}}
+        """
+        resp = {"zone": {}, "physical": {}, "site": {}, "indirect": {}}
+        try:
+            if len(resources) == 0:
+                return resp
+            models = self.manager.get_aggregated_linked_resources_internal(resources, physical_objdefs, site_objdef)
+            roles = {role: [] for role in resp.keys()}
+            for model in models:
+                roles[model.role].append(model)
+            for role, items in roles.items():
+                resp[role] = self.__get_linked_entities(items, run_customize=run_customize and role == "physical")
+            self.logger.info("Get aggregated linked resources: %s" % truncate(resp))
+            return resp
+        except:
+            self.logger.warning("", exc_info=True)
+            return resp
+
     @trace(entity="Resource", op="view")
     def get_directed_linked_resources_internal(self, resources, *args, **kwargs):
         """Get direct linked resources. Use this method for internal query without authorization.
@@ -1160,6 +1281,67 @@ class ResourceController(ApiController):
             **kwargs,
         )
 
+    @trace(entity="Resource", op="view")
+    def get_resource_descendants_internal(
+        self, resource, max_depth=None, objdefs=None, entities=False, run_customize=False, recursive=False
+    ):
+        """Get the resource tree below a resource. Tree is read one depth level at a time, or with a single recursive
+        query, instead of one query for each node. Use this method for internal query without authorization.
+
+        :param resource: root resource id
+        :param max_depth: max depth to read. Children of root have depth 1 [optional]
+        :param objdefs: return only resources with these definitions. All the tree is read anyway [optional]
+        :param entities: if True return resource instances, otherwise return lightweight records with fields id, uuid,
+            objid, name, ext_id, desc, active, parent_id, container_id, attribute, state, objclass, objdef and
+            depth [default=False]
+        :param run_customize: with entities if True run customize_list once for every resource class and container
+            [default=False]
+        :param recursive: if True read the tree with a recursive query. Use only with databases that support it
+            [default=False]
+        :return: list of records or resource instances ordered by depth
+        """
+        models = self.manager.get_resource_descendants_internal([resource], max_depth=max_depth, recursive=recursive)
+        if objdefs is not None:
+            models = [m for m in models if m.objdef in objdefs]
+        if entities is False:
+            self.logger.debug("Get resource %s descendants: %s" % (resource, len(models)))
+            return models
+
+        res = []
+        container_idx = {}
+        class_idx = {}
+        for model in models:
+            entity_class = import_class(model.objclass)
+            entity = entity_class(
+                self,
+                oid=model.id,
+                objid=model.objid,
+                name=model.name,
+                active=model.active,
+                desc=model.desc,
+                model=model,
+            )
+            entity.depth = model.depth
+
+            cid = model.container_id
+            if cid not in container_idx:
+                container_idx[cid] = self.get_container(cid, connect=run_customize)
+            entity.set_container(container_idx[cid])
+
+            if run_customize is True:
+                index = "%s-%s" % (model.objdef, cid)
+                if index not in class_idx:
+                    class_idx[index] = {"class": entity_class, "container": container_idx[cid], "entities": []}
+                class_idx[index]["entities"].append(entity)
+                entity.set_physical_entity(entity=None)
+            res.append(entity)
+
+        for item in class_idx.values():
+            item["class"].customize_list(self, item["entities"], container=item["container"])
+
+        self.logger.debug("Get resource %s descendants: %s" % (resource, truncate(res)))
+        return res
+
     @trace(entity="Resource", op="view")
     def get_aggregated_resource_from_physical_resource(self, resource_id, parent_id=None):
         """Get aggregate resource from physical. Use this method for internal query without authorization.
@@ -1429,7 +1611,8 @@ class ResourceController(ApiController):
             self.check_authorization(ResourceLink.objtype, ResourceLink.objdef, None, "insert")
 
         # get resources
-        start_resource_id = self.get_simple_resource(start_resource).oid
+        start_resource = self.get_simple_resource(start_resource)
+        start_resource_id = start_resource.oid
         end_resource_id = self.get_simple_resource(end_resource).oid
 
         try:
@@ -1447,6 +1630,10 @@ class ResourceController(ApiController):
             # add object and permission
             ResourceLink(self, oid=link.id).register_object([objid], desc=name)
 
+            # aggregated resources cache the resources linked by site
+            if type is not None and type.startswith("relation") and hasattr(start_resource, "reset_site_resources"):
+                start_resource.reset_site_resources()
+
             self.logger.info("Add new link: %s" % name)
             return link.uuid
         except TransactionError as ex:
@@ -1468,6 +1655,69 @@ class ResourceController(ApiController):
             task = {}
         return task
 
+    def add_task_step_profile(self, task_id, task_name, step, profile):
+        """Save the profile of a task step. Profiles are kept in a redis sorted set by day ordered by step elapsed
+        time. Only the task_profile_max slowest steps of every day are kept.
+
+        :param task_id: task id
+        :param task_name: task name
+        :param step: step name
+        :param profile: profile summary returned by StepProfiler
+        """
+        now = datetime.today()
+        key = "%s.%s" % (self.task_profile_prefix, now.strftime("%Y%m%d"))
+        record = {"task_id": task_id, "task": task_name, "step": step, "date": format_date(now)}
+        record.update(profile)
+
+        try:
+            pipe = self.redis_cache.pipeline()
+            pipe.zadd(key, {jsonDumps(record): profile.get("elapsed", 0)})
+            pipe.zremrangebyrank(key, 0, -self.task_profile_max - 1)
+            pipe.expire(key, self.task_profile_days * 86400)
+            pipe.execute()
+        except Exception as ex:
+            self.logger.warning("Task %s step %s profile can not be saved: %s" % (task_id, step, ex))
+
+    @trace(entity="Resource", op="use")
+    def get_task_step_profiles(self, days=1, size=20, task=None, step=None):
+        """Get the slowest task steps profiled in the last days.
+
+        :param days: number of days to read [default=1]
+        :param size: max number of steps [default=20]
+        :param task: task name [optional]
+        :param step: step name [optional]
+        :return: list of step profiles ordered by elapsed time desc
+        :raises ApiManagerError: raise :class:`ApiManagerError`
+        """
+        # check authorization
+        if operation.authorize is True:
+            self.check_authorization("task", "Manager", "*", "view")
+
+        now = datetime.today()
+        keys = [
+            "%s.%s" % (self.task_profile_prefix, (now - timedelta(days=day)).strftime("%Y%m%d"))
+            for day in range(min(days, self.task_profile_days))
+        ]
+
+        pipe = self.redis_cache.pipeline()
+        for key in keys:
+            # filters are applied after the query so read all the profiles of a day when they are used
+            pipe.zrevrange(key, 0, size - 1 if task is None and step is None else -1)
+
+        res = []
+        for items in pipe.execute():
+            for item in items:
+                record = json.loads(item)
+                if task is not None and record.get("task") != task:
+                    continue
+                if step is not None and record.get("step") != step:
+                    continue
+                res.append(record)
+
+        res.sort(key=lambda r: r.get("elapsed", 0), reverse=True)
+        self.logger.debug("Get %s slowest task steps of the last %s days" % (size, days))
+        return res[:size]
+
     @trace(entity="Resource", op="use")
     def add_job(self, job_id, job_name, params):
         self.manager.add_job(job_id, job_name, params=compat(params))
@@ -546,6 +546,8 @@ class ResourceDbManager(AbstractDbManager):
 
     ENTITY = TypeVar("ENTITY")
 
+    tree_max_depth = 20  #: max depth read by get_resource_descendants_internal
+
     @query
     def get_paginated_entities(
         self,
@@ -1246,6 +1248,47 @@ class ResourceDbManager(AbstractDbManager):
         self.logger.debug2("Get resource by ext_id %s: %s" % (ext_id, truncate(res)))
         return res
 
+    @query
+    def get_resources_by_extids(self, ext_ids, container=None):
+        """Get resources by id in remote platform with a single query.
+
+        :param ext_ids: list of entity remote platform id
+        :param container :class:`int`: resource container id
+        :return: list of Resource
+        :raises QueryError: raise :class:`QueryError`
+        """
+        ext_ids = list(set(ext_ids))
+        if len(ext_ids) == 0:
+            return []
+
+        session = self.get_session()
+        res = session.query(Resource).filter(Resource.ext_id.in_(ext_ids))
+        if container is not None:
+            res = res.filter(Resource.container_id == container)
+        res = res.all()
+
+        self.logger.debug2("Get resources by %s ext_ids: %s" % (len(ext_ids), truncate(res)))
+        return res
+
+    @query
+    def get_resource_extid_index(self, container):
+        """Get ext_id and id of all the resources of a container with an ext_id.
+
+        :param container :class:`int`: resource container id
+        :return: list of (ext_id, id)
+        :raises QueryError: raise :class:`QueryError`
+        """
+        session = self.get_session()
+        res = (
+            session.query(Resource.ext_id, Resource.id)
+            .filter(Resource.container_id == container)
+            .filter(Resource.ext_id != None)
+            .filter(Resource.ext_id != "")
+            .all()
+        )
+        self.logger.debug2("Get container %s ext_id index: %s items" % (container, len(res)))
+        return res
+
     def get_resources(self, *args, **kvargs):
         """Get resources.
 
@@ -1272,6 +1315,10 @@ class ResourceDbManager(AbstractDbManager):
         :param size: number of entities to show in list per page [default=0]
         :param order: sort order [default=DESC]
         :param field: sort field [default=id]
+        :param keyset: if True page by resource id instead of offset. page and field are ignored [default=False]
+        :param keyset_id: with keyset return resources after this id in sort order [optional]
+        :param with_total: with keyset if False do not count all the resources and return None as total
+            [default=True]
         :rtype: list of :class:`Resource`
         :raises QueryError: raise :class:`QueryError`
         """
@@ -1281,7 +1328,7 @@ class ResourceDbManager(AbstractDbManager):
         custom_select = None
         name = kvargs.pop("name", None)
         if kvargs.get("ids", None) is not None:
-            filters.append("AND t1.id in :ids")
+            filters.append("AND t3.id in :ids")
         if kvargs.get("uuids", None) is not None:
             filters.append("AND uuid in :uuids")
         if kvargs.get("objid", None) is not None:
@@ -1351,16 +1398,74 @@ class ResourceDbManager(AbstractDbManager):
             kvargs = self.order_query_resourcetags(kvargs)
             filters.append("AND t3.tags=:resourcetags")
 
+        if kvargs.pop("keyset", False) is True:
+            return self.get_resources_by_keyset(filters, custom_select=custom_select, **kvargs)
+
         res, total = self.get_paginated_entities(
             Resource, filters=filters, custom_select=custom_select, *args, **kvargs
         )
         return res, total
 
     @query
-    def get_resources_by_type(self, type=None, types=None, container=None):
+    def get_resources_by_keyset(
+        self, filters, custom_select=None, size=10, order="DESC", keyset_id=None, with_total=True, **kvargs
+    ):
+        """Get resources ordered by id. Page starts after keyset_id, so its cost does not depend on how many resources
+        come before it, like it happens with offset.
+
+        :param filters: query filters built by get_resources
+        :param custom_select: custom select used in place of resource table [optional]
+        :param size: number of resources to return. -1 or 0 return all [default=10]
+        :param order: sort order [default=DESC]
+        :param keyset_id: return resources after this id in sort order [optional]
+        :param with_total: if False do not count all the resources and return None as total [default=True]
+        :param kvargs: query params. active, creation_date, modification_date and expiry_date are applied like in
+            get_paginated_entities
+        :return: (list of :class:`Resource`, total)
+        :raises QueryError: raise :class:`QueryError`
+        """
+        session = self.get_session()
+        table = "resource" if custom_select is None else custom_select
+        order = "ASC" if str(order).upper() == "ASC" else "DESC"
+        params = {k: v for k, v in kvargs.items() if k not in ["page", "field", "tags", "with_perm_tag"]}
+
+        sql = ["FROM %s t3 WHERE 1=1" % table]
+        sql.extend(filters)
+        # same base filters applied by get_paginated_entities in offset pagination
+        if params.get("active", None) is not None:
+            sql.append("AND t3.active=:active")
+        if params.get("creation_date", None) is not None:
+            sql.append("AND t3.creation_date>=:creation_date")
+        if params.get("modification_date", None) is not None:
+            sql.append("AND t3.modification_date>=:modification_date")
+        if params.get("expiry_date", None) is not None:
+            sql.append("AND t3.expiry_date>=:expiry_date")
+
+        total = None
+        if with_total is True:
+            smtp = text(" ".join(["SELECT count(t3.id)"] + sql))
+            total = session.execute(smtp, params).scalar()
+
+        if keyset_id is not None:
+            sql.append("AND t3.id%s:keyset_id" % ("<" if order == "DESC" else ">"))
+            params["keyset_id"] = keyset_id
+        sql.append("ORDER BY t3.id %s" % order)
+        if size is not None and size > 0:
+            sql.append("LIMIT :keyset_size")
+            params["keyset_size"] = size
+
+        smtp = text(" ".join(["SELECT t3.*"] + sql))
+        res = session.query(Resource).from_statement(smtp).params(**params).all()
+
+        self.logger.debug2("Get resources by keyset %s: %s" % (keyset_id, truncate(res)))
+        return res, total
+
+    @query
+    def get_resources_by_type(self, type=None, types=None, container=None, ids=None):
         """Get resources by type.
 
         :param int container: container id. [OPTIONAL]
+        :param list ids: resource id list. [OPTIONAL]
         :param list types resource type list. [OPTIONAL]
             Ex. ['vsphere.dc.folder','vsphere.dc.folder.server']
         :param str type: resource type complete or partial value. [OPTIONAL]
@@ -1383,6 +1488,9 @@ class ResourceDbManager(AbstractDbManager):
         elif types is not None:
             sql.append("AND t2.value in :types")
             params["types"] = types
+        if ids is not None:
+            sql.append("AND t1.id in :ids")
+            params["ids"] = ids
 
         smtp = text(" ".join(sql))
         query = session.query(Resource).from_statement(smtp).params(**params)
@@ -1409,6 +1517,31 @@ class ResourceDbManager(AbstractDbManager):
         self.logger.debug2("Get resource %s links: %s" % (resource, truncate(res)))
         return res
 
+    @query
+    def count_resource_links_internal(self, resources, link_types):
+        """Count the links that start from some resources grouped by resource and link type. Use this method for
+        internal query without authorization.
+
+        :param resources: start resource id list
+        :param link_types: link type list
+        :return: list of records with start_resource_id, link_type and count
+        :raise QueryError:
+        """
+        if len(resources) == 0 or len(link_types) == 0:
+            return []
+
+        session = self.get_session()
+        fields = self.map_field_to_column(["start_resource_id", "link_type", "count"])
+        sql = [
+            "SELECT t4.start_resource_id, t4.type as link_type, count(t4.id) as count FROM resource_link t4",
+            "WHERE t4.start_resource_id in :resources AND t4.type in :link_types",
+            "GROUP BY t4.start_resource_id, t4.type",
+        ]
+        params = {"resources": list(resources), "link_types": list(link_types)}
+        res = session.query(*fields).from_statement(text(" ".join(sql))).params(**params).all()
+        self.logger.debug2("Count resources %s links: %s" % (truncate(resources), truncate(res)))
+        return res
+
     def get_link_among_resources_internal(self, start, end):
         """Get link among resources. Use this method for internal query without authorization.
 
@@ -1707,6 +1840,131 @@ class ResourceDbManager(AbstractDbManager):
         self.logger.debug2("Get direct linked resources: %s" % truncate(res))
         return res
 
+    @query
+    def get_resource_descendants_internal(self, resources, max_depth=None, recursive=False):
+        """Get the descendants of some resources following parent_id. Use this method for internal query without
+        authorization.
+
+        Tree is read one depth level at a time with a query for each level. With recursive=True it is read with a
+        single recursive common table expression. Use it only with databases that support it, like mysql 8 or
+        mariadb 10.2.
+
+        :param resources: root resource id list
+        :param max_depth: max depth to read. Children of roots have depth 1 [default=tree_max_depth]
+        :param recursive: if True use a recursive query [default=False]
+        :return: list of records ordered by depth. Every record has the depth field
+        :raise QueryError:
+        """
+        session = self.get_session()
+        if max_depth is None:
+            max_depth = self.tree_max_depth
+        columns = (
+            "t1.id, t1.uuid, t1.objid, t1.name, t1.ext_id, t1.desc, t1.active, t1.parent_id, t1.container_id, "
+            "t1.attribute, t1.state, t3.objclass, t3.value as objdef, t1.creation_date, t1.modification_date, "
+            "t1.expiry_date"
+        )
+        fields = self.map_field_to_column(
+            [
+                "depth",
+                "id",
+                "uuid",
+                "objid",
+                "name",
+                "ext_id",
+                "desc",
+                "active",
+                "parent_id",
+                "container_id",
+                "attribute",
+                "state",
+                "objclass",
+                "objdef",
+                "creation_date",
+                "modification_date",
+                "expiry_date",
+            ]
+        )
+        expiry = "(t1.expiry_date>:expiry_date OR t1.expiry_date is null)"
+        params = {"expiry_date": datetime.today(), "max_depth": max_depth}
+
+        if recursive is True:
+            sql = [
+                "WITH RECURSIVE tree (id, depth) AS (",
+                "SELECT t1.id, 1 FROM resource t1 WHERE t1.parent_id in :resources AND %s" % expiry,
+                "UNION ALL",
+                "SELECT t1.id, tree.depth+1 FROM resource t1, tree",
+                "WHERE t1.parent_id=tree.id AND tree.depth<:max_depth AND %s)" % expiry,
+                "SELECT tree.depth, %s FROM tree, resource t1, resource_type t3" % columns,
+                "WHERE tree.id=t1.id AND t1.type_id=t3.id ORDER BY tree.depth, t1.id",
+            ]
+            params["resources"] = resources
+            res = session.query(*fields).from_statement(text(" ".join(sql))).params(**params).all()
+            self.logger.debug2("Get resources %s descendants: %s" % (resources, truncate(res)))
+            return res
+
+        sql = [
+            "SELECT :depth as depth, %s FROM resource t1, resource_type t3" % columns,
+            "WHERE t1.type_id=t3.id AND t1.parent_id in :resources AND %s ORDER BY t1.id" % expiry,
+        ]
+        smtp = text(" ".join(sql))
+
+        res = []
+        visited = set(resources)
+        parents = list(resources)
+        depth = 1
+        while len(parents) > 0 and depth <= max_depth:
+            params.update(depth=depth, resources=parents)
+            level = session.query(*fields).from_statement(smtp).params(**params).all()
+            # skip resources already read to stop on parent loops
+            level = [r for r in level if r.id not in visited]
+            visited.update(r.id for r in level)
+            res.extend(level)
+            parents = [r.id for r in level]
+            depth += 1
+
+        self.logger.debug2("Get resources %s descendants: %s" % (resources, truncate(res)))
+        return res
+
+    @query
+    def get_resources_state_internal(self, ids):
+        """Get state and active flag of a list of resources. Use this method for internal query without authorization.
+
+        :param ids: list of resource id
+        :return: list of records with id, active and state
+        :raise QueryError:
+        """
+        if len(ids) == 0:
+            return []
+        session = self.get_session()
+        fields = self.map_field_to_column(["id", "active", "state"])
+        smtp = text("SELECT t1.id, t1.active, t1.state FROM resource t1 WHERE t1.id in :ids")
+        res = session.query(*fields).from_statement(smtp).params(ids=list(ids)).all()
+        self.logger.debug2("Get resources %s state: %s" % (ids, truncate(res)))
+        return res
+
+    @query
+    def get_site_linked_resources_internal(self, resource):
+        """Get the resources linked to an aggregated resource with a relation.<site id> link. Use this method for
+        internal query without authorization.
+
+        :param resource: aggregated resource id
+        :return: list of records with link_type, id, uuid, active, state and objdef
+        :raise QueryError:
+        """
+        session = self.get_session()
+        fields = self.map_field_to_column(["link_type", "id", "uuid", "active", "state", "objdef"])
+        sql = [
+            "SELECT t4.type as link_type, t1.id, t1.uuid, t1.active, t1.state, t3.value as objdef",
+            "FROM resource_link t4, resource t1, resource_type t3",
+            "WHERE t4.start_resource_id=:resource AND t4.end_resource_id=t1.id AND t1.type_id=t3.id",
+            "AND t4.type like :link_type AND (t1.expiry_date>:expiry_date OR t1.expiry_date is null)",
+            "ORDER BY t1.id DESC",
+        ]
+        params = {"resource": resource, "link_type": "relation.%", "expiry_date": datetime.today()}
+        res = session.query(*fields).from_statement(text(" ".join(sql))).params(**params).all()
+        self.logger.debug2("Get resource %s site linked resources: %s" % (resource, truncate(res)))
+        return res
+
     @query
     def get_aggregated_resource_from_physical_resource(self, resource_id, parent_id=None):
         """
@@ -1825,6 +2083,91 @@ WHERE  rl.start_resource_id = :oid
         self.logger.debug2("Get indirect linked resources: %s" % truncate(res))
         return res
 
+    @query
+    def get_aggregated_linked_resources_internal(self, resources, physical_objdefs, site_objdef):
+        """Get in a single query the resources linked to some aggregated resources of the provider. Use this method for
+        internal query without authorization. Every record has a role field:
+
+        - zone: resource linked by the aggregated resource with a relation.<site id> link. Field resource is the
+          aggregated resource id
+        - physical: resource of physical_objdefs linked by a zone resource with a relation link. Field resource is the
+          zone resource id
+        - site: site of the availability zone that is parent of a zone resource. Field resource is the aggregated
+          resource id and link_type is the type of the zone link
+        - indirect: resource that links the aggregated resource. Field resource is the aggregated resource id
+
+        :param resources: aggregated resource id list
+        :param physical_objdefs: physical resource definitions
+        :param site_objdef: site definition
+        :return: list of records
+        :raise QueryError:
+        """
+        session = self.get_session()
+        columns = (
+            "t1.id, t1.uuid, t1.objid, t1.name, t1.ext_id, t1.desc, t1.active, t1.parent_id, t1.container_id, "
+            "t1.attribute, t1.state, t3.objclass, t3.value as objdef, t1.creation_date, t1.modification_date, "
+            "t1.expiry_date, t2.attributes as link_attr, t2.type as link_type, t2.creation_date as link_creation"
+        )
+        sql = [
+            "SELECT t2.start_resource_id as resource, 'zone' as role, %s" % columns,
+            "FROM resource_link t2, resource t1, resource_type t3",
+            "WHERE t2.start_resource_id in :resources AND t2.type like :zone_link_type",
+            "AND t2.end_resource_id=t1.id AND t1.type_id=t3.id",
+            "UNION ALL",
+            "SELECT t2.start_resource_id as resource, 'physical' as role, %s" % columns,
+            "FROM resource_link t4, resource_link t2, resource t1, resource_type t3",
+            "WHERE t4.start_resource_id in :resources AND t4.type like :zone_link_type",
+            "AND t2.start_resource_id=t4.end_resource_id AND t2.type=:physical_link_type",
+            "AND t2.end_resource_id=t1.id AND t1.type_id=t3.id AND t3.value in :physical_objdefs",
+            "UNION ALL",
+            "SELECT t2.start_resource_id as resource, 'site' as role, %s" % columns,
+            "FROM resource_link t2, resource t5, resource t6, resource t1, resource_type t3",
+            "WHERE t2.start_resource_id in :resources AND t2.type like :zone_link_type",
+            "AND t2.end_resource_id=t5.id AND t5.parent_id=t6.id AND t6.parent_id=t1.id",
+            "AND t1.type_id=t3.id AND t3.value=:site_objdef",
+            "UNION ALL",
+            "SELECT t2.end_resource_id as resource, 'indirect' as role, %s" % columns,
+            "FROM resource_link t2, resource t1, resource_type t3",
+            "WHERE t2.end_resource_id in :resources AND t2.start_resource_id=t1.id AND t1.type_id=t3.id",
+            "AND t1.id not in :resources",
+        ]
+        params = {
+            "resources": resources,
+            "zone_link_type": "relation.%",
+            "physical_link_type": "relation",
+            "physical_objdefs": physical_objdefs,
+            "site_objdef": site_objdef,
+        }
+
+        fields = self.map_field_to_column(
+            [
+                "resource",
+                "role",
+                "id",
+                "uuid",
+                "objid",
+                "name",
+                "ext_id",
+                "desc",
+                "active",
+                "parent_id",
+                "container_id",
+                "attribute",
+                "state",
+                "objclass",
+                "objdef",
+                "creation_date",
+                "modification_date",
+                "expiry_date",
+                "link_attr",
+                "link_type",
+                "link_creation",
+            ]
+        )
+        res = session.query(*fields).from_statement(text(" ".join(sql))).params(**params).all()
+        self.logger.debug2("Get aggregated resources %s linked resources: %s" % (truncate(resources), truncate(res)))
+        return res
+
     def add_resource(
         self,
         objid=None,
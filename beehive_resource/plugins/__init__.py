@@ -1,3 +1,70 @@
 # SPDX-License-Identifier: EUPL-1.2
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
+
+from os import getenv
+from beecell.simple import import_class
+
+#: environment variable with the comma separated names of the plugins enabled by a deployment. Plugin name is the name
+#: of the plugin package, like openstack or vsphere. When it is not set all the configured plugins are enabled
+ENABLED_PLUGINS_ENV = "BEEHIVE_RESOURCE_PLUGINS"
+
+
+def get_enabled_plugins():
+    """Get the names of the plugins enabled by the deployment
+
+    :return: set of plugin names or None if all the plugins are enabled
+    """
+    value = getenv(ENABLED_PLUGINS_ENV, "")
+    names = {name.strip() for name in value.split(",") if name.strip() != ""}
+    if len(names) == 0:
+        return None
+    return names
+
+
+class ResourcePlugin(object):
+    """Base resource plugin. Container and api classes are listed as dotted paths and imported only when an enabled
+    plugin is initialized or registered. Importing a plugin package does not load the remote platform clients, and a
+    disabled plugin does not load them at all.
+
+    :param module: resource module instance
+    """
+
+    name = None  #: plugin name
+    container_class = None  #: dotted path of the container class
+    api_classes = []  #: dotted paths of the api classes
+
+    def __init__(self, module):
+        self.module = module
+
+    def is_enabled(self):
+        """Check plugin is enabled by the deployment
+
+        :return: True if plugin is enabled
+        """
+        enabled = get_enabled_plugins()
+        return enabled is None or self.name in enabled
+
+    def get_container_class(self):
+        """Import container class
+
+        :return: container class
+        """
+        return import_class(self.container_class)
+
+    def init(self):
+        if self.is_enabled() is False:
+            return
+        service = self.get_container_class()(self.module.get_controller())
+        service.init_object()
+
+    def register(self):
+        if self.is_enabled() is False:
+            self.module.logger.info("Plugin %s is not enabled" % self.name)
+            return
+
+        apis = [import_class(api_class) for api_class in self.api_classes]
+        self.module.set_apis(apis)
+
+        container_class = self.get_container_class()
+        self.module.add_container(container_class.objdef, container_class)
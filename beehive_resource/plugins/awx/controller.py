@@ -3,11 +3,11 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 import json
-from time import sleep
 from datetime import datetime
 from beedrones.awx.client import AwxManager, AwxError
 from beehive.common.apimanager import ApiManagerError
 from beehive_resource.container import Orchestrator
+from beehive_resource.util import job_waiter
 from beehive_resource.plugins.awx.entity.awx_ad_hoc_command import AwxAdHocCommand
 from beehive_resource.plugins.awx.entity.awx_job_template import AwxJobTemplate
 from beehive_resource.plugins.awx.entity.awx_project import AwxProject
@@ -195,29 +195,35 @@ class AwxContainer(Orchestrator):
     def wait_for_awx_job(
         self, job_query_func, job_id, maxtime=3600, delta=1, job_error_func=None, job_success_func=None
     ):
-        job = job_query_func(job_id)  # job-get
+        """Wait for awx job. Job is polled by the shared job waiter, the caller sleeps until job ends.
+
+        :param job_query_func: function used to get the job
+        :param job_id: job id
+        :param maxtime: max seconds to wait [default=3600]
+        :param delta: first poll interval [default=1]
+        :param job_error_func: function used to get the job error message [optional]
+        :param job_success_func: function used to get the job output [optional]
+        :return: job_success_func output
+        :raise ApiManagerError:
+        """
+        self.logger.debug("wait for awx job %s" % job_id)
+        name = "awx.%s.%s" % (self.oid, getattr(job_query_func, "__qualname__", "job"))
+        try:
+            job = job_waiter.wait(job_query_func, job_id, maxtime=maxtime, delta=delta, name=name)
+        except TimeoutError:
+            raise TimeoutError("awx job %s query timeout" % job_id)
         status = job["status"]
         self.logger.debug("wait for awx job %s - status %s" % (job_id, status))
-        elapsed = 0
-
-        while status not in ["successful", "failed", "error", "canceled"]:
-            job = job_query_func(job_id)
-            status = job["status"]
-            self.logger.debug("wait for awx job %s - status %s" % (job_id, status))
-            sleep(delta)
-            elapsed += delta
-            if elapsed >= maxtime:
-                raise TimeoutError("awx job %s query timeout" % job_id)
 
         if status in ["failed", "error"]:
-            self.logger.error(job["result_traceback"])
+            self.logger.error(job.get("result_traceback"))
             err = ""
             if job_error_func is not None:
                 err = job_error_func()
             raise ApiManagerError("awx job %s error: %s" % (job_id, err))
 
-        elif status == "cancelled":
-            self.logger.error(job["awx job %s cancelled" % job_id])
+        elif status == "canceled":
+            self.logger.error("awx job %s cancelled" % job_id)
             raise ApiManagerError("awx job %s cancelled" % job_id)
 
         else:
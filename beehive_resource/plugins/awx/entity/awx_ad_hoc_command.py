@@ -3,11 +3,11 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 import json
 
-from time import sleep
 
 import logging
 from beecell.simple import id_gen, dict_get, truncate
 from beehive_resource.plugins.awx.entity import AwxResource
+from beehive_resource.util import job_waiter
 
 logger = logging.getLogger(__name__)
 
@@ -410,15 +410,17 @@ class AwxAdHocCommand(AwxResource):
         """
         res = {}
         status = None
-        elasped = 0
-        delta = 0.5
-        maxtime = 15
-        while status not in ["successful", "failed", "error", "canceled"]:
-            status = self.container.conn.ad_hoc_command.get(self.ext_id).get("status")
-            sleep(delta)
-            elasped += delta
-            if elasped > maxtime:
-                break
+        try:
+            command = job_waiter.wait(
+                self.container.conn.ad_hoc_command.get,
+                self.ext_id,
+                maxtime=15,
+                delta=0.5,
+                name="awx.%s.ad_hoc_command" % self.container.oid,
+            )
+            status = command.get("status")
+        except TimeoutError:
+            self.logger.warning("ad hoc command %s does not end in 15s" % self.oid)
         if status == "successful":
             res = self.container.conn.ad_hoc_command.stdout(self.ext_id)
 
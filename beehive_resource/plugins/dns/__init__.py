@@ -31,22 +31,14 @@ beehive auth objects perms subsystem=resource type=Dns*
 For each permissions with action *:
 beehive auth roles add-perm ApiSuperAdmin <perm_id>
 """
-from beehive_resource.plugins.dns.controller import DnsContainer
-from beehive_resource.plugins.dns.views.record_a import DnsRecordAAPI
-from beehive_resource.plugins.dns.views.record_cname import DnsRecordCnameAPI
-from beehive_resource.plugins.dns.views.zones import DnsZoneAPI
+from beehive_resource.plugins import ResourcePlugin
 
 
-class DnsPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = DnsContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [DnsZoneAPI, DnsRecordAAPI, DnsRecordCnameAPI]
-        self.module.set_apis(apis)
-
-        self.module.add_container(DnsContainer.objdef, DnsContainer)
+class DnsPlugin(ResourcePlugin):
+    name = "dns"
+    container_class = "beehive_resource.plugins.dns.controller.DnsContainer"
+    api_classes = [
+        "beehive_resource.plugins.dns.views.zones.DnsZoneAPI",
+        "beehive_resource.plugins.dns.views.record_a.DnsRecordAAPI",
+        "beehive_resource.plugins.dns.views.record_cname.DnsRecordCnameAPI",
+    ]
@@ -4,7 +4,7 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 from beehive.common.apimanager import ApiView
-from beehive_resource.plugins.dns import DnsContainer
+from beehive_resource.plugins.dns.controller import DnsContainer
 from beehive_resource.view import ResourceApiView
 
 
@@ -2,20 +2,12 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from .view import DummyAPI
-from .controller import DummyContainer
+from beehive_resource.plugins import ResourcePlugin
 
 
-class DummyPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = DummyContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [DummyAPI]
-        self.module.set_apis(apis)
-
-        self.module.add_container(DummyContainer.objdef, DummyContainer)
+class DummyPlugin(ResourcePlugin):
+    name = "dummy"
+    container_class = "beehive_resource.plugins.dummy.controller.DummyContainer"
+    api_classes = [
+        "beehive_resource.plugins.dummy.view.DummyAPI",
+    ]
@@ -2,20 +2,12 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from .view import DummyAPIV2
-from .controller import DummyContainerV2
+from beehive_resource.plugins import ResourcePlugin
 
 
-class DummyPluginV2(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = DummyContainerV2(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [DummyAPIV2]
-        self.module.set_apis(apis)
-
-        self.module.add_container(DummyContainerV2.objdef, DummyContainerV2)
+class DummyPluginV2(ResourcePlugin):
+    name = "dummy_v2"
+    container_class = "beehive_resource.plugins.dummy_v2.controller.DummyContainerV2"
+    api_classes = [
+        "beehive_resource.plugins.dummy_v2.view.DummyAPIV2",
+    ]
@@ -8,7 +8,8 @@ from beehive_resource.container import Orchestrator
 class DummyContainerV2(Orchestrator):
     """Dummy container
 
-    :param connection: json string like {}
+    :param connection: json string like {"test": {"remote_size": 100}}. remote_size is the number of entities of the
+        simulated remote platform used by discover [optional]
     """
 
     objdef = "DummyV2"
@@ -62,7 +63,7 @@ class DummyContainerV2(Orchestrator):
             "name": name,
             "desc": desc + " test",
             "active": active,
-            "conn": {"test": {}},
+            "conn": {"test": conn.get("test", {}) if isinstance(conn, dict) else {}},
         }
         return kvargs
 
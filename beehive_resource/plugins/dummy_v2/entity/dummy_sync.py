@@ -29,6 +29,60 @@ class DummySyncResourceV2(DummyAbstractResourceV2):
             DummySyncChildResourceV2,
         ]
 
+    #
+    # discover
+    #
+    @staticmethod
+    def get_remote_items(container):
+        """Get the entities of the simulated remote platform. Container connection param test.remote_size set how many
+        entities exist. Remote entity ids are dummy-<idx>.
+
+        :param container: container instance
+        :return: list of {"id": .., "name": ..}
+        """
+        remote_size = container.conn_params.get("test", {}).get("remote_size", 0)
+        return [{"id": "dummy-%s" % idx, "name": "dummy-%s" % idx} for idx in range(remote_size)]
+
+    @staticmethod
+    def discover_new(container, ext_id, res_ext_ids):
+        """Discover method used when synchronize beehive container with remote platform.
+
+        :param container: client used to comunicate with remote platform
+        :param ext_id: remote platform entity id
+        :param res_ext_ids: list of remote platform entity ids from beehive resources
+        :return: list of tuple (resource class, ext_id, parent_id, resource class objdef, name, parent_class)
+        :raises ApiManagerError:
+        """
+        res_ext_ids = set(res_ext_ids)
+        items = DummySyncResourceV2.get_remote_items(container)
+        if ext_id is not None:
+            items = [item for item in items if item["id"] == ext_id]
+
+        res = []
+        for item in items:
+            if item["id"] not in res_ext_ids:
+                res.append(
+                    (
+                        DummySyncResourceV2,
+                        item["id"],
+                        None,
+                        DummySyncResourceV2.objdef,
+                        item["name"],
+                        None,
+                    )
+                )
+        return res
+
+    @staticmethod
+    def discover_died(container):
+        """Discover method used when check if resource already exists in remote platform or was been modified.
+
+        :param container: client used to comunicate with remote platform
+        :return: list of remote entities
+        :raises ApiManagerError:
+        """
+        return DummySyncResourceV2.get_remote_items(container)
+
     #
     # create
     #
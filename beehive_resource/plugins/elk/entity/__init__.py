@@ -4,8 +4,8 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 import logging
-from beehive.common.data import cache
 from beehive_resource.container import Resource, AsyncResource
+from beehive_resource.util import remote_cache
 
 # from beehive_resource.plugins.elk.controller import ElkContainer
 
@@ -42,7 +42,7 @@ class ElkResource(AsyncResource):
         return info
 
     @staticmethod
-    @cache("elk.space.get", ttl=86400)
+    @remote_cache("elk.space.get", ttl=86400)
     def get_remote_space(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_kibana.space.get(ext_id)
@@ -52,7 +52,7 @@ class ElkResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("elk.space-dashboards.get", ttl=86400)
+    @remote_cache("elk.space-dashboards.get", ttl=86400)
     def get_remote_space_dashboards(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             from beedrones.elk.client_kibana import KibanaManager
@@ -66,7 +66,7 @@ class ElkResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("elk.role.get", ttl=86400)
+    @remote_cache("elk.role.get", ttl=86400)
     def get_remote_role(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_kibana.role.get(ext_id)
@@ -76,7 +76,7 @@ class ElkResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("elk.role_mapping.get", ttl=86400, pickling=True)
+    @remote_cache("elk.role_mapping.get", ttl=86400, pickling=True)
     def get_remote_role_mapping(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_elastic.role_mapping.get(ext_id)
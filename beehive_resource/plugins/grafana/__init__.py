@@ -3,30 +3,15 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from beehive_resource.plugins.grafana.controller import GrafanaContainer
-from beehive_resource.plugins.grafana.views.grafana_alert_notification import (
-    GrafanaAlertNotificationAPI,
-)
-from beehive_resource.plugins.grafana.views.grafana_folder import GrafanaFolderAPI
-from beehive_resource.plugins.grafana.views.grafana_team import GrafanaTeamAPI
-from beehive_resource.plugins.grafana.views.grafana_dashboard import GrafanaDashboardAPI
+from beehive_resource.plugins import ResourcePlugin
 
 
-class GrafanaPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = GrafanaContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [
-            GrafanaFolderAPI,
-            GrafanaTeamAPI,
-            GrafanaAlertNotificationAPI,
-            GrafanaDashboardAPI,
-        ]
-        self.module.set_apis(apis)
-
-        self.module.add_container(GrafanaContainer.objdef, GrafanaContainer)
+class GrafanaPlugin(ResourcePlugin):
+    name = "grafana"
+    container_class = "beehive_resource.plugins.grafana.controller.GrafanaContainer"
+    api_classes = [
+        "beehive_resource.plugins.grafana.views.grafana_folder.GrafanaFolderAPI",
+        "beehive_resource.plugins.grafana.views.grafana_team.GrafanaTeamAPI",
+        "beehive_resource.plugins.grafana.views.grafana_alert_notification.GrafanaAlertNotificationAPI",
+        "beehive_resource.plugins.grafana.views.grafana_dashboard.GrafanaDashboardAPI",
+    ]
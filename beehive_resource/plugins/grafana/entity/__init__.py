@@ -5,8 +5,8 @@
 
 import logging
 from beedrones.grafana.client_grafana import GrafanaManager
-from beehive.common.data import cache
 from beehive_resource.container import Resource, AsyncResource
+from beehive_resource.util import remote_cache
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +41,7 @@ class GrafanaResource(AsyncResource):
         return info
 
     @staticmethod
-    @cache("grafana.folder.get", ttl=86400)
+    @remote_cache("grafana.folder.get", ttl=86400)
     def get_remote_folder(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_grafana.folder.get(ext_id)
@@ -51,7 +51,7 @@ class GrafanaResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("grafana.folder-dashboards.get", ttl=86400)
+    @remote_cache("grafana.folder-dashboards.get", ttl=86400)
     def get_remote_folder_dashboards(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             conn_grafana: GrafanaManager = container.conn_grafana
@@ -65,7 +65,7 @@ class GrafanaResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("grafana.folder-permissions.get", ttl=86400)
+    @remote_cache("grafana.folder-permissions.get", ttl=86400)
     def get_remote_folder_permissions(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             conn_grafana: GrafanaManager = container.conn_grafana
@@ -76,7 +76,7 @@ class GrafanaResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("grafana.team.get", ttl=86400)
+    @remote_cache("grafana.team.get", ttl=86400)
     def get_remote_team(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_grafana.team.get(ext_id)
@@ -86,7 +86,7 @@ class GrafanaResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("grafana.team-users.get", ttl=86400)
+    @remote_cache("grafana.team-users.get", ttl=86400)
     def get_remote_team_users(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             conn_grafana: GrafanaManager = container.conn_grafana
@@ -97,7 +97,7 @@ class GrafanaResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("grafana.alert.get", ttl=86400)
+    @remote_cache("grafana.alert.get", ttl=86400)
     def get_remote_alert_notification(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn_grafana.alert_notification.get(ext_id)
@@ -2,21 +2,13 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from beehive_resource.plugins.ontap.controller import OntapNetappContainer
-from beehive_resource.plugins.ontap.views.volume import OntapNetappVolumeAPI
-from beehive_resource.plugins.ontap.views.svm import OntapNetappSvmAPI
+from beehive_resource.plugins import ResourcePlugin
 
 
-class OntapNetappPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = OntapNetappContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [OntapNetappVolumeAPI, OntapNetappSvmAPI]
-        self.module.set_apis(apis)
-
-        self.module.add_container(OntapNetappContainer.objdef, OntapNetappContainer)
+class OntapNetappPlugin(ResourcePlugin):
+    name = "ontap"
+    container_class = "beehive_resource.plugins.ontap.controller.OntapNetappContainer"
+    api_classes = [
+        "beehive_resource.plugins.ontap.views.volume.OntapNetappVolumeAPI",
+        "beehive_resource.plugins.ontap.views.svm.OntapNetappSvmAPI",
+    ]
@@ -4,8 +4,10 @@
 
 from logging import getLogger
 from typing import List, Dict
-from beehive.common.data import cache
+from beecell.types.type_dict import dict_get
+from beehive.common.data import operation
 from beehive_resource.container import Resource, AsyncResource
+from beehive_resource.util import remote_cache
 
 
 logger = getLogger(__name__)
@@ -44,7 +46,7 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
         return info
 
     @staticmethod
-    @cache("ontap_netapp.volume.get", ttl=1800)
+    @remote_cache("ontap_netapp.volume.get", ttl=1800)
     def get_remote_volume(controller, postfix, container, ext_id, *args, **kvargs):
         if ext_id is None or ext_id == "":
             return {}
@@ -56,7 +58,7 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
             return {}
 
     @staticmethod
-    @cache("ontap_netapp.svm.get", ttl=1800)
+    @remote_cache("ontap_netapp.svm.get", ttl=1800)
     def get_remote_svm(controller, postfix, container, ext_id, *args, **kvargs):
         if ext_id is None or ext_id == "":
             return {}
@@ -68,13 +70,15 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
             return {}
 
     @staticmethod
-    @cache("ontap_netapp.snapmirror.get", ttl=1800)
-    def get_remote_snapmirror(container, svm_col_volume: str) -> List[Dict]:
+    @remote_cache("ontap_netapp.snapmirror.get", ttl=1800)
+    def get_remote_snapmirror(controller, postfix, container, svm_col_volume, *args, **kvargs) -> List[Dict]:
         """
         List volume snapmirror relationships given the source path.
         The source path is in the following format:
             "svm_name:volume_name"
 
+        :param controller: controller instance
+        :param postfix: cache key postfix
         :param container: container
         :param svm_col_volume: source path in the specified format
 
@@ -88,11 +92,11 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
             snapmirror_relationships = container.conn.snapmirror.list(**{"source.path": svm_col_volume})
             return snapmirror_relationships
         except Exception as ex:
-            logger.warning("Error while retrieving volume snapmirror relationships: %e" % ex)
+            logger.warning("Error while retrieving volume snapmirror relationships: %s" % ex)
             return []
 
     @staticmethod
-    @cache("ontap_netapp.nfs_export_policy.get", ttl=1800)
+    @remote_cache("ontap_netapp.nfs_export_policy.get", ttl=1800)
     def get_remote_nfs_export_policy(controller, postfix, container, export_policy_id, *args, **kvargs):
         if export_policy_id is None or export_policy_id == "":
             return {}
@@ -104,7 +108,7 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
             return {}
 
     @staticmethod
-    @cache("ontap_netapp.cifs_shares.get", ttl=1800)
+    @remote_cache("ontap_netapp.cifs_shares.get", ttl=1800)
     def get_remote_cifs_shares(controller, postfix, container, volume_id, *args, **kvargs):
         if volume_id is None or volume_id == "":
             return {}
@@ -114,3 +118,117 @@ class OntapNetappResource(AsyncResource):  # TODO old implementation was "resour
         except:
             logger.warning("", exc_info=True)
             return {}
+
+    #
+    # bulk remote query
+    #
+    bulk_query_size = 50
+    snapmirror_list_key = "ontap_netapp.snapmirror.list"  #: cache key of the relationships read by a bulk query
+    snapmirror_list_ttl = 1800  #: time to live of the relationships read by a bulk query
+
+    @staticmethod
+    def __list_remote(controller, getter, manager, ext_ids, query_field="uuid", **query):
+        """Get remote entities with one filtered query for every bulk_query_size ids. Entities already cached are not
+        queried again. Entities returned by the remote platform are cached with the getter key.
+
+        :param controller: controller instance
+        :param getter: remote getter decorated with remote_cache
+        :param manager: beedrones manager used to list the entities
+        :param ext_ids: list of remote entity ids
+        :param query_field: remote field to filter [default=uuid]
+        :param query: other remote query params
+        :return: dict {ext_id: remote entity}
+        """
+        res = {}
+        missing = []
+        for ext_id in set(ext_ids):
+            if ext_id is None or ext_id == "":
+                continue
+            remote_entity = getter.get_cached(controller, ext_id)
+            if remote_entity is None:
+                missing.append(ext_id)
+            else:
+                res[ext_id] = remote_entity
+
+        size = OntapNetappResource.bulk_query_size
+        for index in range(0, len(missing), size):
+            chunk = missing[index : index + size]
+            query[query_field] = "|".join(chunk)
+            try:
+                remote_entities = manager.list(**query)
+            except Exception:
+                logger.warning("", exc_info=True)
+                continue
+            for remote_entity in remote_entities:
+                ext_id = dict_get(remote_entity, query_field)
+                res[ext_id] = remote_entity
+                getter.set_cached(controller, ext_id, remote_entity)
+
+        logger.debug("Get %s remote entities, %s not cached" % (len(res), len(missing)))
+        return res
+
+    @staticmethod
+    def list_remote_volumes(controller, container, ext_ids):
+        """Get remote volumes in bulk. Use in customize_list in place of get_remote_volume.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of volume uuid
+        :return: dict {uuid: volume}
+        """
+        return OntapNetappResource.__list_remote(
+            controller, OntapNetappResource.get_remote_volume, container.conn.volume, ext_ids, fields="*"
+        )
+
+    @staticmethod
+    def list_remote_snapmirrors(controller, container, source_paths):
+        """Get remote snapmirror relationships of many volumes in bulk. Use in customize_list in place of
+        get_remote_snapmirror.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param source_paths: dict {volume uuid: "svm_name:volume_name"}
+        :return: dict {volume uuid: list of relationship dictionaries}
+        """
+        # relationships are cached wrapped in a dict, so volumes without relationships are cached too
+        res = {}
+        missing = {}
+        for ext_id, source_path in source_paths.items():
+            cached = None
+            if operation.cache is True:
+                cached = controller.cache.get("%s.%s" % (OntapNetappResource.snapmirror_list_key, ext_id))
+            if cached is not None:
+                res[ext_id] = cached.get("relationships", [])
+                continue
+            relationships = OntapNetappResource.get_remote_snapmirror.get_cached(controller, ext_id)
+            if relationships is None:
+                missing[source_path] = ext_id
+                res[ext_id] = []
+            else:
+                res[ext_id] = relationships
+
+        paths = list(missing.keys())
+        size = OntapNetappResource.bulk_query_size
+        for index in range(0, len(paths), size):
+            chunk = paths[index : index + size]
+            try:
+                relationships = container.conn.snapmirror.list(**{"source.path": "|".join(chunk)})
+            except Exception:
+                logger.warning("", exc_info=True)
+                continue
+            for relationship in relationships:
+                ext_id = missing.get(dict_get(relationship, "source.path"))
+                if ext_id is not None:
+                    res[ext_id].append(relationship)
+
+            # cache only the relationships of the queries that did not fail
+            for source_path in chunk:
+                ext_id = missing[source_path]
+                OntapNetappResource.get_remote_snapmirror.set_cached(controller, ext_id, res[ext_id])
+                if operation.cache is True:
+                    controller.cache.set(
+                        "%s.%s" % (OntapNetappResource.snapmirror_list_key, ext_id),
+                        {"relationships": res[ext_id]},
+                        ttl=OntapNetappResource.snapmirror_list_ttl,
+                    )
+        return res
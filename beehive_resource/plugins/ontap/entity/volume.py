@@ -31,6 +31,7 @@ class OntapNetappVolume(OntapNetappResource):
 
         self.svm = None
         self.snapmirror = None
+        self.snapmirror_list = None
 
     #
     # discover, synchronize
@@ -160,10 +161,20 @@ class OntapNetappVolume(OntapNetappResource):
         :return: None
         :raises ApiManagerError:
         """
-        # for entity in entities:
-        #    entity.ext_obj = OntapNetappVolume.get_remote_volume(controller, entity.ext_id, container, entity.ext_id)
-        #    entity.get_svm()
-        #    entity.get_snapmirror()
+        # get remote volumes and snapmirror relationships with one query for every type
+        volume_idx = OntapNetappVolume.list_remote_volumes(controller, container, [e.ext_id for e in entities])
+        source_paths = {}
+        for entity in entities:
+            entity.ext_obj = volume_idx.get(entity.ext_id, None)
+            if entity.ext_obj is None:
+                continue
+            if entity.has_snapmirror():
+                svm_name = dict_get(entity.ext_obj, "svm.name")
+                source_paths[entity.ext_id] = "%s:%s" % (svm_name, entity.ext_obj.get("name"))
+        snapmirror_idx = OntapNetappVolume.list_remote_snapmirrors(controller, container, source_paths)
+        for entity in entities:
+            entity.snapmirror = snapmirror_idx.get(entity.ext_id, None)
+            entity.snapmirror_list = entity.snapmirror
         return entities
 
     def post_get(self):
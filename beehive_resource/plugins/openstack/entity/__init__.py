@@ -3,9 +3,10 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 import logging
+from beedrones.openstack.client import OpenstackError
 from beedrones.trilio.client import TrilioManager
-from beehive.common.data import cache
 from beehive_resource.container import Resource, AsyncResource
+from beehive_resource.util import remote_cache
 
 logger = logging.getLogger(__name__)
 
@@ -122,13 +123,13 @@ class OpenstackResource(AsyncResource):
     #     return remote_entities
 
     @staticmethod
-    @cache("openstack.aggregate.list", ttl=600)
+    @remote_cache("openstack.aggregate.list", ttl=600, stale_ttl=600)
     def list_remote_aggregate(controller, postfix, container, *args, **kvargs):
         remote_entities = container.conn.system.compute_host_aggregates()
         return remote_entities
 
     @staticmethod
-    @cache("openstack.server.get", ttl=1800)
+    @remote_cache("openstack.server.get", ttl=1800)
     def get_remote_server(controller, postfix, container, ext_id, *args, **kvargs):
         if ext_id is None or ext_id == "":
             return {}
@@ -140,7 +141,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.server.list", ttl=120)
+    @remote_cache("openstack.server.list", ttl=120, stale_ttl=120)
     def list_remote_server(controller, postfix, container, ext_id, *args, **kvargs):
         if ext_id is None or ext_id == "":
             return {}
@@ -152,7 +153,7 @@ class OpenstackResource(AsyncResource):
             return []
 
     @staticmethod
-    @cache("openstack.securitygroup.get", ttl=1800)
+    @remote_cache("openstack.securitygroup.get", ttl=1800)
     def get_remote_securitygroup(controller, postfix, container, ext_id, *args, **kvargs):
         if ext_id is None or ext_id == "":
             return {}
@@ -164,7 +165,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.server.interfaces.get", ttl=1800)
+    @remote_cache("openstack.server.interfaces.get", ttl=1800)
     def get_remote_server_port_interfaces(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.server.get_port_interfaces(ext_id)
@@ -174,13 +175,13 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.flavor.list", ttl=1800)
+    @remote_cache("openstack.flavor.list", ttl=1800, stale_ttl=1800)
     def list_remote_flavor(controller, postfix, container, *args, **kvargs):
         remote_entities = container.conn.flavor.list(detail=True)
         return remote_entities
 
     @staticmethod
-    @cache("openstack.flavor.get", ttl=1800)
+    @remote_cache("openstack.flavor.get", ttl=1800)
     def get_remote_flavor(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.flavor.get(ext_id)
@@ -190,13 +191,13 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.image.list", ttl=1800)
+    @remote_cache("openstack.image.list", ttl=1800, stale_ttl=1800)
     def list_remote_image(controller, postfix, container, *args, **kvargs):
         remote_entities = container.conn.image.list(detail=True)
         return remote_entities
 
     @staticmethod
-    @cache("openstack.image.get", ttl=1800)
+    @remote_cache("openstack.image.get", ttl=1800)
     def get_remote_image(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.image.get(oid=ext_id)
@@ -206,7 +207,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.volume.get", ttl=1800)
+    @remote_cache("openstack.volume.get", ttl=1800)
     def get_remote_volume(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.volume_v3.get(oid=ext_id, *args, **kvargs)
@@ -216,7 +217,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.volume.list", ttl=120)
+    @remote_cache("openstack.volume.list", ttl=120, stale_ttl=120)
     def list_remote_volume(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.volume_v3.list_all(detail=True, limit=500)
@@ -226,7 +227,7 @@ class OpenstackResource(AsyncResource):
             return []
 
     @staticmethod
-    @cache("openstack.volume_v3.snapshot.list", ttl=1800)
+    @remote_cache("openstack.volume_v3.snapshot.list", ttl=1800)
     def list_remote_volume_snapshots(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.volume_v3.snapshot.list(volume_id=ext_id)
@@ -236,7 +237,7 @@ class OpenstackResource(AsyncResource):
             return []
 
     @staticmethod
-    @cache("openstack.port.get", ttl=1800)
+    @remote_cache("openstack.port.get", ttl=1800)
     def get_remote_port(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.network.port.get(oid=ext_id)
@@ -246,7 +247,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.subnet.get", ttl=1800)
+    @remote_cache("openstack.subnet.get", ttl=1800)
     def get_remote_subnet(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.network.subnet.get(oid=ext_id)
@@ -256,7 +257,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.volumetype.list", ttl=1800)
+    @remote_cache("openstack.volumetype.list", ttl=1800, stale_ttl=1800)
     def list_remote_volume_type(controller, postfix, container, *args, **kvargs):
         try:
             remote_entities = container.conn.volume_v3.type.list()
@@ -266,7 +267,7 @@ class OpenstackResource(AsyncResource):
             return []
 
     @staticmethod
-    @cache("openstack.stack.get", ttl=1800)
+    @remote_cache("openstack.stack.get", ttl=1800)
     def get_remote_stack(controller, postfix, container, name, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.heat.stack.get(stack_name=name, oid=ext_id)
@@ -276,7 +277,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.share.get", ttl=1800)
+    @remote_cache("openstack.share.get", ttl=1800)
     def get_remote_share(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.manila.share.get(ext_id)
@@ -286,7 +287,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.share.get", ttl=1800)
+    @remote_cache("openstack.share.export_locations.get", ttl=1800)
     def get_remote_share_export_locations(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.manila.share.list_export_locations(ext_id)
@@ -296,7 +297,7 @@ class OpenstackResource(AsyncResource):
             return {}
 
     @staticmethod
-    @cache("openstack.router.get", ttl=1800)
+    @remote_cache("openstack.router.get", ttl=1800)
     def get_remote_router(controller, postfix, container, ext_id, *args, **kvargs):
         try:
             remote_entity = container.conn.network.router.get(ext_id)
@@ -304,3 +305,127 @@ class OpenstackResource(AsyncResource):
         except:
             logger.warning("", exc_info=True)
             return {}
+
+    #
+    # bulk remote query
+    #
+    @staticmethod
+    def __list_remote(controller, getter, container, ext_ids, list_func=None):
+        """Get the remote entities of a page of resources. Entities already cached are not queried again. When
+        list_func is set the others are read with one list query and cached with the getter key. Entities not cached
+        and not returned by the list query are read one by one with the getter.
+
+        :param controller: controller instance
+        :param getter: remote getter decorated with remote_cache
+        :param container: container instance
+        :param ext_ids: list of remote entity ids
+        :param list_func: function that return a list of remote entities with a filter supported by the client
+            [optional]
+        :return: dict {ext_id: remote entity}
+        """
+        res = {}
+        missing = set()
+        for ext_id in set(ext_ids):
+            if ext_id is None or ext_id == "":
+                continue
+            remote_entity = getter.get_cached(controller, ext_id)
+            if remote_entity is None:
+                missing.add(ext_id)
+            else:
+                res[ext_id] = remote_entity
+
+        not_cached = len(missing)
+        if list_func is not None and len(missing) > 0:
+            try:
+                remote_entities = list_func()
+            except OpenstackError as ex:
+                logger.warning("List of remote entities failed, read %s of them one by one: %s" % (len(missing), ex))
+                remote_entities = []
+            for remote_entity in remote_entities:
+                ext_id = remote_entity.get("id")
+                if ext_id in missing:
+                    res[ext_id] = remote_entity
+                    getter.set_cached(controller, ext_id, remote_entity)
+                    missing.discard(ext_id)
+
+        for ext_id in missing:
+            res[ext_id] = getter(controller, ext_id, container, ext_id)
+
+        logger.debug("Get %s remote entities, %s not cached" % (len(res), not_cached))
+        return res
+
+    @staticmethod
+    def list_remote_securitygroups(controller, container, ext_ids):
+        """Get remote security groups of a page. Use in customize_list in place of get_remote_securitygroup. The
+        network client can not filter security groups by a list of id, so security groups not cached are read one by
+        one with get_remote_securitygroup.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of security group id
+        :return: dict {id: security group}
+        """
+        return OpenstackResource.__list_remote(
+            controller, OpenstackResource.get_remote_securitygroup, container, ext_ids
+        )
+
+    @staticmethod
+    def list_remote_ports(controller, container, ext_ids, network=None):
+        """Get remote ports of a page. Use in customize_list in place of get_remote_port. When network is set ports
+        not cached are read with one port list filtered by network, otherwise one by one with get_remote_port.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of port id
+        :param network: network ext_id [optional]
+        :return: dict {id: port}
+        """
+        list_func = None
+        if network is not None:
+            list_func = lambda: container.conn.network.port.list(network=network)
+        return OpenstackResource.__list_remote(
+            controller, OpenstackResource.get_remote_port, container, ext_ids, list_func=list_func
+        )
+
+    @staticmethod
+    def list_remote_subnets(controller, container, ext_ids, network=None):
+        """Get remote subnets of a page. Use in customize_list in place of get_remote_subnet. When network is set
+        subnets not cached are read with one subnet list filtered by network, otherwise one by one with
+        get_remote_subnet.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of subnet id
+        :param network: network ext_id [optional]
+        :return: dict {id: subnet}
+        """
+        list_func = None
+        if network is not None:
+            list_func = lambda: container.conn.network.subnet.list(network=network)
+        return OpenstackResource.__list_remote(
+            controller, OpenstackResource.get_remote_subnet, container, ext_ids, list_func=list_func
+        )
+
+    @staticmethod
+    def list_remote_routers(controller, container, ext_ids):
+        """Get remote routers of a page. Use in customize_list in place of get_remote_router. The network client can
+        not filter routers by a list of id, so routers not cached are read one by one with get_remote_router.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of router id
+        :return: dict {id: router}
+        """
+        return OpenstackResource.__list_remote(controller, OpenstackResource.get_remote_router, container, ext_ids)
+
+    @staticmethod
+    def list_remote_volumes(controller, container, ext_ids):
+        """Get remote volumes of a page. Cinder can not filter volumes by a list of id, so volumes not cached are read
+        one by one with get_remote_volume.
+
+        :param controller: controller instance
+        :param container: container instance
+        :param ext_ids: list of volume id
+        :return: dict {id: volume}
+        """
+        return OpenstackResource.__list_remote(controller, OpenstackResource.get_remote_volume, container, ext_ids)
@@ -723,23 +723,54 @@ class OpenstackHeatStack(OpenstackResource):
         :return:
         :raise ApiManagerError:
         """
-        entities = self.get_stack_internal_resources()
+        resources, unresolved = self.resolve_stack_resources()
+        return resources, len(resources)
 
-        resources = []
-        for entity in entities:
-            try:
-                self.logger.debug(
-                    "Get resource for %s:%s" % (entity.get("resource_type"), entity.get("physical_resource_id"))
-                )
-                if entity.get("resource_type") in self.get_supported_type():
-                    resource = self.container.get_resource_by_extid(entity.get("physical_resource_id"))
-                    if resource is not None:
-                        resources.append(resource)
-            except:
-                pass
+    def resolve_stack_resources(self):
+        """Map the stack internal resources of a supported type to the local resources with a single query.
 
+        :return: (list of resources, list of unresolved internal resources). Every unresolved item is a dict with
+            resource_name, resource_type, physical_resource_id and reason
+        :raise ApiManagerError:
+        """
+        supported_types = self.get_supported_type()
+        items = [e for e in self.get_stack_internal_resources() if e.get("resource_type") in supported_types]
+
+        unresolved = []
+        ext_ids = []
+        for item in items:
+            physical_resource_id = item.get("physical_resource_id")
+            if physical_resource_id is None or physical_resource_id == "":
+                unresolved.append((item, "remote resource is not created"))
+            else:
+                ext_ids.append(physical_resource_id)
+
+        index = self.container.get_resources_by_extids(ext_ids)
+
+        resources = []
+        for item in items:
+            physical_resource_id = item.get("physical_resource_id")
+            if physical_resource_id is None or physical_resource_id == "":
+                continue
+            resource = index.get(physical_resource_id, None)
+            if resource is None:
+                unresolved.append((item, "local resource not found"))
+            else:
+                resources.append(resource)
+
+        unresolved = [
+            {
+                "resource_name": item.get("resource_name"),
+                "resource_type": item.get("resource_type"),
+                "physical_resource_id": item.get("physical_resource_id"),
+                "reason": reason,
+            }
+            for item, reason in unresolved
+        ]
+        if len(unresolved) > 0:
+            self.logger.warning("Stack %s has unresolved resources: %s" % (self.name, unresolved))
         self.logger.debug("Get stack %s resources: %s" % (self.name, truncate(resources)))
-        return resources, len(resources)
+        return resources, unresolved
 
     def get_stack_internal_resources(self, name=None, status=None, type=None):
         """Get internal resources.
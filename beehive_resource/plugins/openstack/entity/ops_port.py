@@ -131,12 +131,10 @@ class OpenstackPort(OpenstackResource):
         :param container: container instance
         :param args: custom params
         :param kvargs: custom params
+        :param kvargs.network: network ext_id
         :return: None
         :raises ApiManagerError:
         """
-        network = kvargs.get("network", None)
-        remote_entities = container.conn.network.port.list(network=network)
-
         # create index of related objs
         from ..entity.ops_network import OpenstackNetwork
         from ..entity.ops_project import OpenstackProject
@@ -148,8 +146,10 @@ class OpenstackPort(OpenstackResource):
         server_index = controller.index_resources_by_extid(OpenstackServer)
         router_index = controller.index_resources_by_extid(OpenstackRouter)
 
-        # create index of remote objs
-        remote_entities_index = {i["id"]: i for i in remote_entities}
+        # create index of remote objs of the page
+        remote_entities_index = OpenstackPort.list_remote_ports(
+            controller, container, [e.ext_id for e in entities], network=kvargs.get("network", None)
+        )
 
         for entity in entities:
             try:
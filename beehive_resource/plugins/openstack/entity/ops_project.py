@@ -2,6 +2,7 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from logging import getLogger
 from beecell.simple import id_gen, truncate
 from beecell.types.type_dict import dict_get
 from beehive.common.apimanager import ApiManagerError
@@ -23,6 +24,8 @@ from beehive.common.data import trace
 from beedrones.openstack.client import OpenstackError, OpenstackNotFound
 from beehive_resource.plugins.openstack.entity import OpenstackResource
 
+logger = getLogger(__name__)
+
 
 class OpenstackProject(OpenstackResource):
     objdef = "Openstack.Domain.Project"
@@ -72,26 +75,7 @@ class OpenstackProject(OpenstackResource):
         else:
             items = container.conn.project.list()
 
-        def get_level(items, oid):
-            pid = items[oid][1]["parent_id"]
-            did = items[oid][1]["domain_id"]
-            if pid is None or pid == did:
-                return 0
-            else:
-                level = get_level(items, str(pid))
-            return level + 1
-
-        level_items = {}
-        for item in items:
-            level_items[item["id"]] = (0, item)
-
-        for k, v in level_items.items():
-            level = get_level(level_items, k)
-            v[1]["level"] = level
-            level_items[k] = (level, v[1])
-
-        items = sorted(level_items.values(), key=lambda item: item[0])
-        items = [i[1] for i in items]
+        items = OpenstackProject.sort_projects(items)
 
         # add new item to final list
         res = []
@@ -121,6 +105,63 @@ class OpenstackProject(OpenstackResource):
 
         return res
 
+    @staticmethod
+    def get_project_levels(items):
+        """Get the level of every project in the hierarchy. A project whose parent is its domain has level 0. Every
+        level is computed once walking up the parents until a project with a known level. Projects whose parent is
+        not in items and projects in a parent cycle are considered first level projects.
+
+        :param items: list of openstack projects
+        :return: dict {project id: level}
+        """
+        index = {item["id"]: item for item in items}
+        levels = {}
+        for oid in index:
+            # walk up until a project with a known level or a root
+            path = []
+            in_path = set()
+            current = oid
+            while current not in levels:
+                item = index[current]
+                pid = item["parent_id"]
+                if pid is None or pid == item["domain_id"]:
+                    levels[current] = 0
+                    break
+                if pid not in index or pid in in_path or pid == current:
+                    logger.warning(
+                        "Project %s parent %s is missing or in a cycle, use it as first level project" % (current, pid)
+                    )
+                    levels[current] = 0
+                    break
+                path.append(current)
+                in_path.add(current)
+                current = pid
+
+            # assign levels from the nearest ancestor down to oid
+            level = levels[current]
+            for child in reversed(path):
+                level += 1
+                levels[child] = level
+        return levels
+
+    @staticmethod
+    def sort_projects(items):
+        """Set the level of every project and sort projects so that every parent comes before its children
+
+        :param items: list of openstack projects
+        :return: list of openstack projects with key level
+        """
+        levels = OpenstackProject.get_project_levels(items)
+        buckets = {}
+        for item in items:
+            item["level"] = levels[item["id"]]
+            buckets.setdefault(item["level"], []).append(item)
+
+        res = []
+        for level in sorted(buckets.keys()):
+            res.extend(buckets[level])
+        return res
+
     @staticmethod
     def discover_died(container):
         """Discover method used when check if resource already exists in remote platform or was been modified.
@@ -562,6 +603,17 @@ class OpenstackProject(OpenstackResource):
         self.verify_permisssions("use")
 
         trilio_conn = self.get_trilio_manager(self.oid)
+        res = self.list_backup_jobs(trilio_conn)
+        self.logger.debug("get trilio workloads: %s" % truncate(res))
+        return res
+
+    @staticmethod
+    def list_backup_jobs(trilio_conn):
+        """Get configured trilio workloads. Does not use the db session, so it can run in a separate thread
+
+        :param trilio_conn: trilio manager
+        :return: trilio workloads list
+        """
         res = []
         try:
             if trilio_conn is not None:
@@ -569,7 +621,6 @@ class OpenstackProject(OpenstackResource):
                 for workload in workloads:
                     workload = trilio_conn.workload.get(workload.get("id"))
                     res.append(workload)
-            self.logger.debug("get trilio workloads: %s" % truncate(res))
         except OpenstackError as ex:
             raise ApiManagerError("trilio workload query error: %s" % ex.value, code=ex.code)
         return res
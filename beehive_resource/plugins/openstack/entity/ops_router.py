@@ -129,18 +129,16 @@ class OpenstackRouter(OpenstackResource):
         :return: None
         :raises ApiManagerError:
         """
-        # remote_entities = container.conn.network.router.list()
-
         # get related object
         from ..entity.ops_network import OpenstackNetwork
 
         net_index = controller.index_resources_by_extid(OpenstackNetwork)
 
-        # create index of remote objs
-        # remote_entities_index = {i['id']: i for i in remote_entities}
+        # create index of remote objs of the page
+        remote_entities_index = OpenstackRouter.list_remote_routers(controller, container, [e.ext_id for e in entities])
 
         for entity in entities:
-            ext_obj = OpenstackRouter.get_remote_router(controller, entity.ext_id, container, entity.ext_id)
+            ext_obj = remote_entities_index.get(entity.ext_id, {})
             entity.set_physical_entity(ext_obj)
             if ext_obj.get("external_gateway_info", None) is not None:
                 net_id = ext_obj["external_gateway_info"]["network_id"]
@@ -18,6 +18,9 @@ class OpenstackSecurityGroup(OpenstackResource):
     default_tags = ["openstack", "security_group"]
     task_path = "beehive_resource.plugins.openstack.task_v2.ops_security_group.SecurityGroupTask."
 
+    rule_batch_size = 50  #: rules created or deleted in a batch. Task progress is written once for each batch
+    rule_batch_workers = 10  #: max concurrent openstack calls used to run a batch
+
     def __init__(self, *args, **kvargs):
         """ """
         OpenstackResource.__init__(self, *args, **kvargs)
@@ -128,17 +131,13 @@ class OpenstackSecurityGroup(OpenstackResource):
         :return: None
         :raises ApiManagerError:
         """
-        # remote_entities = container.conn.network.security_group.list()
-        #
-        # # create index of related objs
-        #
-        # # create index of remote objs
-        # remote_entities_index = {i['id']: i for i in remote_entities}
-        #
+        # create index of remote objs of the page
+        remote_entities_index = OpenstackSecurityGroup.list_remote_securitygroups(
+            controller, container, [e.ext_id for e in entities]
+        )
+
         for entity in entities:
-            ext_id = entity.ext_id
-            ext_obj = OpenstackSecurityGroup.get_remote_securitygroup(controller, ext_id, container, ext_id)
-            entity.set_physical_entity(ext_obj)
+            entity.set_physical_entity(remote_entities_index.get(entity.ext_id, {}))
         return entities
 
     def post_get(self):
@@ -370,6 +369,87 @@ class OpenstackSecurityGroup(OpenstackResource):
         )
         return res
 
+    @trace(op="update")
+    def sync_rules(self, rules, sync=False):
+        """Make openstack security group rules equal to a list of rules. Only missing rules are created and only
+        rules not in the list are deleted.
+
+        :param rules: list of rules. Every rule is a dict with the params of create_rule
+        :param sync: run task as synchronous
+        :return: {'taskid':..}, 202
+        :raise ApiManagerError:
+        """
+        remote_groups = {}
+        desired = []
+        for rule in rules:
+            remote_group = rule.get("remote_group_id", None)
+            if remote_group is not None and remote_group not in remote_groups:
+                remote_groups[remote_group] = self.controller.get_resource(remote_group).ext_id
+            desired.append(
+                {
+                    "direction": rule.get("direction", "ingress"),
+                    "ethertype": rule.get("ethertype", "IPv4"),
+                    "port_range_min": rule.get("port_range_min", None),
+                    "port_range_max": rule.get("port_range_max", None),
+                    "protocol": rule.get("protocol", "tcp"),
+                    "remote_group_id": remote_groups.get(remote_group, None),
+                    "remote_ip_prefix": rule.get("remote_ip_prefix", None),
+                }
+            )
+
+        steps = [OpenstackSecurityGroup.task_path + "security_group_rule_sync_step"]
+        res = self.action(
+            "sync_rules",
+            steps,
+            log="Sync security group %s rules" % self.oid,
+            check=None,
+            rules=desired,
+            sync=sync,
+        )
+        return res
+
+    @staticmethod
+    def get_rule_key(rule):
+        """Get a key that identify a rule by its matching fields
+
+        :param rule: openstack rule or dict with the same fields
+        :return: tuple
+        """
+
+        def norm(value):
+            if value is None or value == "":
+                return None
+            return str(value).lower()
+
+        return (
+            norm(rule.get("direction")),
+            norm(rule.get("ethertype")),
+            norm(rule.get("protocol")),
+            norm(rule.get("port_range_min")),
+            norm(rule.get("port_range_max")),
+            norm(rule.get("remote_group_id")),
+            norm(rule.get("remote_ip_prefix")),
+        )
+
+    @staticmethod
+    def diff_rules(remote_rules, rules):
+        """Compare openstack security group rules with a list of rules
+
+        :param remote_rules: openstack rules
+        :param rules: list of rules
+        :return: (rules to create, openstack rules to delete)
+        """
+        desired = {}
+        for rule in rules:
+            desired.setdefault(OpenstackSecurityGroup.get_rule_key(rule), rule)
+
+        to_delete = []
+        for remote_rule in remote_rules:
+            # keep the first remote rule matching a rule and delete duplicates
+            if desired.pop(OpenstackSecurityGroup.get_rule_key(remote_rule), None) is None:
+                to_delete.append(remote_rule)
+        return list(desired.values()), to_delete
+
     def is_member(self, member):
         return True
 
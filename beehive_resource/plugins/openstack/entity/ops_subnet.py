@@ -167,21 +167,20 @@ class OpenstackSubnet(OpenstackResource):
         :return: None
         :raise ApiManagerError:
         """
-        network = kvargs.get("network", None)
-        remote_entities = container.conn.network.subnet.list(network=network)
-
         # create index of related objs
         from ..entity.ops_network import OpenstackNetwork
 
         net_index = controller.index_resources_by_extid(OpenstackNetwork)
 
-        # create index of remote objs
-        remote_entities_index = {i["id"]: i for i in remote_entities}
+        # create index of remote objs of the page
+        remote_entities_index = OpenstackSubnet.list_remote_subnets(
+            controller, container, [e.ext_id for e in entities], network=kvargs.get("network", None)
+        )
 
         for entity in entities:
             try:
                 ext_obj = remote_entities_index.get(entity.ext_id, None)
-                if ext_obj is not None:
+                if ext_obj is not None and ext_obj != {}:
                     entity.set_physical_entity(ext_obj)
                     entity.network = net_index[ext_obj["network_id"]]
             except:
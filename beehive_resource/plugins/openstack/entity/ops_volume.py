@@ -149,8 +149,11 @@ class OpenstackVolume(OpenstackResource):
         # get volume types
         volume_types_index = container.index_resources_by_extid(entity_class=OpenstackVolumeType)
 
+        # create index of remote objs of the page
+        remote_entities_index = OpenstackVolume.list_remote_volumes(controller, container, [e.ext_id for e in entities])
+
         for entity in entities:
-            ext_obj = OpenstackVolume.get_remote_volume(controller, entity.ext_id, container, entity.ext_id)
+            ext_obj = remote_entities_index.get(entity.ext_id, {})
             entity.set_physical_entity(ext_obj)
             try:
                 volume_type_ext_id = remote_volume_types_index.get(ext_obj.get("volume_type"))["id"]
@@ -2,6 +2,7 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 
 from beedrones.openstack.client import OpenstackNotFound, OpenstackError
@@ -75,6 +76,8 @@ class SecurityGroupTask(AbstractResourceTask):
         if resource.is_ext_id_valid() is True:
             conn = container.conn
             conn.network.security_group.update(ext_id, name, desc)
+            # reload cached remote security group. A cached value would be returned without a refresh
+            OpenstackSecurityGroup.get_remote_securitygroup.delete_cached(container.controller, ext_id)
             OpenstackSecurityGroup.get_remote_securitygroup(container.controller, ext_id, container, ext_id)
             task.progress(step_id, msg="Update security group %s" % ext_id)
 
@@ -107,7 +110,7 @@ class SecurityGroupTask(AbstractResourceTask):
 
             # delete openstack security group
             container.conn.network.security_group.delete(ext_id)
-            OpenstackSecurityGroup.get_remote_securitygroup(container.controller, ext_id, container, ext_id)
+            OpenstackSecurityGroup.get_remote_securitygroup.delete_cached(container.controller, ext_id)
             task.progress(step_id, msg="Delete security group %s" % ext_id)
 
         return oid, params
@@ -196,19 +199,107 @@ class SecurityGroupTask(AbstractResourceTask):
         :param dict params: step params
         :return: True, params
         """
+        params["rules"] = []
+        SecurityGroupTask.sync_rules(task, step_id, params)
+        return True, params
+
+    @staticmethod
+    @task_step()
+    def security_group_rule_sync_step(task, step_id, params, *args, **kvargs):
+        """Make the rules of a security group equal to a list of rules.
+
+        :param task: parent celery task
+        :param str step_id: step id
+        :param dict params: step params
+        :param params.rules: list of rules with direction, ethertype, port_range_min, port_range_max, protocol,
+            remote_group_id and remote_ip_prefix. remote_group_id is the openstack security group id
+        :return: {"created": [rule ids], "deleted": [rule ids]}, params
+        """
+        res = SecurityGroupTask.sync_rules(task, step_id, params)
+        params["result"] = res
+        return res, params
+
+    @staticmethod
+    def sync_rules(task, step_id, params):
+        """Create missing security group rules and delete rules not in params.rules. Rules are created and deleted in
+        batches of concurrent openstack calls with one task progress for each batch.
+
+        :param task: parent celery task
+        :param str step_id: step id
+        :param dict params: step params
+        :return: {"created": [rule ids], "deleted": [rule ids]}
+        """
         cid = params.get("cid")
         ext_id = params.get("ext_id")
 
         container = task.get_container(cid)
         conn = container.conn
         grp = conn.network.security_group.get(ext_id)
-        rules = []
-        for rule in grp["security_group_rules"]:
-            conn.network.security_group.delete_rule(rule["id"])
-            rules.append(rule["id"])
-            task.progress(step_id, msg="remove security group %s rule %s" % (ext_id, rule))
+        to_create, to_delete = OpenstackSecurityGroup.diff_rules(grp["security_group_rules"], params.get("rules"))
+        task.progress(
+            step_id,
+            msg="Security group %s has %s rules: create %s and delete %s rules"
+            % (ext_id, len(grp["security_group_rules"]), len(to_create), len(to_delete)),
+        )
 
-        return True, params
+        def delete_rule(rule):
+            try:
+                conn.network.security_group.delete_rule(rule["id"])
+            except OpenstackNotFound as ex:
+                logger.warning(ex)
+            except OpenstackError as ex:
+                if ex.code != 404:
+                    raise
+                logger.warning(ex)
+            return rule["id"]
+
+        def create_rule(rule):
+            res = conn.network.security_group.create_rule(
+                ext_id,
+                rule.get("direction"),
+                ethertype=rule.get("ethertype"),
+                port_range_min=rule.get("port_range_min"),
+                port_range_max=rule.get("port_range_max"),
+                protocol=rule.get("protocol"),
+                remote_group_id=rule.get("remote_group_id"),
+                remote_ip_prefix=rule.get("remote_ip_prefix"),
+            )
+            return res["id"]
+
+        # delete before create so that a changed rule does not collide with the old one
+        try:
+            deleted = SecurityGroupTask.run_rule_batches(task, step_id, ext_id, "delete", delete_rule, to_delete)
+            created = SecurityGroupTask.run_rule_batches(task, step_id, ext_id, "create", create_rule, to_create)
+        finally:
+            # cached remote security group contains the rules
+            OpenstackSecurityGroup.get_remote_securitygroup.delete_cached(container.controller, ext_id)
+        return {"created": created, "deleted": deleted}
+
+    @staticmethod
+    def run_rule_batches(task, step_id, ext_id, action, func, rules):
+        """Run a function over rules in batches of concurrent calls
+
+        :param task: parent celery task
+        :param str step_id: step id
+        :param ext_id: security group id
+        :param action: action name used in task progress
+        :param func: function to run for every rule. It must return the rule id
+        :param rules: list of rules
+        :return: list of rule ids
+        """
+        res = []
+        batch_size = OpenstackSecurityGroup.rule_batch_size
+        for start in range(0, len(rules), batch_size):
+            batch = rules[start : start + batch_size]
+            workers = min(len(batch), OpenstackSecurityGroup.rule_batch_workers)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                res.extend(executor.map(func, batch))
+            task.progress(
+                step_id,
+                msg="%s security group %s rules %s-%s of %s"
+                % (action, ext_id, start + 1, start + len(batch), len(rules)),
+            )
+        return res
 
 
 task_manager.tasks.register(SecurityGroupTask())
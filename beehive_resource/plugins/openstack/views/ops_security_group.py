@@ -241,6 +241,40 @@ class CreateSecurityGroupsRule(OpenstackSecurityGroupApiView):
         return job
 
 
+class SyncSecurityGroupsRulesRequestSchema(Schema):
+    security_group_rules = fields.Nested(
+        CreateSecurityGroupsRuleParamRequestSchema,
+        many=True,
+        required=True,
+        allow_none=False,
+        description="rules the security group must have. Missing rules are created and the others are deleted",
+    )
+
+
+class SyncSecurityGroupsRulesBodyRequestSchema(GetApiObjectRequestSchema):
+    body = fields.Nested(SyncSecurityGroupsRulesRequestSchema, context="body")
+
+
+class SyncSecurityGroupsRules(OpenstackSecurityGroupApiView):
+    definitions = {
+        "SyncSecurityGroupsRulesRequestSchema": SyncSecurityGroupsRulesRequestSchema,
+        "CrudApiJobResponseSchema": CrudApiJobResponseSchema,
+    }
+    parameters = SwaggerHelper().get_parameters(SyncSecurityGroupsRulesBodyRequestSchema)
+    parameters_schema = SyncSecurityGroupsRulesRequestSchema
+    responses = SwaggerApiView.setResponses({202: {"description": "success", "schema": CrudApiJobResponseSchema}})
+
+    def put(self, controller, data, oid, *args, **kwargs):
+        """
+        Sync security group rules
+        Make security group rules equal to a list of rules. Only missing rules are created and only rules not in the
+        list are deleted.
+        """
+        sg = self.get_resource_reference(controller, oid)
+        job = sg.sync_rules(data.get("security_group_rules"))
+        return job
+
+
 class DeleteSecurityGroupsRuleParamRequestSchema(Schema):
     rule_id = fields.String(
         required=False,
@@ -312,6 +346,12 @@ class OpenstackSecurityGroupAPI(OpenstackAPI):
                 DeleteSecurityGroupsRule,
                 {},
             ),
+            (
+                "%s/security_groups/<oid>/rules" % base,
+                "PUT",
+                SyncSecurityGroupsRules,
+                {},
+            ),
         ]
 
         OpenstackAPI.register_api(module, rules, **kwargs)
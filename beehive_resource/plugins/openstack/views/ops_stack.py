@@ -172,6 +172,11 @@ class GetOpsStackOutputs(OpenstackOpsStackApiView):
 
 class GetOpsStackResourcesResponseSchema(Schema):
     stack_resources = fields.List(fields.Dict, required=True)
+    unresolved = fields.List(
+        fields.Dict,
+        required=False,
+        description="stack resources without a local resource",
+    )
 
 
 class GetOpsStackResources(OpenstackOpsStackApiView):
@@ -190,9 +195,11 @@ class GetOpsStackResources(OpenstackOpsStackApiView):
         Get Stack resources
         """
         stack = self.get_resource_reference(controller, oid)
-        res, total = stack.get_stack_resources(*args, **kwargs)
+        res, unresolved = stack.resolve_stack_resources()
         resp = [i.info() for i in res if i is not None]
-        return self.format_paginated_response(resp, "resources", total, **kwargs)
+        resp = self.format_paginated_response(resp, "resources", len(res), **kwargs)
+        resp["unresolved"] = unresolved
+        return resp
 
 
 class GetOpsStackInternalResourcesResponseSchema(Schema):
@@ -4,6 +4,11 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 import logging
+from datetime import datetime
+from time import time
+import ujson as json
+from six import ensure_str
+from beecell.simple import format_date
 from beehive.common.data import truncate, operation
 from beehive_resource.container import Resource, AsyncResource
 from beehive.common.apimanager import ApiManagerError
@@ -140,6 +145,96 @@ class ComputeQuotas(object):
         return True
 
 
+#: metric collectors indexed by the objdef of the resources they measure
+metric_collectors = {}
+
+
+def register_metric_collector(collector_class):
+    """Class decorator that registers a metric collector for its objdef
+
+    :param collector_class: MetricCollector subclass
+    :return: collector_class
+    """
+    metric_collectors[collector_class.objdef] = collector_class
+    return collector_class
+
+
+class MetricCollector(object):
+    """Compute the metrics of many resources of the same type in bulk from the local resource state. Subclasses set
+    objdef and units and implement collect. Register them with register_metric_collector.
+
+    Run time of every collector run for a compute zone is saved in the redis hash stats_key.<zone id> and can be read
+    with get_stats.
+
+    :param controller: resource controller instance
+    """
+
+    objdef = None  #: objdef of the measured resources
+    units = {}  #: metric unit by metric key
+    stats_key = "resource.metrics.collector"
+    stats_ttl = 604800  #: time to live of the run times of the collectors of a compute zone
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.logger = logging.getLogger(self.__class__.__module__ + "." + self.__class__.__name__)
+
+    def collect(self, resources):
+        """Compute metrics values
+
+        :param resources: list of resources
+        :return: {resource id: {metric key: value}}
+        """
+        raise NotImplementedError()
+
+    def run(self, resources, zone_id=None):
+        """Compute metrics of some resources. When zone_id is set save the collector run time for the compute zone
+
+        :param resources: list of resources
+        :param zone_id: id of the compute zone whose metrics are collected [optional]
+        :return: {resource id: metrics record like the one returned by get_metrics}
+        """
+        start = time()
+        values = self.collect(resources)
+        extraction_date = format_date(datetime.today())
+
+        res = {}
+        for resource in resources:
+            metrics = values.get(resource.oid, {})
+            res[resource.oid] = {
+                "id": resource.oid,
+                "uuid": resource.uuid,
+                "resource_uuid": resource.uuid,
+                "type": resource.objdef,
+                "metrics": [
+                    {"key": k, "value": v, "type": 1, "unit": self.units.get(k, "#")} for k, v in metrics.items()
+                ],
+                "extraction_date": extraction_date,
+            }
+
+        elapsed = round(time() - start, 4)
+        if zone_id is not None:
+            stats = {"elapsed": elapsed, "resources": len(resources), "date": extraction_date}
+            key = "%s.%s" % (self.stats_key, zone_id)
+            try:
+                self.controller.redis_cache.hset(key, self.objdef, json.dumps(stats))
+                self.controller.redis_cache.expire(key, self.stats_ttl)
+            except Exception:
+                self.logger.warning("", exc_info=True)
+        self.logger.info("Collect %s metrics of %s resources in %ss" % (self.objdef, len(resources), elapsed))
+        return res
+
+    @staticmethod
+    def get_stats(controller, zone_id):
+        """Get the last run time of every collector for a compute zone
+
+        :param controller: resource controller instance
+        :param zone_id: compute zone id
+        :return: {objdef: {"elapsed": .., "resources": .., "date": ..}}
+        """
+        res = controller.redis_cache.hgetall("%s.%s" % (MetricCollector.stats_key, zone_id))
+        return {ensure_str(k): json.loads(v) for k, v in res.items()}
+
+
 class ComputeProviderResource(AsyncResource):
     """Compute provider resource. This resource aggregate other resource"""
 
@@ -158,12 +253,48 @@ class ComputeProviderResource(AsyncResource):
     expunge_task = "beehive_resource.plugins.provider.task_v2.provider_resource_expunge_task"
     action_task = "beehive_resource.plugins.provider.task_v2.provider_resource_action_task"
 
+    site_resources_ttl = 1800  #: time to live of the cached index of local resources by site
+    cache_registry_ttl = 86400  #: min time to live of the set of the cache keys recorded by set_cache
+
     def __init__(self, *args, **kvargs):
         Resource.__init__(self, *args, **kvargs)
 
     def get_configs(self):
         return self.attribs.get("configs")
 
+    def get_site_resources(self):
+        """Get the local resources of the aggregated resource indexed by site. Index is read with a single query and
+        cached until a link of the aggregated resource is added or removed. State of local resources changes without
+        the aggregated resource knowing it, so it is not cached: use get_active_site_resources to check it.
+
+        :return: dict {site id: {"id": .., "uuid": .., "objdef": ..}}
+        """
+        res = self.get_cached("site_resources")
+        if res is not None:
+            return res
+
+        res = {}
+        for item in self.manager.get_site_linked_resources_internal(self.oid):
+            site_id = item.link_type.split(".", 1)[1]
+            res.setdefault(site_id, {"id": item.id, "uuid": item.uuid, "objdef": item.objdef})
+        self.set_cache("site_resources", res, ttl=self.site_resources_ttl)
+        return res
+
+    def get_active_site_resources(self, site_resources):
+        """Get the active resources in a list of local resources returned by get_site_resources. State is read with a
+        single query.
+
+        :param site_resources: list of local resources
+        :return: set of active resource id
+        """
+        states = self.manager.get_resources_state_internal([item["id"] for item in site_resources])
+        # state ACTIVE or ERROR with active flag, like Resource.is_active
+        return {item.id for item in states if item.state in [2, 4] and item.active in [1, True]}
+
+    def reset_site_resources(self):
+        """Remove the cached index of local resources by site"""
+        self.reset_cache("site_resources")
+
     @staticmethod
     def get_active_availability_zone(compute_zone, site):
         """Get availability zone ACTIVE
@@ -174,16 +305,13 @@ class ComputeProviderResource(AsyncResource):
         """
         from beehive_resource.plugins.provider.entity.zone import AvailabilityZone
 
-        availability_zone, total = compute_zone.get_linked_resources(
-            link_type="relation.%s" % site.oid,
-            entity_class=AvailabilityZone,
-            objdef=AvailabilityZone.objdef,
-            run_customize=False,
-        )
-        if availability_zone[0].is_active() is False:
-            raise ApiManagerError("Availability zone %s has not a correct state" % availability_zone[0].uuid)
+        availability_zone = compute_zone.get_site_resources().get(str(site.oid), None)
+        if availability_zone is None or availability_zone["objdef"] != AvailabilityZone.objdef:
+            raise ApiManagerError("Availability zone in site %s not found" % site.oid)
+        if availability_zone["id"] not in compute_zone.get_active_site_resources([availability_zone]):
+            raise ApiManagerError("Availability zone %s has not a correct state" % availability_zone["uuid"])
 
-        return availability_zone[0].oid
+        return availability_zone["id"]
 
     @staticmethod
     def get_active_availability_zones(compute_zone, multi_avz=True):
@@ -197,15 +325,11 @@ class ComputeProviderResource(AsyncResource):
 
         availability_zones = []
         if multi_avz is True:
-            avzs, total = compute_zone.get_linked_resources(
-                link_type_filter="relation%",
-                entity_class=AvailabilityZone,
-                objdef=AvailabilityZone.objdef,
-                run_customize=False,
-            )
-            for avz in avzs:
-                if avz.is_active() is True:
-                    availability_zones.append(avz.oid)
+            avzs = [
+                avz for avz in compute_zone.get_site_resources().values() if avz["objdef"] == AvailabilityZone.objdef
+            ]
+            active = compute_zone.get_active_site_resources(avzs)
+            availability_zones = [avz["id"] for avz in avzs if avz["id"] in active]
 
         return availability_zones
 
@@ -227,17 +351,7 @@ class ComputeProviderResource(AsyncResource):
         :param site_id: site id
         :return: availability zone child
         """
-        objs, tot = self.get_linked_resources(
-            link_type="relation.%s" % site_id,
-            run_customize=False,
-            size=-1,
-            with_perm_tag=False,
-        )
-        if len(objs) == 0:
-            raise ApiManagerError("resource %s does not have child in site %s" % (self.oid, site_id))
-        obj = objs[0]
-        obj.check_active()
-        return obj
+        return self.__get_site_resource(site_id)
 
     def get_local_resource(self, site_id):
         """Get local resource in a specific availability zone related to an aggregated resource
@@ -245,15 +359,22 @@ class ComputeProviderResource(AsyncResource):
         :param site_id: site id
         :return: availability zone local resource
         """
-        objs, tot = self.get_linked_resources(
-            link_type="relation.%s" % site_id,
-            run_customize=False,
-            size=-1,
-            with_perm_tag=False,
-        )
-        if len(objs) == 0:
+        return self.__get_site_resource(site_id)
+
+    def __get_site_resource(self, site_id):
+        item = self.get_site_resources().get(str(site_id), None)
+        obj = None
+        if item is not None:
+            try:
+                obj = self.controller.get_simple_resource(item["id"])
+            except ApiManagerError:
+                # cached index is out of date
+                self.reset_site_resources()
+                item = self.get_site_resources().get(str(site_id), None)
+                if item is not None:
+                    obj = self.controller.get_simple_resource(item["id"])
+        if obj is None:
             raise ApiManagerError("resource %s does not have child in site %s" % (self.oid, site_id))
-        obj = objs[0]
         obj.check_active()
         return obj
 
@@ -341,9 +462,36 @@ class ComputeProviderResource(AsyncResource):
 
         return True
 
+    def add_link(self, name=None, type=None, end_resource=None, attributes=None):
+        """Add resource links. Cached index of local resources by site is removed.
+
+        :param name: link name
+        :param type: link type
+        :param end_resource: end resource reference id, uuid
+        :param attributes: link attributes [optional]
+        :return: link uuid
+        :raise ApiManagerError:
+        """
+        res = AsyncResource.add_link(self, name=name, type=type, end_resource=end_resource, attributes=attributes)
+        self.reset_site_resources()
+        return res
+
+    def del_link(self, end_resource):
+        """Delete a link that terminate on the end_resource. Cached index of local resources by site is removed.
+
+        :param end_resource: end resource name or id
+        :return: link id
+        """
+        res = AsyncResource.del_link(self, end_resource)
+        self.reset_site_resources()
+        return res
+
     def __cache_key(self, method):
         return "%s.%s.%s" % (self.__class__.__name__, method, self.uuid)
 
+    def __cache_registry_key(self):
+        return "%s.cachekeys.%s" % (self.__class__.__name__, self.uuid)
+
     def reset_cache(self, method: str) -> bool:
         """TODO decidere se spostarla in Resource o ApiObject ?
         Reset chace for method
@@ -353,8 +501,19 @@ class ComputeProviderResource(AsyncResource):
         # save data in cache
         if operation.cache is False or self.model is None:
             return False
-        key = self.__cache_key(method)
-        return self.controller.cache.delete_by_pattern(key)
+
+        # delete the keys recorded by set_cache. Keys are not searched in the keyspace
+        registry = self.__cache_registry_key()
+        redis = self.controller.redis_cache
+        if method == "*":
+            for key in redis.smembers(registry):
+                self.controller.cache.delete(ensure_str(key))
+            redis.delete(registry)
+        else:
+            key = self.__cache_key(method)
+            self.controller.cache.delete(key)
+            redis.srem(registry, key)
+        return True
 
     def set_cache(self, method: str, value: Any, ttl=2500, pickling=False) -> bool:
         """TODO decidere se spostarla in Resource o ApiObject ?
@@ -369,7 +528,14 @@ class ComputeProviderResource(AsyncResource):
             return False
 
         key = self.__cache_key(method)
-        return self.controller.cache.set(key, value, ttl=ttl, pickling=pickling)
+        res = self.controller.cache.set(key, value, ttl=ttl, pickling=pickling)
+
+        # record the key so that reset_cache can delete it
+        registry = self.__cache_registry_key()
+        redis = self.controller.redis_cache
+        redis.sadd(registry, key)
+        redis.expire(registry, max(ttl, self.cache_registry_ttl))
+        return res
 
     def get_cached(
         self,
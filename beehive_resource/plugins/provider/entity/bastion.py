@@ -22,6 +22,64 @@ from beehive_resource.plugins.provider.entity.volumeflavor import ComputeVolumeF
 from beehive_resource.plugins.provider.entity.vpc_v2 import Vpc
 
 
+class BastionContext(object):
+    """Data used by a bastion action: security group, default gateway, nat address, ssh credential and zabbix
+    orchestrator. Data are read once by ComputeBastion.get_context when the action starts and passed to the task steps
+    with dump and load, so steps do not read them again. Context can not be modified.
+
+    :param security_group: bastion security group uuid [optional]
+    :param gateway: compute zone default gateway id [optional]
+    :param nat: bastion nat {"ip_address": .., "port": ..} [optional]
+    :param credential: ssh module user credential. It is never dumped in task params [optional]
+    :param zabbix_orchestrator: tenant zabbix orchestrator id. Connection params are read by the step that uses them
+        with ComputeBastion.get_zabbix_server and are never dumped in task params [optional]
+    """
+
+    __slots__ = ("security_group", "gateway", "nat", "credential", "zabbix_orchestrator")
+
+    def __init__(self, security_group=None, gateway=None, nat=None, credential=None, zabbix_orchestrator=None):
+        object.__setattr__(self, "security_group", security_group)
+        object.__setattr__(self, "gateway", gateway)
+        object.__setattr__(self, "nat", nat or {})
+        object.__setattr__(self, "credential", credential)
+        object.__setattr__(self, "zabbix_orchestrator", zabbix_orchestrator)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Bastion context can not be modified")
+
+    def get_nat_ip_address(self):
+        """Get nat address as ip_address:port"""
+        return "%s:%s" % (self.nat.get("ip_address"), self.nat.get("port"))
+
+    def dump(self):
+        """Dump context as task params
+
+        :return: dict
+        """
+        return {
+            "security_group": self.security_group,
+            "gateway": self.gateway,
+            "nat": self.nat,
+            "zabbix_orchestrator": self.zabbix_orchestrator,
+        }
+
+    @staticmethod
+    def load(data):
+        """Load context from task params
+
+        :param data: dict returned by dump or None
+        :return: BastionContext
+        """
+        if data is None:
+            data = {}
+        return BastionContext(
+            security_group=data.get("security_group"),
+            gateway=data.get("gateway"),
+            nat=data.get("nat"),
+            zabbix_orchestrator=data.get("zabbix_orchestrator"),
+        )
+
+
 class ComputeBastion(ComputeInstance):
     """Compute bastion instance"""
 
@@ -67,6 +125,87 @@ class ComputeBastion(ComputeInstance):
         res = "%s:%s" % (nat_ip_address.get("ip_address"), nat_ip_address.get("port"))
         return res
 
+    def get_context(self, security_group=False, gateway=False, username=None, zabbix=False):
+        """Get bastion context. Nat address is always read from resource attributes. The other data are read only
+        when required.
+
+        :param security_group: if True get bastion security group [default=False]
+        :param gateway: if True get compute zone default gateway [default=False]
+        :param username: if not None get the ssh module credential of this user [default=None]
+        :param zabbix: if True get tenant zabbix orchestrator [default=False]
+        :return: BastionContext
+        """
+        sg_id = None
+        if security_group is True:
+            sg = self.get_bastion_security_group()
+            if sg is not None:
+                sg_id = sg.uuid
+
+        gateway_id = None
+        if gateway is True:
+            gateway_id = self.get_parent().get_default_gateway().oid
+
+        credential = None
+        if username is not None:
+            credential = self.get_credential(username=username)
+
+        zabbix_orchestrator = None
+        if zabbix is True:
+            site = self.container.get_simple_resource(self.get_attribs(key="availability_zone"))
+            zabbix_orchestrator = ComputeBastion.get_zabbix_orchestrator(site)
+
+        context = BastionContext(
+            security_group=sg_id,
+            gateway=gateway_id,
+            nat=self.get_attribs(key="nat"),
+            credential=credential,
+            zabbix_orchestrator=zabbix_orchestrator,
+        )
+        self.logger.debug("Get bastion %s context: %s" % (self.oid, context.dump()))
+        return context
+
+    @staticmethod
+    def get_zabbix_orchestrator(site):
+        """Get the tenant zabbix orchestrator of a site
+
+        :param site: site instance
+        :return: zabbix orchestrator id
+        """
+        orchestrators = site.get_orchestrators_by_tag("tenant", select_types=["zabbix"])
+        return next(iter(orchestrators.keys()))
+
+    @staticmethod
+    def get_zabbix_server(controller, orchestrator):
+        """Get connection params of a zabbix orchestrator
+
+        :param controller: resource controller instance
+        :param orchestrator: zabbix orchestrator id
+        :return: {"orchestrator", "uri", "user", "pwd", "ip"}. pwd is encrypted
+        """
+        from beehive_resource.plugins.zabbix.controller import ZabbixContainer
+
+        zabbix_container: ZabbixContainer = controller.get_container(orchestrator, connect=False)
+        conn_params = zabbix_container.conn_params["api"]
+        uri = conn_params.get("uri")
+        return {
+            "orchestrator": zabbix_container.oid,
+            "uri": uri,
+            "user": conn_params.get("user"),
+            "pwd": conn_params.get("pwd"),
+            "ip": zabbix_container.get_ip_address(uri),
+        }
+
+    def __load_context(self, data, **kvargs):
+        """Load context passed by the task or read it when task does not pass it
+
+        :param data: dumped context or None
+        :param kvargs: get_context params
+        :return: BastionContext
+        """
+        if data is None:
+            return self.get_context(**kvargs)
+        return BastionContext.load(data)
+
     # def get_real_ip_address(self):
     #     """return ip address used for remote connection"""
     #     nat_ip_address = self.get_attribs(key='nat')
@@ -293,6 +432,14 @@ class ComputeBastion(ComputeInstance):
         }
         kvargs.update(params)
 
+        # bastion security group is created by the task
+        context = BastionContext(
+            gateway=gw.oid,
+            nat=params["attribute"]["nat"],
+            zabbix_orchestrator=ComputeBastion.get_zabbix_orchestrator(site),
+        )
+        kvargs["bastion_context"] = context.dump()
+
         # create task workflow
         steps = [
             ComputeInstance.task_path + "create_resource_pre_step",
@@ -418,6 +565,7 @@ class ComputeBastion(ComputeInstance):
         # post expunge
         steps.append(ComputeInstance.task_path + "expunge_resource_post_step")
 
+        kvargs["bastion_context"] = self.get_context(security_group=True, gateway=True).dump()
         kvargs["steps"] = steps
         return kvargs
 
@@ -548,26 +696,12 @@ class ComputeBastion(ComputeInstance):
     def install_zabbix_proxy(self, *args, **kvargs):
         """install zabbix proxy
 
+        :param kvargs.bastion_context: context dumped when the action starts [optional]
         :return: kvargs
         """
-        site_id = self.get_attribs().get("availability_zone", None)
-        site = self.container.get_simple_resource(site_id)
-
-        # select zabbix orchestrator
-        orchestrator_tag = "tenant"
-        orchestrators = site.get_orchestrators_by_tag(orchestrator_tag, select_types=["zabbix"])
-        orchestrator = next(iter(orchestrators.keys()))
-
-        from beehive_resource.plugins.zabbix.controller import ZabbixContainer
-
-        zabbix_container: ZabbixContainer = self.controller.get_container(orchestrator, connect=False)
-        # zabbix_server = zabbix_container.get_ip_address()
-        conn_params = zabbix_container.conn_params["api"]
-        zbx_srv_uri = conn_params.get("uri")
-        zbx_srv_usr = conn_params.get("user")
-        pwd = conn_params.get("pwd")
-        zbx_srv_pwd = zabbix_container.decrypt_data(pwd).decode("utf-8")
-        zbx_srv_ip = zabbix_container.get_ip_address(zbx_srv_uri)
+        context = self.__load_context(kvargs.get("bastion_context"), zabbix=True)
+        zabbix_server = ComputeBastion.get_zabbix_server(self.controller, context.zabbix_orchestrator)
+        zbx_srv_pwd = self.controller.decrypt_data(zabbix_server.get("pwd")).decode("utf-8")
 
         zabbix_pwd = random_password(length=20)
         self.set_configs(key="zabbix_proxy", value={"user": "zabbix", "pwd": zabbix_pwd})
@@ -589,9 +723,9 @@ class ComputeBastion(ComputeInstance):
                 "p_zabbix_db_user_name": "zabbix",
                 "p_zabbix_db_user_pwd": zabbix_pwd,
                 # "p_zabbix_server_ip": zbx_srv_ip,
-                "p_zabbix_server": zbx_srv_ip,
-                "p_zabbix_server_uri": zbx_srv_uri,
-                "p_zabbix_server_username": zbx_srv_usr,
+                "p_zabbix_server": zabbix_server.get("ip"),
+                "p_zabbix_server_uri": zabbix_server.get("uri"),
+                "p_zabbix_server_username": zabbix_server.get("user"),
                 "p_zabbix_server_password": zbx_srv_pwd,
                 "p_zabbix_proxy_name": self.fqdn,
             },
@@ -601,21 +735,12 @@ class ComputeBastion(ComputeInstance):
     def register_zabbix_proxy(self, *args, **kvargs):
         """register zabbix proxy
 
+        :param kvargs.bastion_context: context dumped when the action starts [optional]
         :return: kvargs
         """
-        site_id = self.get_attribs().get("availability_zone", None)
-        site = self.container.get_simple_resource(site_id)
-
-        # select zabbix orchestrator
-        orchestrator_tag = "tenant"
-        orchestrators = site.get_orchestrators_by_tag(orchestrator_tag, select_types=["zabbix"])
-        orchestrator = next(iter(orchestrators.keys()))
-        zabbix_container = self.controller.get_container(orchestrator, connect=False)
-        conn_params = zabbix_container.conn_params["api"]
-        zbx_srv_uri = conn_params.get("uri")
-        zbx_srv_usr = conn_params.get("user")
-        pwd = conn_params.get("pwd")
-        zbx_srv_pwd = zabbix_container.decrypt_data(pwd).decode("utf-8")
+        context = self.__load_context(kvargs.get("bastion_context"), zabbix=True)
+        zabbix_server = ComputeBastion.get_zabbix_server(self.controller, context.zabbix_orchestrator)
+        zbx_srv_pwd = self.controller.decrypt_data(zabbix_server.get("pwd")).decode("utf-8")
 
         zabbix_pwd = random_password(length=20)
         self.set_configs(key="zabbix_proxy", value={"user": "zabbix", "pwd": zabbix_pwd})
@@ -634,8 +759,8 @@ class ComputeBastion(ComputeInstance):
                 "p_proxy_server": "",
                 "p_ip_repository": "",
                 "p_no_proxy": "localhost,10.0.0.0/8",
-                "p_zabbix_server_uri": zbx_srv_uri,
-                "p_zabbix_server_username": zbx_srv_usr,
+                "p_zabbix_server_uri": zabbix_server.get("uri"),
+                "p_zabbix_server_username": zabbix_server.get("user"),
                 "p_zabbix_server_password": zbx_srv_pwd,
                 "p_zabbix_proxy_name": self.fqdn,
             },
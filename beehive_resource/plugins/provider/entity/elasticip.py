@@ -2,11 +2,12 @@
 #
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
-from datetime import datetime
-
-from beecell.types.type_date import format_date
 from beehive_resource.container import Resource
-from beehive_resource.plugins.provider.entity.aggregate import ComputeProviderResource
+from beehive_resource.plugins.provider.entity.aggregate import (
+    ComputeProviderResource,
+    MetricCollector,
+    register_metric_collector,
+)
 
 
 class ComputeElasticIp(ComputeProviderResource):
@@ -287,33 +288,20 @@ class ComputeElasticIp(ComputeProviderResource):
 
         }
         """
-        # base metric units
-        metric_units = {
-            "elastic_ip": "#",
-        }
+        res = ElasticIpMetricCollector(self.controller).run([self])[self.oid]
+        self.logger.debug("Get compute elastic ip %s metrics: %s" % (self.uuid, res))
+        return res
 
-        # base metric label
-        metric_labels = {"elastic_ip": "elastic_ip"}
 
-        metrics = {
-            metric_labels.get("elastic_ip"): 0,
-            metric_labels.get("gbdisk_hi"): 0,
-        }
+@register_metric_collector
+class ElasticIpMetricCollector(MetricCollector):
+    """Compute elastic ip metrics: every elastic ip counts as one public ip"""
 
-        metric_units = {metric_labels.get(k): v for k, v in metric_units.items()}
+    objdef = ComputeElasticIp.objdef
+    units = {"elastic_ip": "#"}
 
-        metrics = [{"key": k, "value": v, "type": 1, "unit": metric_units.get(k)} for k, v in metrics.items()]
-        res = {
-            "id": self.oid,
-            "uuid": self.uuid,
-            "resource_uuid": self.uuid,
-            "type": self.objdef,
-            "metrics": metrics,
-            "extraction_date": format_date(datetime.today()),
-        }
-
-        self.logger.debug("Get compute volume %s metrics: %s" % (self.uuid, res))
-        return res
+    def collect(self, resources):
+        return {resource.oid: {"elastic_ip": 1} for resource in resources}
 
 
 # class ElasticIp(AvailabilityZoneChildResource):
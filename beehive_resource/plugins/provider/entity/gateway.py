@@ -3,12 +3,16 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from datetime import datetime
-from beecell.simple import format_date, truncate, dict_set, dict_get
+from collections import namedtuple
+from beecell.simple import truncate, dict_set, dict_get
 from beehive.common.apimanager import ApiManagerError
 from beehive_resource.container import Resource
 from beehive_resource.plugins.openstack.entity.ops_router import OpenstackRouter
-from beehive_resource.plugins.provider.entity.aggregate import ComputeProviderResource
+from beehive_resource.plugins.provider.entity.aggregate import (
+    ComputeProviderResource,
+    MetricCollector,
+    register_metric_collector,
+)
 from beehive_resource.plugins.provider.entity.site import Site
 from beehive_resource.plugins.provider.entity.volumeflavor import ComputeVolumeFlavor
 from beehive_resource.plugins.provider.entity.vpc_v2 import Vpc
@@ -19,6 +23,57 @@ from beehive_resource.plugins.provider.entity.zone import (
 from beehive_resource.plugins.vsphere.entity.nsx_edge import NsxEdge
 
 
+#: route inputs of a site gateway that do not depend on a vpc
+GatewayRouteInfo = namedtuple(
+    "GatewayRouteInfo",
+    [
+        "gateway",
+        "role",
+        "site_id",
+        "transport_network",
+        "dvs",
+        "edge",
+        "edge_transport_ip",
+        "router",
+        "router_transport_ip",
+    ],
+)
+
+
+class GatewayRoutePlan(object):
+    """Route plan of a compute gateway. It contains the route inputs of all the site gateways, read once when the plan
+    is built by ComputeGateway.get_route_plan. Plan can not be modified. Build a new plan when gateways, edges or
+    routers change.
+
+    :param transport_vpc: transport vpc
+    :param items: list of GatewayRouteInfo
+    """
+
+    __slots__ = ("transport_vpc", "items")
+
+    def __init__(self, transport_vpc, items):
+        object.__setattr__(self, "transport_vpc", transport_vpc)
+        object.__setattr__(self, "items", tuple(items))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Gateway route plan can not be modified")
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def get_by_role(self, role):
+        """Get route info of the gateway with a role
+
+        :param role: gateway role
+        :return: GatewayRouteInfo or None
+        """
+        res = None
+        for item in self.items:
+            if item.role == role:
+                res = item
+        return res
+
+
 class ComputeGateway(ComputeProviderResource):
     """Compute gateway"""
 
@@ -168,23 +223,92 @@ class ComputeGateway(ComputeProviderResource):
                 res.append(router_info)
         return res
 
-    def get_vpc_route_info(self, vpc_id):
+    def get_route_plan(self, transport=True):
+        """Get route plan. Gateways, transport vpc, orchestrators, dvs, edges and routers are read once for all the
+        site gateways.
+
+        :param transport: if True read also the edge vnic and the router port on the transport network [default=True]
+        :return: GatewayRoutePlan
+        """
+        gateways, tot = self.get_linked_resources(
+            link_type_filter="relation.%", objdef=Gateway.objdef, run_customize=False
+        )
+
+        transport_vpc: Vpc = None
+        host_group = orchestrators_tag = None
+        if transport is True:
+            transport_vpc = self.get_transport_vpc()
+            host_group = self.get_hostgroup()
+            orchestrators_tag = self.get_hypervisor_tag()
+
+        dvs_index = {}
+        items = []
+        for gateway in gateways:
+            gateway: Gateway
+            site = gateway.get_site()
+            edge: NsxEdge = gateway.get_nsx_edge() if transport is True else None
+            router: OpenstackRouter = gateway.get_openstack_router()
+            transport_network = dvs = edge_transport_ip = router_transport_ip = None
+
+            if transport is True:
+                # get site network from transport vpc
+                transport_network = transport_vpc.get_network_by_site(site.oid)
+
+                # get distributed virtual switch from vsphere orchestrator
+                orchestrators = site.get_orchestrators_by_tag(orchestrators_tag, index_field="type")
+                clusters = dict_get(orchestrators.get("vsphere"), "config.clusters")
+                dvs_id = clusters.get(host_group, None).get("dvs", None)
+                if dvs_id not in dvs_index:
+                    dvs_index[dvs_id] = self.controller.get_simple_resource(dvs_id)
+                dvs = dvs_index[dvs_id]
+
+            # transport addresses are used only by gateways with an edge
+            if edge is not None:
+                # - get edge transport vnic
+                transport_portgroup = transport_network.get_vsphere_network(dvs=dvs.oid).oid
+                vnics = edge.get_vnics(portgroup=transport_portgroup)
+                if len(vnics) != 1:
+                    raise ApiManagerError("transport network has no vnic for portgroup %s" % transport_portgroup)
+                edge_transport_ip = dict_get(vnics[0], "addressGroups.addressGroup.primaryAddress")
+
+                # - get router trasport port
+                if router is not None:
+                    transport_ops_network_id = transport_network.get_openstack_network().oid
+                    ports = [p for p in router.get_ports() if p.network.oid == transport_ops_network_id]
+                    if len(ports) != 1:
+                        raise ApiManagerError("transport network has no port in openstack router %s" % router)
+                    router_transport_ip = ports[0].get_main_ip_address()
+
+            items.append(
+                GatewayRouteInfo(
+                    gateway=gateway,
+                    role=gateway.get_role(),
+                    site_id=site.oid,
+                    transport_network=transport_network,
+                    dvs=dvs,
+                    edge=edge,
+                    edge_transport_ip=edge_transport_ip,
+                    router=router,
+                    router_transport_ip=router_transport_ip,
+                )
+            )
+
+        return GatewayRoutePlan(transport_vpc, items)
+
+    def get_vpc_route_info(self, vpc_id, plan=None):
         """Get vpc route info to use in task when add, remove vpc.
 
         :param vpc_id: vpc id
+        :param plan: route plan. If None a new plan is built [optional]
         :return: list of route info
             {'role':.., 'router':.., 'gateway':.., 'network':.., 'cidr':.., 'transport_gateway':..}
         """
-        from beehive_resource.plugins.provider.entity.vpc_v2 import Vpc
-        from beehive_resource.plugins.provider.entity.vpc_v2 import PrivateNetwork, SiteNetwork
-        from beehive_resource.plugins.vsphere.entity.vs_dvpg import VsphereDvpg
-
-        gateways, tot = self.get_linked_resources(
-            link_type_filter="relation.%", objdef=Gateway.objdef, run_customize=False
-        )
+        from beehive_resource.plugins.provider.entity.vpc_v2 import PrivateNetwork
+        from beehive_resource.plugins.vsphere.entity.nsx_logical_switch import NsxLogicalSwitch
+        from beehive_resource.plugins.openstack.entity.ops_network import OpenstackNetwork
 
-        # get transport vpc
-        transport_vpc: Vpc = self.get_transport_vpc()
+        if plan is None:
+            plan = self.get_route_plan()
 
         # get vpc
         vpc: Vpc = self.controller.get_simple_resource(vpc_id)
@@ -193,108 +317,51 @@ class ComputeGateway(ComputeProviderResource):
         routes = []
 
         # two gateway: relation 710, 714
-        for gateway in gateways:
-            gateway: Gateway
-            role = gateway.get_role()
-            site = gateway.get_site()
-            site_id = site.oid
+        for item in plan:
+            item: GatewayRouteInfo
+            if item.edge is None:
+                continue
 
             # get private network from vpc
-            privateNetwork: PrivateNetwork = vpc.get_network_by_site(site_id)
-
-            # get site network from transport vpc
-            transport_network: SiteNetwork = transport_vpc.get_network_by_site(site_id)
-
-            # get orchestrators
-            host_group = self.get_hostgroup()
-            orchestrators_tag = self.get_hypervisor_tag()
-            orchestrators = site.get_orchestrators_by_tag(orchestrators_tag, index_field="type")
+            privateNetwork: PrivateNetwork = vpc.get_network_by_site(item.site_id)
 
             ######################
             ###### nsx edge ######
             ######################
-            orchestrator = orchestrators.get("vsphere")
-            clusters = dict_get(orchestrator, "config.clusters")
-            host_group_config = clusters.get(host_group, None)
-
-            # - get distributed virtual switch
-            dvs_id = host_group_config.get("dvs", None)
-            dvs = self.controller.get_simple_resource(dvs_id)
-
             # - get logical switch
-            from beehive_resource.plugins.vsphere.entity.nsx_logical_switch import NsxLogicalSwitch
-
             logical_switch: NsxLogicalSwitch = privateNetwork.get_vsphere_network()
-            # portgroup = logical_switch.ext_id
-            ip_address = logical_switch.get_gateway()
-            cidr = logical_switch.get_private_subnet()
-
-            # - get transport portgroup
-            transport_portgroup: VsphereDvpg = transport_network.get_vsphere_network(dvs=dvs.oid).oid
-
-            # - get edge
-            edge: NsxEdge = gateway.get_nsx_edge()
-            if edge is None:
-                continue
-
-            # - get edge transport vnic
-            vnics = edge.get_vnics(portgroup=transport_portgroup)
-            if len(vnics) != 1:
-                raise ApiManagerError("transport network has no vnic for portgroup %s" % transport_portgroup)
-            trasport_ip_address = dict_get(vnics[0], "addressGroups.addressGroup.primaryAddress")
 
             # - add edge route
             routes.append(
                 {
-                    "role": role,
-                    "router": edge,
-                    "gateway": ip_address,
+                    "role": item.role,
+                    "router": item.edge,
+                    "gateway": logical_switch.get_gateway(),
                     "network": logical_switch.oid,
-                    "cidr": cidr,
-                    "transport_gateway": trasport_ip_address,
+                    "cidr": logical_switch.get_private_subnet(),
+                    "transport_gateway": item.edge_transport_ip,
                 }
             )
 
             ##############################
             ###### openstack router ######
             ##############################
-            # - get router reference
-            router: OpenstackRouter = gateway.get_openstack_router()
-            if router is None:
-                self.logger.info("openstack_router None continue - gateway: %s" % gateway.oid)
+            if item.router is None:
+                self.logger.info("openstack_router None continue - gateway: %s" % item.gateway.oid)
                 continue
 
             # - get openstack network
-            from beehive_resource.plugins.openstack.entity.ops_network import OpenstackNetwork
-
             ops_network: OpenstackNetwork = privateNetwork.get_openstack_network()
 
-            # - get subnet and gateway
-            subnet_id = ops_network.get_private_subnet_entity().oid
-            ip_address = ops_network.get_gateway()
-            cidr = ops_network.get_private_subnet()
-            network_id = ops_network.oid
-
-            # - get transport network
-            transport_openstack_network: OpenstackNetwork = transport_network.get_openstack_network()
-            transport_ops_network_id = transport_openstack_network.oid
-
-            # - get router trasport port
-            ports = [p for p in router.get_ports() if p.network.oid == transport_ops_network_id]
-
-            if len(ports) != 1:
-                raise ApiManagerError("transport network has no port in openstack router %s" % router)
-            trasport_ip_address = ports[0].get_main_ip_address()
-
             # - add openstack router route
             routes.append(
                 {
-                    "role": role,
-                    "router": router,
-                    "gateway": ip_address,
-                    "network": (network_id, subnet_id),
-                    "cidr": cidr,
-                    "transport_gateway": trasport_ip_address,
+                    "role": item.role,
+                    "router": item.router,
+                    "gateway": ops_network.get_gateway(),
+                    "network": (ops_network.oid, ops_network.get_private_subnet_entity().oid),
+                    "cidr": ops_network.get_private_subnet(),
+                    "transport_gateway": item.router_transport_ip,
                 }
             )
 
@@ -661,17 +728,8 @@ class ComputeGateway(ComputeProviderResource):
                 "resource_uuid": "12u956-2425234-23654573467-567876"
             }
         """
-        metrics = []
-        res = {
-            "id": self.oid,
-            "uuid": self.uuid,
-            "resource_uuid": self.uuid,
-            "type": self.objdef,
-            "metrics": metrics,
-            "extraction_date": format_date(datetime.today()),
-        }
-
-        self.logger.debug("Get compute instance %s metrics: %s" % (self.uuid, res))
+        res = GatewayMetricCollector(self.controller).run([self])[self.oid]
+        self.logger.debug("Get compute gateway %s metrics: %s" % (self.uuid, res))
         return res
 
     #
@@ -718,41 +776,11 @@ class ComputeGateway(ComputeProviderResource):
     #
     # routing
     #
-    def __get_vsphere_transport_ip_address(self, gateway):
-        trasport_ip_address = None
-
-        edge = gateway.get_nsx_edge()
-        site = gateway.get_site()
-
-        # get orchestrators
-        host_group = self.get_hostgroup()
-        orchestrators_tag = self.get_hypervisor_tag()
-        orchestrators = site.get_orchestrators_by_tag(orchestrators_tag, index_field="type")
-        orchestrator = orchestrators.get("vsphere")
-        clusters = dict_get(orchestrator, "config.clusters")
-        host_group_config = clusters.get(host_group, None)
-
-        # - get distributed virtual switch
-        dvs_id = host_group_config.get("dvs", None)
-        dvs = self.controller.get_simple_resource(dvs_id)
-
-        # - get transport portgroup
-        transport_vpc = self.get_transport_vpc()
-        transport_network = transport_vpc.get_network_by_site(site.oid)
-        transport_portgroup = transport_network.get_vsphere_network(dvs=dvs.oid).oid
-
-        # - get edge transport vnic
-        vnics = edge.get_vnics(portgroup=transport_portgroup)
-        if len(vnics) != 1:
-            raise ApiManagerError("transport network has no vnic for portgroup %s" % transport_portgroup)
-        trasport_ip_address = dict_get(vnics[0], "addressGroups.addressGroup.primaryAddress")
-
-        return trasport_ip_address
-
-    def set_default_internet_route(self, role="default"):
+    def set_default_internet_route(self, role="default", plan=None):
         """Create default internet route
 
         :param role: role to select router. Can be default, primary, secondary  [default=default]
+        :param plan: route plan. If None a new plan is built [optional]
         """
         # create default internet route by primary router
         # ex.
@@ -761,32 +789,29 @@ class ComputeGateway(ComputeProviderResource):
             self.set_default_role(role)
 
             # get zone gateway
-            gateways, tot = self.get_linked_resources(
-                link_type_filter="relation.%",
-                objdef=Gateway.objdef,
-                run_customize=False,
-            )
+            if plan is None:
+                plan = self.get_route_plan()
 
-            gateway_from_role = None
+            item_from_role = None
             if role in ["primary", "secondary"]:
                 # get main edge
-                for gateway in gateways:
-                    if gateway.get_role() == role:
-                        gateway_from_role = gateway
+                item_from_role = plan.get_by_role(role)
 
             # add internet ruote to openstack router
-            for gateway in gateways:
-                gateway: Gateway
+            for item in plan:
+                item: GatewayRouteInfo
                 if role == "default":
-                    gateway_from_role = gateway
+                    item_from_role = item
 
                 # get transport ip address to use in route
-                trasport_ip_address = self.__get_vsphere_transport_ip_address(gateway_from_role)
+                trasport_ip_address = item_from_role.edge_transport_ip
 
                 # create route
-                router: OpenstackRouter = gateway.get_openstack_router()
+                router: OpenstackRouter = item.router
                 if router is None:
-                    self.logger.warning("NOT add openstack router default internet route - gateway: %s" % (gateway.oid))
+                    self.logger.warning(
+                        "NOT add openstack router default internet route - gateway: %s" % (item.gateway.oid)
+                    )
                 else:
                     static_route = [{"destination": "0.0.0.0/0", "nexthop": trasport_ip_address}]
                     router.add_routes(static_route)
@@ -797,10 +822,11 @@ class ComputeGateway(ComputeProviderResource):
 
             self.logger.info("set gateway %s default internet route for role %s" % (self.oid, role))
 
-    def unset_default_internet_route(self, role="default"):
+    def unset_default_internet_route(self, role="default", plan=None):
         """Remove default internet route
 
         :param role: role to select router. Can be default, primary, secondary  [default=default]
+        :param plan: route plan. If None a new plan is built [optional]
         """
         # create default internet route by primary router
         # ex.
@@ -809,32 +835,27 @@ class ComputeGateway(ComputeProviderResource):
             self.set_default_role("")
 
             # get zone gateway
-            gateways, tot = self.get_linked_resources(
-                link_type_filter="relation.%",
-                objdef=Gateway.objdef,
-                run_customize=False,
-            )
+            if plan is None:
+                plan = self.get_route_plan()
 
-            gateway_from_role = None
+            item_from_role = None
             if role in ["primary", "secondary"]:
                 # get main edge
-                for gateway in gateways:
-                    if gateway.get_role() == role:
-                        gateway_from_role = gateway
+                item_from_role = plan.get_by_role(role)
 
             # add internet ruote to openstack router
-            for gateway in gateways:
-                gateway: Gateway
+            for item in plan:
+                item: GatewayRouteInfo
                 if role == "default":
-                    gateway_from_role = gateway
+                    item_from_role = item
 
                 # get transport ip address to use in route
-                trasport_ip_address = self.__get_vsphere_transport_ip_address(gateway_from_role)
+                trasport_ip_address = item_from_role.edge_transport_ip
 
-                router: OpenstackRouter = gateway.get_openstack_router()
+                router: OpenstackRouter = item.router
                 if router is None:
                     self.logger.warning(
-                        "NOT delete openstack router default internet route - gateway: %s" % (gateway.oid)
+                        "NOT delete openstack router default internet route - gateway: %s" % (item.gateway.oid)
                     )
                 else:
                     static_route = [{"destination": "0.0.0.0/0", "nexthop": trasport_ip_address}]
@@ -848,16 +869,18 @@ class ComputeGateway(ComputeProviderResource):
 
             self.logger.info("unset gateway %s default internet route for role %s" % (self.oid, role))
 
-    def reset_routes(self):
-        """Remove default internet route"""
+    def reset_routes(self, plan=None):
+        """Remove default internet route
+
+        :param plan: route plan. If None a new plan without transport addresses is built [optional]
+        """
         # get zone gateway
-        gateways, tot = self.get_linked_resources(
-            link_type_filter="relation.%", objdef=Gateway.objdef, run_customize=False
-        )
+        if plan is None:
+            plan = self.get_route_plan(transport=False)
 
         # add internet ruote to openstack router
-        for gateway in gateways:
-            router: OpenstackRouter = gateway.get_openstack_router()
+        for item in plan:
+            router: OpenstackRouter = item.router
             if router is None:
                 continue
 
@@ -1331,6 +1354,38 @@ class ComputeGateway(ComputeProviderResource):
     #     return config
 
 
+@register_metric_collector
+class GatewayMetricCollector(MetricCollector):
+    """Compute gateway metrics: the gateway, its flavor and the number of linked uplink and internal vpcs"""
+
+    objdef = ComputeGateway.objdef
+    units = {
+        "gateway": "#",
+        "gateway_uplink_vpc": "#",
+        "gateway_internal_vpc": "#",
+    }
+
+    def collect(self, resources):
+        links = self.controller.manager.count_resource_links_internal(
+            [r.oid for r in resources], ["uplink", "internal-vpc"]
+        )
+        counts = {}
+        for link in links:
+            counts.setdefault(link.start_resource_id, {})[link.link_type] = link.count
+
+        res = {}
+        for resource in resources:
+            resource_counts = counts.get(resource.oid, {})
+            metrics = {"gateway": 1}
+            flavor = resource.get_attribs(key="flavor", default=None)
+            if flavor is not None:
+                metrics["gateway_%s" % flavor] = 1
+            metrics["gateway_uplink_vpc"] = resource_counts.get("uplink", 0)
+            metrics["gateway_internal_vpc"] = resource_counts.get("internal-vpc", 0)
+            res[resource.oid] = metrics
+        return res
+
+
 class Gateway(AvailabilityZoneChildResource):
     """Availability Zone Instance"""
 
@@ -160,7 +160,10 @@ class ComputeInstance(ComputeProviderResource):
 
     def is_image_py3(self):
         """check if image is python 3 compliant"""
-        images, total = self.get_linked_resources(link_type="image", with_perm_tag=False, run_customize=False)
+        if self.image is not None:
+            images, total = [self.image], 1
+        else:
+            images, total = self.get_linked_resources(link_type="image", with_perm_tag=False, run_customize=False)
         if total > 0:
             image = images[0]
             name = image.get_attribs(key="configs.os").lower()
@@ -286,6 +289,10 @@ class ComputeInstance(ComputeProviderResource):
         return info
 
     def get_ip_address(self):
+        # use vpcs already loaded by customize_list or post_get
+        if len(self.vpcs) > 0:
+            return json.loads(self.vpcs[0].link_attr).get("fixed_ip", {}).get("ip", "")
+
         ip_address = None
         vpc_links, total = self.get_links(type="vpc")
         if len(vpc_links) > 0:
@@ -669,17 +676,17 @@ class ComputeInstance(ComputeProviderResource):
         :return: None
         :raise ApiManagerError:
         """
-        # get main availability zones
-        zone_idx = controller.index_resources_by_id(entity_class=Site)
-
         resource_idx = {}
         resource_ids = []
+        zone_ids = set()
         for e in entities:
             resource_idx[e.oid] = e
             resource_ids.append(e.oid)
+            if e.availability_zone_id is not None:
+                zone_ids.add(e.availability_zone_id)
 
-        # get main availability zones
-        zone_idx = controller.index_resources_by_id(entity_class=Site)
+        # get main availability zones of the listed instances
+        zone_idx = controller.index_resources_by_id(entity_class=Site, oids=list(zone_ids))
         for entity in entities:
             if entity.availability_zone_id is not None:
                 entity.availability_zone = zone_idx.get(entity.availability_zone_id)
@@ -2226,7 +2233,12 @@ class ComputeInstance(ComputeProviderResource):
     #
     # apply customization
     #
-    def set_ansible_ssh_common_args(self, data, username="root"):
+    def get_bastion_ssh_common_args(self, username="root"):
+        """Get ansible ssh common args used to reach the instance through the compute zone bastion host
+
+        :param username: bastion username [default=root]
+        :return: ssh common args or None if compute zone has no bastion host
+        """
         # ansible_ssh_common_args: '-o ProxyCommand="sshpass -p mypass ssh -o StrictHostKeyChecking=no -W %h:%p -q ' \
         #                          'root@84.1.2.3 -p 11100"'
         from beehive_resource.plugins.provider.entity.bastion import ComputeBastion
@@ -2235,12 +2247,13 @@ class ComputeInstance(ComputeProviderResource):
         computeZone: ComputeZone = self.get_parent()
         bastion_host: ComputeBastion = computeZone.get_bastion_host()
         if bastion_host is None:
-            return data
+            return None
 
-        nat_ip_address, nat_ip_port = bastion_host.get_nat_ip_address().split(":")
+        context = bastion_host.get_context(username=username)
+        nat_ip_address, nat_ip_port = context.get_nat_ip_address().split(":")
         params = {
             "username": username,
-            "pwd": bastion_host.get_credential(username=username).get("password"),
+            "pwd": context.credential.get("password"),
             "host": nat_ip_address,
             "port": nat_ip_port,
         }
@@ -2250,6 +2263,22 @@ class ComputeInstance(ComputeProviderResource):
             "-o StrictHostKeyChecking=no -W %h:%p -q "
             '{username}@{host} -p {port}"'.format(**params)
         )
+        return ansible_ssh_common_args
+
+    def set_ansible_ssh_common_args(self, data, username="root", ansible_ssh_common_args=None):
+        """Set ansible vars used to reach the instance through the compute zone bastion host
+
+        :param data: ansible vars
+        :param username: bastion username [default=root]
+        :param ansible_ssh_common_args: bastion ssh common args got from get_bastion_ssh_common_args. Pass it when
+            many instances of the same compute zone are prepared [optional]
+        :return: ansible vars
+        """
+        if ansible_ssh_common_args is None:
+            ansible_ssh_common_args = self.get_bastion_ssh_common_args(username=username)
+        if ansible_ssh_common_args is None:
+            return data
+
         data["ansible_ssh_common_args"] = ansible_ssh_common_args
 
         data["ansible_host"] = self.get_ip_address()
@@ -2265,6 +2294,79 @@ class ComputeInstance(ComputeProviderResource):
 
         return data
 
+    @staticmethod
+    def get_ansible_inventory(controller, instances, availability_zone_id, site_id):
+        """Build the ansible inventory of the instances of an availability zone. Instances with images and ip
+        addresses and their zone instances are read with a fixed number of queries, bastion ssh args once for every
+        compute zone. Admin credentials are still read from the ssh module one instance at a time.
+
+        :param controller: resource controller
+        :param instances: list of {"id": instance oid, "extra_vars": {..}}
+        :param availability_zone_id: availability zone id
+        :param site_id: availability zone site id
+        :return: (hosts, ssh_creds). hosts is a list of {"ip_addr": .., "extra_vars": ..}, ssh_creds are the admin
+            credential of the last host
+        """
+        instance_params = {instance["id"]: instance for instance in instances}
+        entities, total = controller.get_resources(
+            ids=list(instance_params.keys()), type=ComputeInstance.objdef, size=-1
+        )
+        entity_idx = {entity.oid: entity for entity in entities}
+        zone_instances = controller.get_directed_linked_resources_internal(
+            resources=list(entity_idx.keys()), link_type="relation.%s" % site_id, run_customize=False
+        )
+
+        hosts = []
+        ssh_creds = None
+        bastion_args = {}
+        for oid, params in instance_params.items():
+            entity: ComputeInstance = entity_idx.get(oid)
+            zone_objs = zone_instances.get(oid, [])
+            if entity is None or len(zone_objs) == 0 or zone_objs[0].parent_id != availability_zone_id:
+                continue
+
+            # bastion ssh args are the same for all the instances of a compute zone
+            compute_zone_id = entity.parent_id
+            if compute_zone_id not in bastion_args:
+                bastion_args[compute_zone_id] = entity.get_bastion_ssh_common_args()
+
+            inst_extra_vars = params.get("extra_vars")
+            ssh_creds = entity.get_real_admin_credential()
+            if entity.is_windows() is True:
+                if bastion_args[compute_zone_id] is not None:
+                    raise Exception("Ansible connection with winrm is not supported through bastion")
+                inst_extra_vars.update(
+                    {
+                        # vedi https://docs.ansible.com/ansible/latest/os_guide/windows_winrm.html
+                        "ansible_connection": "winrm",
+                        "ansible_winrm_server_cert_validation": "ignore",
+                    }
+                )
+            else:
+                inst_extra_vars.update(
+                    {
+                        "ansible_user": ssh_creds["username"],
+                        "ansible_port": entity.get_real_ssh_port(),
+                        "ansible_connection": "ssh",
+                        "ansible_ssh_common_args": "-o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no",
+                    }
+                )
+                # add data per account private
+                if bastion_args[compute_zone_id] is not None:
+                    inst_extra_vars = entity.set_ansible_ssh_common_args(
+                        inst_extra_vars, ansible_ssh_common_args=bastion_args[compute_zone_id]
+                    )
+
+            hosts.append(
+                {
+                    "ip_addr": entity.get_real_ip_address(),
+                    "extra_vars": ";".join(["%s:%s" % (k, v) for k, v in inst_extra_vars.items()]),
+                }
+            )
+
+        controller.logger.debug("Get ansible inventory of %s instances: %s hosts" % (len(instances), len(hosts)))
+        return hosts, ssh_creds
+
     #
     # actions
     #
@@ -4,6 +4,7 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 # from collections import Set
+from bisect import bisect_right
 from re import match
 from ipaddress import IPv4Address
 from six import ensure_text
@@ -18,6 +19,107 @@ from beehive_resource.plugins.provider.entity.vpc import Vpc
 from beehive_resource.plugins.provider.entity.zone import AvailabilityZoneChildResource
 
 
+class PortIntervalSet(object):
+    """Set of port intervals. Overlapping and adjacent intervals are merged at build time so coverage query is a
+    binary search over disjoint sorted intervals.
+
+    :param intervals: list of (start, end) tuple
+    """
+
+    def __init__(self, intervals):
+        merged = []
+        for start, end in sorted(intervals):
+            if len(merged) > 0 and start <= merged[-1][1] + 1:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self.starts = [i[0] for i in merged]
+        self.ends = [i[1] for i in merged]
+
+    def covers(self, start, end):
+        """Check interval is fully contained in the set
+
+        :param start: interval start
+        :param end: interval end
+        :return: True if interval is contained
+        """
+        pos = bisect_right(self.starts, start) - 1
+        return pos >= 0 and self.ends[pos] >= end
+
+
+class SecurityGroupAclMatcher(object):
+    """Compiled security group acls. Acls are indexed by protocol and source, both matched exactly, and ports are
+    stored as interval sets.
+
+    :param acls: list of [source, proto, ports] like ['Cidr:10.0.0.0/8', '6:*', '80,443']
+    """
+
+    def __init__(self, acls):
+        index = {}
+        for source, proto, ports in acls:
+            index.setdefault(proto, {}).setdefault(source, []).extend(self.parse_ports(ports))
+
+        # compile port intervals
+        self.index = {}
+        for proto, sources in index.items():
+            self.index[proto] = {source: PortIntervalSet(intervals) for source, intervals in sources.items()}
+
+    @staticmethod
+    def parse_ports(ports):
+        """Convert acl ports string in a list of intervals
+
+        :param ports: *, single port, ports interval or comma separated list of ports
+        :return: list of (start, end)
+        """
+        intervals = []
+        for port in str(ports).split(","):
+            port = port.strip()
+            if port == "*" or port == "":
+                intervals.append((0, 65535))
+            elif port.find("-") > 0:
+                start, end = port.split("-")
+                intervals.append((int(start), int(end)))
+            else:
+                intervals.append((int(port), int(port)))
+        return intervals
+
+    def match(self, source, proto, ports):
+        """Check required acl is permitted
+
+        :param source: normalized source like *:*, Cidr:10.0.0.0/24 or SecurityGroup:<uuid>
+        :param proto: normalized protocol like *:*, 6:* or 1:8
+        :param ports: list of (start, end) port intervals
+        :return: True if all the required ports are permitted
+        """
+        # an acl permits the required acl when its source is *:* or the same source and its protocol is *:* or the
+        # same protocol
+        port_sets = []
+        for item in {"*:*", proto}:
+            item = self.index.get(item, None)
+            if item is None:
+                continue
+            for item_source in {"*:*", source}:
+                port_set = item.get(item_source, None)
+                if port_set is not None:
+                    port_sets.append(port_set)
+
+        if len(port_sets) == 0:
+            return False
+        if len(port_sets) > 1:
+            intervals = []
+            for port_set in port_sets:
+                intervals.extend(zip(port_set.starts, port_set.ends))
+            port_set = PortIntervalSet(intervals)
+        else:
+            port_set = port_sets[0]
+
+        for start, end in ports:
+            if port_set.covers(start, end) is False:
+                return False
+        return True
+
+
 class SecurityGroup(ComputeProviderResource):
     """SecurityGroup"""
 
@@ -27,12 +129,17 @@ class SecurityGroup(ComputeProviderResource):
     objdesc = "Provider SecurityGroup"
     task_path = "beehive_resource.plugins.provider.task_v2.security_group.SecurityGroupTask."
 
+    acl_version_key = "SecurityGroupAcl.version"  #: cache key of the version of the acls
+    acl_version_ttl = 86400  #: time to live of the version of the acls
+
     def __init__(self, *args, **kvargs):
         ComputeProviderResource.__init__(self, *args, **kvargs)
 
         self.rules = []
         self.compute_zone = None
         self.instances = []
+        self._acl_matcher = None
+        self._acl_matcher_version = None
 
     def info(self):
         """Get infos.
@@ -406,25 +513,77 @@ class SecurityGroup(ComputeProviderResource):
         self.logger.debug("Get security group %s acls: %s" % (self.uuid, truncate(acls)))
         return acls
 
-    def has_acl(self, source, protocol, ports, where=None):
-        """Check security group acl
+    @staticmethod
+    def get_acl_version(controller):
+        """Get the version of the acls. Version changes every time an acl is created, updated or deleted
+
+        :param controller: controller instance
+        :return: acl version
+        """
+        version = controller.cache.get(SecurityGroup.acl_version_key)
+        if version is None:
+            version = SecurityGroup.update_acl_version(controller)
+        return version
+
+    @staticmethod
+    def update_acl_version(controller):
+        """Set a new version of the acls. Acl matchers cached with another version are rebuilt
+
+        :param controller: controller instance
+        :return: new acl version
+        """
+        version = id_gen()
+        controller.cache.set(SecurityGroup.acl_version_key, version, ttl=SecurityGroup.acl_version_ttl)
+        return version
+
+    def get_acl_matcher(self):
+        """Get the compiled acl matcher of the security group. Matcher is built from the available acls and cached
+        until security group acl links change or an acl is created, updated or deleted.
+
+        :return: SecurityGroupAclMatcher instance
+        """
+        version = SecurityGroup.get_acl_version(self.controller)
+        if self._acl_matcher is not None and self._acl_matcher_version == version:
+            return self._acl_matcher
+
+        # acls are wrapped in a dict because get_cached considers an empty list a cache miss
+        cached = self.get_cached("acl_matcher")
+        if cached is None or cached.get("version") != version:
+            acls = [[acl.get_source(), acl.get_proto(), str(acl.get_ports())] for acl in self.get_acls()]
+            self.set_cache("acl_matcher", {"version": version, "acls": acls}, ttl=600)
+        else:
+            acls = cached.get("acls", [])
+        self.logger.debug2("Available acl set: %s" % acls)
+
+        self._acl_matcher = SecurityGroupAclMatcher(acls)
+        self._acl_matcher_version = version
+        return self._acl_matcher
+
+    def reset_acl_matcher(self):
+        """Reset the compiled acl matcher of the security group"""
+        self._acl_matcher = None
+        self.reset_cache("acl_matcher")
+
+    def __parse_acl_request(self, source, protocol, ports):
+        """Parse and validate a required acl
 
         :param source: acl source. Can be *:*, Cidr:<>, Sg:<>
         :param protocol: acl protocol. Can be *:*, 7:*, 9:0 or tcp:*
         :param ports: comma separated list of ports, single port or ports interval
-        :param where: acl where [optional]
-        :return: True if security group available acls map required acl
+        :return: (source, protocol, ports intervals)
         """
         proto_check = InternetProtocol()
 
         # check source
         rtype, rval = source.split(":")
+        if rtype == "Sg":
+            rtype = "SecurityGroup"
         if rtype not in ["SecurityGroup", "Cidr", "*"]:
             raise ApiManagerError("Rule type %s is not supported" % rtype, code=400)
 
         # check value exist or is correct
         if rtype == "SecurityGroup":
-            self.container.get_resource(rval, entity_class=SecurityGroup)
+            rval = self.container.get_simple_resource(rval, entity_class=SecurityGroup).uuid
         elif rtype == "Cidr":
             try:
                 ip, prefix = rval.split("/")
@@ -434,6 +593,7 @@ class SecurityGroup(ComputeProviderResource):
             IPv4Address(ensure_text(ip))
             if prefix < 0 or prefix > 32:
                 raise ApiManagerError("Cidr is malformed. Network prefix must be >= 0 and < 33", code=400)
+        source = "%s:%s" % (rtype, rval)
 
         # convert string protocol in numeric protocol
         protocol, subprotocol = protocol.split(":")
@@ -443,7 +603,7 @@ class SecurityGroup(ComputeProviderResource):
         if subprotocol != "*" and not match("^\d+$", subprotocol):
             subprotocol = str(proto_check.get_number_from_name(subprotocol))
 
-        requested_ports = ports
+        requested_ports = [(0, 65535)]
         if protocol in ["6", "17"]:
             # ports interval
             if match("[0-9]+-[0-9]+", str(ports)):
@@ -456,25 +616,26 @@ class SecurityGroup(ComputeProviderResource):
                     raise ApiManagerError("Start port can be a number between 0 and 65535", code=400)
                 if max < 0 or max > 65535:
                     raise ApiManagerError("End port can be a number between 0 and 65535", code=400)
-                requested_ports = {"from": min, "to": max}
-
-            # single port
-            elif match("[0-9]+", str(ports)):
-                ports = int(ports)
-                if ports < 0 or ports > 65535:
-                    raise ApiManagerError("Port can be a number between 0 and 65535", code=400)
-                requested_ports = ports
+                requested_ports = [(min, max)]
 
             # ports list
-            elif ports.find(",") > 0:
-                requested_ports = ports.split(",")
-                for port in requested_ports:
+            elif str(ports).find(",") > 0:
+                requested_ports = []
+                for port in ports.split(","):
                     try:
                         port = int(port)
-                        if port < 0 or port > 65535:
-                            raise ApiManagerError("Port can be a number between 0 and 65535", code=400)
                     except:
                         raise ApiManagerError("Port can be a number between 0 and 65535", code=400)
+                    if port < 0 or port > 65535:
+                        raise ApiManagerError("Port can be a number between 0 and 65535", code=400)
+                    requested_ports.append((port, port))
+
+            # single port
+            elif match("[0-9]+", str(ports)):
+                ports = int(ports)
+                if ports < 0 or ports > 65535:
+                    raise ApiManagerError("Port can be a number between 0 and 65535", code=400)
+                requested_ports = [(ports, ports)]
 
             # all ports
             elif ports != "*":
@@ -513,93 +674,44 @@ class SecurityGroup(ComputeProviderResource):
                 code=400,
             )
 
-        # create available acl_list set
-        # acl_list = [
-        #  '*|*-tcp',
-        #  '*|*-tcp',
-        #  '*|*-tcp',
-        # ]
-        # acl_list_with_ports = [
-        #  '*|*-tcp', '80',
-        #  '*|*-tcp', '4000-5000',
-        #  '*|*-tcp', '28,67',
-        # ]
-        acl_list = []
-        acl_list_with_ports = []
-        for acl in self.get_acls():
-            acl_item = acl.get_source() + "|" + acl.get_proto()
-            acl_list.append(acl_item)
-
-            for port in acl.get_ports().split(","):
-                acl_list_with_ports.append([acl_item, port])
-
-        self.logger.debug2("Available acl_list set: %s" % acl_list)
-        self.logger.debug2("Available acl_list with ports: %s" % acl_list_with_ports)
-
-        # requested acl set for source=*:*, proto=tcp:*, ports=80
-        # [
-        #  '*|*-tcp',  valid because permits the exact acl
-        #  '*|*-*',    valid because permits all the protocols
-        #  '*|*-*',    valid because permits all the protocols and ports
-        # ]
-        self.logger.debug2("Request acl source: %s" % source)
-        self.logger.debug2("Request acl protocol: %s:%s" % (protocol, subprotocol))
-        self.logger.debug2("Request acl ports: %s" % requested_ports)
-
-        # source
-        source_list = []
-        source_list.append("*:*")
-        if source != "*:*":
-            source_list.append(source)
-
-        # protocol
-        protocol_list = []
-        for item in source_list:
-            protocol_list.append(item + "|" + "*:*")
-        if protocol != "*:*":
-            proto = "%s:%s" % (protocol, subprotocol)
-            for item in source_list:
-                protocol_list.append(item + "|" + proto)
-
-        self.logger.debug2("Requested pre acl set: %s" % protocol_list)
-
-        # check source and protocol
-        acl_intersection = set(acl_list).intersection(set(protocol_list))
-        self.logger.debug2("Available acl set: %s" % acl_intersection)
-
-        resp = False
-        if len(acl_intersection) > 0:
-            # get acl_list with ports
-            acl_list_with_ports = filter(lambda x: x[0] in acl_intersection, acl_list_with_ports)
-            self.logger.debug2("Available acl set with ports: %s" % acl_list_with_ports)
-            acl_ports_index = [item[1] for item in acl_list_with_ports]
-            self.logger.debug2("Available acl ports: %s" % acl_ports_index)
-
-            # ports is an interval 4001-4002
-            if isinstance(requested_ports, dict) is True:
-                for port in acl_ports_index:
-                    from_to_ports = port.split("-")
-                    if len(from_to_ports) == 2:
-                        if requested_ports["from"] >= int(from_to_ports[0]) and requested_ports["to"] <= int(
-                            from_to_ports[1]
-                        ):
-                            resp = True
-
-            # ports is list of ports
-            elif isinstance(requested_ports, list) is True:
-                resp = len(set(acl_ports_index).intersection(set(requested_ports))) == len(requested_ports)
-
-            # ports is a single port
-            elif isinstance(requested_ports, int) is True:
-                resp = str(requested_ports) in acl_ports_index
+        return source, "%s:%s" % (protocol, subprotocol), requested_ports
 
-            # all ports
-            elif requested_ports == "*":
-                resp = str(requested_ports) in acl_ports_index
+    def has_acl(self, source, protocol, ports, where=None):
+        """Check security group acl. Required acl is permitted by the available acls with source *:* or the same
+        source and with protocol *:* or the same protocol, when the union of their port ranges covers the required
+        ports.
 
+        :param source: acl source. Can be *:*, Cidr:<>, Sg:<>
+        :param protocol: acl protocol. Can be *:*, 7:*, 9:0 or tcp:*
+        :param ports: comma separated list of ports, single port or ports interval
+        :param where: acl where [optional]
+        :return: True if security group available acls map required acl
+        """
+        req_source, req_proto, req_ports = self.__parse_acl_request(source, protocol, ports)
+        self.logger.debug2("Request acl: %s %s %s" % (req_source, req_proto, req_ports))
+
+        resp = self.get_acl_matcher().match(req_source, req_proto, req_ports)
         self.logger.debug("Check security group %s acls map acl %s: %s" % (self.uuid, (source, protocol, ports), resp))
         return resp
 
+    def has_acls(self, acls):
+        """Check a list of required acls against the security group acls. Acls are matched like in has_acl
+
+        :param acls: list of required acl. Syntax [{'source':.., 'protocol':.., 'ports':..}]
+        :return: list of {'source':.., 'protocol':.., 'ports':.., 'check':True|False}
+        """
+        matcher = self.get_acl_matcher()
+        resp = []
+        for acl in acls:
+            source = acl.get("source", "*:*")
+            protocol = acl.get("protocol", "*:*")
+            ports = acl.get("ports", "*")
+            req_source, req_proto, req_ports = self.__parse_acl_request(source, protocol, ports)
+            check = matcher.match(req_source, req_proto, req_ports)
+            resp.append({"source": source, "protocol": protocol, "ports": ports, "check": check})
+        self.logger.debug("Check security group %s acls map acls: %s" % (self.uuid, truncate(resp)))
+        return resp
+
     def add_acl(self, acl_id):
         """Add acl to security group
 
@@ -626,6 +738,7 @@ class SecurityGroup(ComputeProviderResource):
             end_resource=acl_id,
             attributes={},
         )
+        self.reset_acl_matcher()
 
         self.logger.debug("Add security group %s acl %s" % (self.uuid, resource.uuid))
         return resource.uuid
@@ -647,6 +760,7 @@ class SecurityGroup(ComputeProviderResource):
         )
 
         self.del_link(acl_id)
+        self.reset_acl_matcher()
 
         self.logger.debug("Delete security group %s acl %s" % (self.uuid, resource.uuid))
         return resource.uuid
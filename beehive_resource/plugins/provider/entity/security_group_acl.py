@@ -34,6 +34,11 @@ class SecurityGroupAcl(ComputeProviderResource):
     def __init__(self, *args, **kvargs):
         ComputeProviderResource.__init__(self, *args, **kvargs)
 
+    def clean_cache(self):
+        """Clean cache. Acl matchers of the security groups are rebuilt with the new acls"""
+        ComputeProviderResource.clean_cache(self)
+        SecurityGroup.update_acl_version(self.controller)
+
     def is_default(self):
         return self.get_attribs("is_default")
 
@@ -6,9 +6,10 @@
 from datetime import datetime
 from random import randint
 from beecell.simple import format_date, id_gen
+from beecell.types.type_dict import dict_get
 from beedrones.ontapp.volume import OntapVolume
 from beehive.common.apimanager import ApiManagerError
-from beehive_resource.plugins.ontap import OntapNetappContainer
+from beehive_resource.plugins.ontap.controller import OntapNetappContainer
 from beehive_resource.plugins.ontap.entity.volume import OntapNetappVolume
 from beehive_resource.plugins.openstack.entity.ops_share import OpenstackShare
 from beehive_resource.plugins.provider.entity.aggregate import ComputeProviderResource
@@ -74,6 +75,29 @@ class ComputeFileShareV2(ComputeProviderResource):
             info["vpcs"].append({"uuid": vpc.uuid, "name": vpc.name})
         return info
 
+    def __get_physical_share_info(self, info):
+        volume = self.physical_share
+        if isinstance(volume, OntapNetappVolume) is False or volume.ext_obj is None:
+            return info
+
+        capacity = {}
+        for field in ["size", "used", "available"]:
+            value = dict_get(volume.ext_obj, "space.%s" % field)
+            if value is not None:
+                value = round(value / 1073741824, 3)
+            capacity[field] = value
+        relationships = volume.snapmirror_list
+        info["details"].update(
+            {
+                "capacity": capacity,
+                "replication": {
+                    "protected": volume.has_snapmirror(),
+                    "relationships": None if relationships is None else len(relationships),
+                },
+            }
+        )
+        return info
+
     def info(self):
         """Get infos.
 
@@ -99,6 +123,7 @@ class ComputeFileShareV2(ComputeProviderResource):
                 "ontap_volume": self.get_attribs(key="ontap_volume"),  # TODO check
             }
         )
+        info = self.__get_physical_share_info(info)
         return info
 
     def detail(self):
@@ -126,6 +151,7 @@ class ComputeFileShareV2(ComputeProviderResource):
                 "netapp_volume": self.get_attribs(key="netapp_volume"),  # TODO check
             }
         )
+        info = self.__get_physical_share_info(info)
         return info
 
     # def check(self):
@@ -177,7 +203,7 @@ class ComputeFileShareV2(ComputeProviderResource):
             zone_insts_ids.extend([item.oid for item in items])
 
         controller.logger.debug2("Get zone instance physical share")
-        objdefs = [OpenstackShare.objdef]
+        objdefs = [OpenstackShare.objdef, OntapNetappVolume.objdef]
         remote_servers = controller.get_directed_linked_resources_internal(
             resources=zone_insts_ids,
             link_type="relation",
@@ -3,6 +3,9 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from collections import OrderedDict
+from copy import deepcopy
+from hashlib import sha1
 from beecell.db import QueryError
 from beecell.types.type_dict import dict_get, dict_set
 from beecell.simple import get_value
@@ -19,6 +22,67 @@ from beehive_resource.plugins.vsphere.entity.vs_dvs import VsphereDvs
 from beehive_resource.model import Resource as ModelResource, ResourceState
 
 
+class SiteTopology(object):
+    """Site orchestrators parsed once and indexed by id, tag and type. A topology is built for a given version of
+    the site model and shared by the site and all its children in the same process.
+
+    :param site_id: site id
+    :param version: site model version
+    :param orchestrators: site orchestrators attribute
+    """
+
+    def __init__(self, site_id, version, orchestrators):
+        self.site_id = site_id
+        self.version = version
+        self.orchestrators = []
+        self.by_id = {}
+        self.by_tag = {}
+        self.by_type = {}
+
+        for item in deepcopy(orchestrators):
+            if item["type"] == "vsphere":
+                clusters = dict_get(item, "config.clusters")
+                dict_set(item, "config.physical_network", clusters)
+            self.orchestrators.append(item)
+            self.by_id[str(item["id"])] = item
+            self.by_tag.setdefault(item.get("tag"), []).append(item)
+            self.by_type.setdefault(item["type"], []).append(item)
+
+    def select(self, select_types, items=None):
+        """Select orchestrators by type
+
+        :param select_types: list of types to use as filter
+        :param items: orchestrators to filter [default=all the orchestrators]
+        :return: list of orchestrators. Items are deep copied so caller can change them.
+        """
+        if items is None:
+            items = self.orchestrators
+        return [deepcopy(item) for item in items if item["type"] in select_types]
+
+    def get_by_id(self, oid, select_types):
+        """Get orchestrator by id
+
+        :param oid: orchestrator id
+        :param select_types: list of types to use as filter
+        :return: orchestrator or None if it does not exist. Orchestrator is deep copied so caller can change it.
+        """
+        item = self.by_id.get(str(oid), None)
+        if item is None or item["type"] not in select_types:
+            return None
+        return deepcopy(item)
+
+    def get_by_tag(self, tag, select_types, index_field="id"):
+        """Get orchestrators by tag
+
+        :param tag: orchestrator tag
+        :param select_types: list of types to use as filter
+        :param index_field: index field. Use this field to index orchestrator
+        :return: dict of orchestrators
+        """
+        items = self.select(select_types, items=self.by_tag.get(tag, []))
+        return {str(item[index_field]): item for item in items}
+
+
 class Site(LocalProviderResource):
     """Provider site"""
 
@@ -28,6 +92,10 @@ class Site(LocalProviderResource):
     objdesc = "Provider site"
     task_path = "beehive_resource.plugins.provider.task_v2.site.SiteTask."
 
+    # site topologies shared in the process. Indexed by site id. Least recently used are removed over max_topologies
+    topologies = OrderedDict()
+    max_topologies = 100
+
     # update orchestrator type when add a new plugin
     available_orchestrator_types = [
         "vsphere",
@@ -209,6 +277,34 @@ class Site(LocalProviderResource):
         zone = self.attribs.get("zone", "")
         return zone
 
+    def get_topology(self):
+        """Get site topology. Topology is built once for every version of the site model. Version is the hash of the
+        site attribute.
+
+        :return: SiteTopology instance
+        """
+        version = None
+        if self.model is not None:
+            version = sha1(str(self.model.attribute or "").encode("utf-8")).hexdigest()
+        topology = Site.topologies.get(self.oid, None)
+        if topology is None or version is None or topology.version != version:
+            topology = SiteTopology(self.oid, version, self.attribs.get("orchestrators", []))
+            if version is None:
+                return topology
+            Site.topologies[self.oid] = topology
+        Site.topologies.move_to_end(self.oid)
+        while len(Site.topologies) > Site.max_topologies:
+            Site.topologies.popitem(last=False)
+        return topology
+
+    @staticmethod
+    def invalidate_topology(site_id):
+        """Remove site topology from the shared topologies
+
+        :param site_id: site id
+        """
+        Site.topologies.pop(site_id, None)
+
     def __get_orchestrators(self, select_types=None):
         """Get physical orchestrators
 
@@ -218,18 +314,7 @@ class Site(LocalProviderResource):
         if select_types is None:
             select_types = ["vsphere", "openstack"]
 
-        orchestrators = self.attribs.get("orchestrators", [])
-        # self.logger.debug('+++++ __get_orchestrators select_types: %s' % (select_types))
-        resp = []
-        for os in orchestrators:
-            os_type = os["type"]
-            # self.logger.debug('+++++ __get_orchestrators os_type: %s' % (os_type))
-            if os_type == "vsphere":
-                # physical_networks = []
-                clusters = dict_get(os, "config.clusters")
-                dict_set(os, "config.physical_network", clusters)
-            if os_type in select_types:
-                resp.append(os)
+        resp = self.get_topology().select(select_types)
         self.logger.debug("available orchestrators: %s" % resp)
         return resp
 
@@ -251,9 +336,11 @@ class Site(LocalProviderResource):
         :param oid: orchestrator id
         :return: orchestrator info or None if it does not exist
         """
-        os = {str(c["id"]): c for c in self.__get_orchestrators(select_types=select_types)}
-        self.logger.debug("Active orchestrator of site %s: %s" % (self.oid, os))
-        return os.get(str(oid), None)
+        if select_types is None:
+            select_types = ["vsphere", "openstack"]
+        orchestrator = self.get_topology().get_by_id(oid, select_types)
+        self.logger.debug("Active orchestrator %s of site %s: %s" % (oid, self.oid, orchestrator))
+        return orchestrator
 
     def get_orchestrators_by_tag(self, tag, index_field="id", select_types=None):
         """Get physical orchestrators by tag
@@ -263,14 +350,10 @@ class Site(LocalProviderResource):
         :return: extended params
         :raise ApiManagerError:
         """
-        # select containers where create server and twins
-        # self.logger.debug('+++++ tag %s' % (tag))
         self.logger.debug("select_types %s" % (select_types))
-        orchestrator_idx = {}
-        for v in self.__get_orchestrators(select_types=select_types):
-            # self.logger.debug('+++++ v[tag] %s' % (v['tag']))
-            if v["tag"] == tag:
-                orchestrator_idx[str(v[index_field])] = v
+        if select_types is None:
+            select_types = ["vsphere", "openstack"]
+        orchestrator_idx = self.get_topology().get_by_tag(tag, select_types, index_field=index_field)
 
         if len(orchestrator_idx.values()) == 0:
             raise OrchestratorError(
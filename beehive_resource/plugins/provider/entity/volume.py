@@ -5,7 +5,7 @@
 
 from random import randint
 from datetime import datetime
-from beecell.simple import format_date, id_gen, truncate
+from beecell.simple import format_date, id_gen
 from beehive.common.apimanager import ApiManagerError
 from beehive.common.data import operation
 from beehive.common.task_v2 import prepare_or_run_task
@@ -91,7 +91,12 @@ class ComputeVolume(ComputeProviderResource):
             return self.flavor.small_info()
         return None
 
-    def get_flavor(self):
+    def get_flavor(self, flavor_idx=None):
+        """Get volume flavor from the physical volume type
+
+        :param flavor_idx: dict used to share flavors among volumes. Key is the physical flavor id [optional]
+        :return: flavor or None
+        """
         if self.flavor is not None:
             return self.flavor
         physical_volume = self.physical_volume
@@ -103,7 +108,12 @@ class ComputeVolume(ComputeProviderResource):
             if physical_flavor is None:
                 self.logger.warn("Get flavor fail for volume {physical_volume}, physical flavor does not exist")
                 return None
-            self.flavor = self.container.get_aggregated_resource_from_physical_resource(physical_flavor.oid)
+            if flavor_idx is not None and physical_flavor.oid in flavor_idx:
+                self.flavor = flavor_idx[physical_flavor.oid]
+            else:
+                self.flavor = self.container.get_aggregated_resource_from_physical_resource(physical_flavor.oid)
+                if flavor_idx is not None:
+                    flavor_idx[physical_flavor.oid] = self.flavor
         except:
             self.logger.warn("Get flavor fail", exc_info=True)
             self.flavor = None
@@ -262,45 +272,31 @@ class ComputeVolume(ComputeProviderResource):
             resource_idx[e.oid] = e
             resource_ids.append(e.oid)
 
-        # get main availability zones
-        zone_idx = controller.index_resources_by_id(entity_class=Site)
-
-        for entity in entities:
-            if entity.availability_zone_id is not None:
-                entity.availability_zone = zone_idx.get(entity.availability_zone_id)
-        controller.logger.debug2("Get compute instance availability zones")
-
-        # get main zone instance
-        res = controller.get_directed_linked_resources_internal(
-            resources=resource_ids, link_type="relation%", run_customize=False
-        )
-        controller.logger.debug2("Get compute instance main zone instance")
-
-        # get physical servers list
-        zone_insts_ids = []
-        for items in res.values():
-            zone_insts_ids.extend([item.oid for item in items])
-
-        controller.logger.debug2("Get zone volume physical volume")
+        # get zone volumes, physical volumes, availability zones and instances
         objdefs = [VsphereVolume.objdef, OpenstackVolume.objdef]
-        remote_volumes = controller.get_directed_linked_resources_internal(
-            resources=zone_insts_ids,
-            link_type="relation",
-            objdefs=objdefs,
-            run_customize=True,
-            customize_func="customize_list",
-        )
-        for resource, zone_insts in res.items():
+        linked = controller.get_aggregated_linked_resources_internal(resource_ids, objdefs, Site.objdef)
+        controller.logger.debug2("Get compute volume linked resources")
+
+        for resource, sites in linked["site"].items():
+            entity = resource_idx[resource]
+            if entity.availability_zone_id is None:
+                continue
+            for site in sites:
+                if str(entity.availability_zone_id) in [str(site.oid), site.uuid]:
+                    entity.availability_zone = site
+
+        for resource, zone_insts in linked["zone"].items():
             for zone_inst in zone_insts:
                 if zone_inst.get_attribs().get("main", False) is True:
-                    physical_volumes = remote_volumes.get(zone_inst.oid, [])
+                    physical_volumes = linked["physical"].get(zone_inst.oid, [])
                     resource_idx[resource].main_zone_instance = zone_inst
                     if len(physical_volumes) > 0 and physical_volumes[0] is not None:
                         resource_idx[resource].physical_volume = physical_volumes[0]
 
-        # get flavor
+        # get flavor. Volumes with the same physical flavor share the flavor
+        flavor_idx = {}
         for entity in entities:
-            entity.get_flavor()
+            entity.get_flavor(flavor_idx=flavor_idx)
 
         # # get other linked entitites
         # linked = controller.get_directed_linked_resources_internal(resources=resource_ids, link_type='flavor')
@@ -313,10 +309,7 @@ class ComputeVolume(ComputeProviderResource):
         #             res.flavor = entity
 
         # get linked instances
-        linked2 = controller.get_indirected_linked_resources_internal(resources=resource_ids)
-        controller.logger.debug2("Get compute volume indirect linked entities: %s" % truncate(linked2))
-
-        for resource, enitities in linked2.items():
+        for resource, enitities in linked["indirect"].items():
             res = resource_idx[resource]
             for entity in enitities:
                 if isinstance(entity, ComputeInstance):
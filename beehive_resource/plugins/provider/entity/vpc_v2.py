@@ -3,7 +3,9 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from ipaddress import ip_network
+from collections import OrderedDict
+from ipaddress import ip_network, ip_address
+from beecell.types.type_id import id_gen
 from beecell.types.type_string import truncate
 from beehive.common.apimanager import ApiManagerError
 from beehive.common.data import trace
@@ -459,6 +461,170 @@ class Vpc(ComputeProviderResource):
         return res
 
 
+class IpPoolAllocation(object):
+    """Allocated addresses of a subnet ip pool. Addresses are stored in a redis bitmap where bit n is the address
+    network + n, so check and reservation of an address are a single atomic redis command. The bitmap is loaded from
+    the orchestrator allocation list when missing or expired.
+
+    :param controller: resource controller
+    :param pool_id: orchestrator ip pool id. It is the nsx ip pool id for vsphere and the OpenstackSubnet id for
+        openstack
+    :param cidr: subnet cidr
+    :param orchestrator_type: orchestrator type like openstack, vsphere [default=vsphere]
+    """
+
+    prefix = "network.ippool"
+    ttl = 600
+
+    def __init__(self, controller, pool_id, cidr, orchestrator_type="vsphere"):
+        self.controller = controller
+        self.redis = controller.redis_cache
+        self.orchestrator_type = orchestrator_type
+        self.pool_id = pool_id
+        self.network = ip_network(cidr)
+        self.key = "%s.%s" % (self.prefix, pool_id)
+        self.sync_key = "%s.sync" % self.key
+
+    @staticmethod
+    def from_subnet(controller, subnet, orchestrator_type="vsphere"):
+        """Get ip pool allocation of a network subnet
+
+        :param controller: resource controller
+        :param subnet: subnet config like {'cidr':.., 'vsphere_id':.., 'openstack_id':..}
+        :param orchestrator_type: orchestrator type like openstack, vsphere [default=vsphere]
+        :return: IpPoolAllocation instance
+        """
+        pool_id = subnet.get("%s_id" % orchestrator_type)
+        if pool_id is None:
+            raise ApiManagerError("Subnet %s has no %s ip pool" % (subnet.get("cidr"), orchestrator_type))
+        return IpPoolAllocation(controller, pool_id, subnet.get("cidr"), orchestrator_type=orchestrator_type)
+
+    def __offset(self, ip):
+        address = ip_address(ip)
+        if address not in self.network:
+            raise ApiManagerError("Ip address %s is not in subnet %s" % (ip, self.network))
+        return int(address) - int(self.network.network_address)
+
+    @staticmethod
+    def from_pool(controller, pool_id):
+        """Get ip pool allocation from the pool id. Subnet cidr is the one saved when the bitmap was loaded
+
+        :param controller: resource controller
+        :param pool_id: orchestrator ip pool id
+        :return: IpPoolAllocation instance or None if bitmap is not loaded
+        """
+        cidr = controller.redis_cache.get("%s.%s.sync" % (IpPoolAllocation.prefix, pool_id))
+        if cidr is None:
+            return None
+        if isinstance(cidr, bytes):
+            cidr = cidr.decode("utf-8")
+        return IpPoolAllocation(controller, pool_id, cidr)
+
+    def is_synced(self):
+        """Check bitmap is loaded
+
+        :return: True if bitmap is loaded
+        """
+        return self.redis.exists(self.sync_key) == 1
+
+    def sync(self, allocated_ips):
+        """Load bitmap with the orchestrator allocation list. Addresses reserved while the list was read are kept:
+        the new bits are merged with the current bitmap in the same transaction.
+
+        :param allocated_ips: list of allocated ip address
+        """
+        tmp_key = "%s:%s" % (self.key, id_gen())
+        pipe = self.redis.pipeline(transaction=True)
+        for ip in allocated_ips:
+            if isinstance(ip, dict):
+                ip = ip.get("ipAddress")
+            if ip is None or ip_address(ip) not in self.network:
+                continue
+            pipe.setbit(tmp_key, self.__offset(ip), 1)
+        pipe.bitop("OR", self.key, self.key, tmp_key)
+        pipe.delete(tmp_key)
+        pipe.set(self.sync_key, str(self.network), ex=self.ttl)
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def get_orchestrator_allocations(self, container=None):
+        """Read the allocated addresses of the pool from the orchestrator. For vsphere they are the nsx ip pool
+        allocations, for openstack the fixed ips of the neutron ports in the subnet.
+
+        Neutron ports are listed by network, that is the narrowest filter of the port list used by the repository.
+        Fixed ips of all the subnets of the network are grouped by subnet and cached for ttl, so the pools of the
+        other subnets of the network do not list the ports again.
+
+        :param container: vsphere container. Openstack container is the one of the subnet [optional]
+        :return: list of ip address
+        """
+        if self.orchestrator_type == "vsphere":
+            if container is None:
+                raise ApiManagerError("Vsphere container is required to read ip pool %s" % self.pool_id)
+            allocations = container.conn.network.nsx.ippool.allocations(self.pool_id)
+            return [item.get("ipAddress") if isinstance(item, dict) else item for item in allocations]
+
+        if self.orchestrator_type == "openstack":
+            from beehive_resource.plugins.openstack.entity.ops_subnet import OpenstackSubnet
+
+            subnet = self.controller.get_simple_resource(self.pool_id, entity_class=OpenstackSubnet)
+            network = self.controller.get_simple_resource(subnet.parent_id)
+            cache_key = "%s.openstack.%s" % (self.prefix, network.ext_id)
+            fixed_ips = self.controller.cache.get(cache_key)
+            if fixed_ips is None:
+                container = self.controller.get_container(subnet.container_id)
+                fixed_ips = {}
+                for port in container.conn.network.port.list(network=network.ext_id):
+                    for fixed_ip in port.get("fixed_ips", []):
+                        fixed_ips.setdefault(fixed_ip.get("subnet_id"), []).append(fixed_ip.get("ip_address"))
+                self.controller.cache.set(cache_key, fixed_ips, ttl=self.ttl)
+            return fixed_ips.get(subnet.ext_id, [])
+
+        raise ApiManagerError("Ip pool of orchestrator %s is not supported" % self.orchestrator_type)
+
+    def load(self, container=None):
+        """Load bitmap from the orchestrator when it is missing or expired. Check and load run under the pool lock,
+        so concurrent callers read the orchestrator once.
+
+        :param container: vsphere container. Openstack container is the one of the subnet [optional]
+        """
+        if self.is_synced() is True:
+            return
+        with self.redis.lock("%s:lock" % self.key, timeout=120, blocking_timeout=120):
+            if self.is_synced() is False:
+                self.sync(self.get_orchestrator_allocations(container=container))
+
+    def is_allocated(self, ip):
+        """Check ip address is allocated
+
+        :param ip: ip address
+        :return: True if ip address is allocated
+        """
+        return self.redis.getbit(self.key, self.__offset(ip)) == 1
+
+    def reserve(self, ip):
+        """Mark ip address as allocated
+
+        :param ip: ip address
+        :return: True if ip address was free, False if it was already allocated
+        """
+        return self.redis.setbit(self.key, self.__offset(ip), 1) == 0
+
+    def release(self, ip):
+        """Mark ip address as free
+
+        :param ip: ip address
+        """
+        self.redis.setbit(self.key, self.__offset(ip), 0)
+
+    def count(self):
+        """Count allocated ip address
+
+        :return: number of allocated ip address
+        """
+        return self.redis.bitcount(self.key)
+
+
 class SiteNetwork(SiteChildResource):
     """Site network. Define external and shared network."""
 
@@ -471,6 +637,8 @@ class SiteNetwork(SiteChildResource):
     def __init__(self, *args, **kvargs):
         SiteChildResource.__init__(self, *args, **kvargs)
 
+        self._subnet_table = None
+
     def info(self):
         """Get infos.
 
@@ -483,29 +651,32 @@ class SiteNetwork(SiteChildResource):
         info["availabilty_zone"] = self.get_parent().small_info()
         return info
 
+    def get_subnet_table(self):
+        """Get network subnets indexed by cidr. Table is built once from configs.subnets and kept aligned by add,
+        update and delete subnet methods.
+
+        :return: OrderedDict {<cidr>: <subnet>}
+        """
+        if self._subnet_table is None:
+            subnets = self.get_attribs(key="configs.subnets", default=[])
+            self._subnet_table = OrderedDict((s.get("cidr"), s) for s in subnets)
+        return self._subnet_table
+
     def get_allocable_subnet(self, cidr=None, orchestrator_type=None):
         """Get network allocable subnet
 
         :param cidr: cidr to check if exists and is allocable [optional]
         :param orchestrator_type: orchestrator type like openstack, vsphere [optional]
         """
-        subnets = self.get_attribs(key="configs.subnets")
+        subnets = self.get_subnet_table()
         allocable_subnet = None
 
         if cidr is not None:
-            for item in subnets:
-                self.logger.debug(
-                    "Get network %s allocable subnet - cidr: %s - subnet cidr: %s" % (self.oid, cidr, item.get("cidr"))
-                )
-                if item.get("cidr") == cidr:
-                    if item.get("allocable", True) is True:
-                        allocable_subnet = item
-                        break
-                    else:
-                        self.logger.debug(
-                            "Get network %s allocable subnet - subnet cidr: %s not allocable"
-                            % (self.oid, item.get("cidr"))
-                        )
+            item = subnets.get(cidr, None)
+            if item is not None and item.get("allocable", True) is True:
+                allocable_subnet = item
+            elif item is not None:
+                self.logger.debug("Get network %s allocable subnet - subnet cidr: %s not allocable" % (self.oid, cidr))
 
             if allocable_subnet is None:
                 raise ApiManagerError("No available subnet found in network %s for cidr %s" % (self.oid, cidr))
@@ -513,9 +684,10 @@ class SiteNetwork(SiteChildResource):
             self.logger.debug("Get network %s allocable subnet for cidr %s: %s" % (self.oid, cidr, allocable_subnet))
 
         else:
-            for item in subnets:
+            for item in reversed(subnets.values()):
                 if item.get("allocable", True) is True:
                     allocable_subnet = item
+                    break
             if allocable_subnet is None:
                 raise ApiManagerError("No available subnet found in network %s " % self.oid)
 
@@ -525,9 +697,8 @@ class SiteNetwork(SiteChildResource):
 
     def get_non_allocable_subnets(self):
         """Get network not allocable subnets"""
-        subnets = self.get_attribs(key="configs.subnets")
         not_allocable_subnets = []
-        for item in subnets:
+        for item in self.get_subnet_table().values():
             if item.get("allocable", False) is False:
                 not_allocable_subnets.append(item)
 
@@ -536,10 +707,37 @@ class SiteNetwork(SiteChildResource):
 
     def get_subnets(self):
         """Get network subnets"""
-        subnets = self.get_attribs(key="configs.subnets")
+        subnets = list(self.get_subnet_table().values())
         self.logger.debug("Get network %s subnets: %s" % (self.uuid, truncate(subnets)))
         return subnets
 
+    def get_ip_allocation(self, cidr, orchestrator_type="vsphere"):
+        """Get subnet ip pool allocation
+
+        :param cidr: subnet cidr
+        :param orchestrator_type: orchestrator type like openstack, vsphere [default=vsphere]
+        :return: IpPoolAllocation instance
+        """
+        subnet = self.get_subnet_table().get(cidr, None)
+        if subnet is None:
+            raise ApiManagerError("Subnet %s does not exist in network %s" % (cidr, self.oid))
+        return IpPoolAllocation.from_subnet(self.controller, subnet, orchestrator_type=orchestrator_type)
+
+    def __update_subnet_table(self, update):
+        """Apply a change to the subnet table and save it in entity attribs configs. Change is serialized with a
+        redis lock and applied to the subnets read again from db so concurrent changes are not lost.
+
+        :param update: function that receives the subnet table and changes it in place
+        """
+        with self.controller.redis_cache.lock("network.subnets.%s" % self.oid, timeout=60, blocking_timeout=30):
+            current = self.controller.get_simple_resource(self.oid)
+            subnets = current.get_attribs(key="configs.subnets", default=[])
+            self._subnet_table = OrderedDict((s.get("cidr"), s) for s in subnets)
+            update(self._subnet_table)
+            # save the attribs read under lock, so changes of other configs made meanwhile are kept
+            current.set_configs(key="configs.subnets", value=list(self._subnet_table.values()))
+            self.attribs = current.attribs
+
     def add_subnet_in_configs(self, subnet):
         """Add subnet in entity attribs configs
 
@@ -547,13 +745,14 @@ class SiteNetwork(SiteChildResource):
         :return: True
         :raise ApiManagerError:
         """
-        subnets = self.get_attribs(key="configs.subnets")
-        subnets_idx = {s.get("cidr") for s in subnets}
         cidr = subnet.get("cidr")
-        if cidr in subnets_idx:
-            raise ApiManagerError("Subnet %s already exist" % cidr)
-        subnets.append(subnet)
-        self.set_configs(key="configs.subnets", value=subnets)
+
+        def update(subnets):
+            if cidr in subnets:
+                raise ApiManagerError("Subnet %s already exist" % cidr)
+            subnets[cidr] = subnet
+
+        self.__update_subnet_table(update)
         self.logger.debug("Add subnet %s in config" % subnet)
         return True
 
@@ -564,15 +763,11 @@ class SiteNetwork(SiteChildResource):
         :return: True
         :raise ApiManagerError:
         """
-        subnets = self.get_attribs(key="configs.subnets")
-        subnets_idx = {s.get("cidr"): s for s in subnets}
-        cidr = subnet.get("cidr")
-        if cidr not in list(subnets_idx.keys()):
-            subnets.append(subnet)
-        else:
-            subnets_idx[cidr] = subnet
-            subnets = list(subnets_idx.values())
-        self.set_configs(key="configs.subnets", value=subnets)
+
+        def update(subnets):
+            subnets[subnet.get("cidr")] = subnet
+
+        self.__update_subnet_table(update)
         self.logger.debug("Add/Update subnet %s in config" % subnet)
         return True
 
@@ -583,12 +778,11 @@ class SiteNetwork(SiteChildResource):
         :return: True
         :raise ApiManagerError:
         """
-        subnets = self.get_attribs(key="configs.subnets")
-        subnets_idx = {s.get("cidr"): s for s in subnets}
-        cidr = subnet.get("cidr")
-        subnets_idx.pop(cidr)
-        subnets = list(subnets_idx.values())
-        self.set_configs(key="configs.subnets", value=subnets)
+
+        def update(subnets):
+            subnets.pop(subnet.get("cidr"))
+
+        self.__update_subnet_table(update)
         self.logger.debug("Delete subnet %s in config" % subnet)
         return True
 
@@ -1097,6 +1291,16 @@ class PrivateNetwork(AvailabilityZoneChildResource):
         self.logger.debug("Get network %s allocable subnet for cidr %s: %s" % (self.uuid, cidr, allocable_subnet))
         return allocable_subnet
 
+    def get_ip_allocation(self, cidr=None, orchestrator_type="vsphere"):
+        """Get subnet ip pool allocation
+
+        :param cidr: subnet cidr [optional]
+        :param orchestrator_type: orchestrator type like openstack, vsphere [default=vsphere]
+        :return: IpPoolAllocation instance
+        """
+        subnet = self.get_allocable_subnet(cidr, orchestrator_type=orchestrator_type)
+        return IpPoolAllocation.from_subnet(self.controller, subnet, orchestrator_type=orchestrator_type)
+
     def get_vsphere_network(self):
         """Get vsphere NsxLogicalSwitch"""
         res, tot = self.get_linked_resources(link_type_filter="relation", objdef=NsxLogicalSwitch.objdef)
@@ -3,7 +3,9 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from time import time
 from beecell.db import QueryError
 from beecell.types.type_string import truncate
 from beecell.types.type_dict import dict_get
@@ -17,6 +19,8 @@ from beehive_resource.model import Resource as ModelResource
 from beehive_resource.plugins.provider.entity.aggregate import (
     ComputeProviderResource,
     ComputeQuotas,
+    metric_collectors,
+    MetricCollector,
 )
 from beehive_resource.plugins.provider.entity.region import Region
 from beehive_resource.plugins.provider.entity.site import OrchestratorError, Site, SiteChildResource
@@ -42,6 +46,7 @@ class ComputeZone(ComputeProviderResource):
 
     BCK_WORKLOAD_PREFIX = "WRKL-"
     BCK_ID_SEP = "_"
+    backup_query_workers = 8
 
     def __init__(self, *args, **kvargs):
         ComputeProviderResource.__init__(self, *args, **kvargs)
@@ -954,24 +959,80 @@ class ComputeZone(ComputeProviderResource):
         else:
             raise ApiManagerError("resource type %s is not supported in backup operations" % resource_type)
 
+    def __run_backup_queries(self, queries):
+        """Run backup backend queries in a bounded thread pool. Queries must not use the db session, so resources
+        and connections are resolved before.
+
+        :param queries: list of (site, hypervisor, func). func returns a list of items
+        :return: (items, report). report contains for every query site, hypervisor, items count, elapsed time and
+            error if query failed
+        """
+        items = []
+        report = []
+
+        def run(site, hypervisor, func):
+            start = time()
+            try:
+                res, error = func(), None
+            except Exception as ex:
+                self.logger.error("backup query on site %s hypervisor %s error: %s" % (site, hypervisor, ex))
+                res, error = [], str(ex)
+            return res, {
+                "site": site,
+                "hypervisor": hypervisor,
+                "count": len(res),
+                "elapsed": round(time() - start, 3),
+                "error": error,
+            }
+
+        if len(queries) > 0:
+            with ThreadPoolExecutor(max_workers=min(len(queries), self.backup_query_workers)) as executor:
+                futures = [executor.submit(run, *query) for query in queries]
+                for future in futures:
+                    res, query_report = future.result()
+                    items.extend(res)
+                    report.append(query_report)
+        return items, report
+
+    @staticmethod
+    def list_veeam_pages(list_func, *args, page_size=100, **kvargs):
+        """Read all the pages of a veeam list api
+
+        :param list_func: veeam list function. It must accept page and page_size and return data and pagination
+        :param args: list function positional params
+        :param page_size: page size [default=100]
+        :param kvargs: list function filters
+        :return: list of items
+        """
+        res = []
+        page = 1
+        while True:
+            data = list_func(*args, page_size=page_size, page=page, **kvargs)
+            items = data.get("data", [])
+            res.extend(items)
+            total = dict_get(data, "pagination.total")
+            if len(items) < page_size or (total is not None and len(res) >= total):
+                break
+            page += 1
+        return res
+
     @trace(op="use")
     def get_backup_jobs(self, hypervisor_tag="default", hypervisor="openstack"):
-        """get backup job list
+        """get backup job list. Backends of the availability zones are queried in parallel and jobs are sorted by name
 
         :param hypervisor_tag: hypervisor tag default='default'
         :param hypervisor: hypervisor default='openstack'
-        :return: backup jobs list
+        :return: (backup jobs list, query report list)
         :raise ApiManagerError:
         """
         self.verify_permisssions("use")
 
-        jobs = []
+        queries = []
+        report = []
         avzs = self.get_availability_zones()
         for avz in avzs:
             availabilityZone: AvailabilityZone = avz
-            self.logger.debug("+++++ AAA - get_backup_jobs - availabilityZone: %s" % availabilityZone.name)
             site: Site = availabilityZone.get_site()
-            self.logger.debug("+++++ AAA - get_backup_jobs - hypervisor: %s" % hypervisor)
 
             # veeam
             if hypervisor == "all" or hypervisor == "vsphere":
@@ -984,34 +1045,33 @@ class ComputeZone(ComputeProviderResource):
                     zone_name_slitted = self.name.split("-")
                     zone_code = zone_name_slitted[1]
                     job_name_filter = "BCK-%s-*" % zone_code
-                    # job_name_filter = "BCK*" # test all
-                    self.logger.debug("+++++ AAA - get_backup_jobs - job_name_filter: %s" % job_name_filter)
-
-                    veeam_jobs = veeamContainer.conn_veeam.job.list(job_name=job_name_filter, page_size=50)
-                    veeam_jobs_data = veeam_jobs["data"]
-
-                    for veeam_job in veeam_jobs_data:
-                        instances = None
-                        virtualMachines = veeam_job.get("virtualMachines")
-                        includes = dict_get(virtualMachines, "includes")
-                        if includes is not None:
-                            instances = len(includes)
-
-                        # API jobs/state
-                        objectsCount = veeam_job.get("objectsCount")
-                        if objectsCount is not None:
-                            instances = objectsCount
-
-                        job = self.veeam_job_to_job(veeam_job, site)
-                        job.update(
-                            {
-                                "instances": instances,
-                            }
-                        )
-                        jobs.append(job)
+                    self.logger.debug("get backup jobs - site: %s - job_name_filter: %s" % (site.name, job_name_filter))
+
+                    def get_veeam_jobs(conn=veeamContainer.conn_veeam, site=site, job_name_filter=job_name_filter):
+                        jobs = []
+                        for veeam_job in self.list_veeam_pages(conn.job.list, job_name=job_name_filter):
+                            instances = None
+                            virtualMachines = veeam_job.get("virtualMachines")
+                            includes = dict_get(virtualMachines, "includes")
+                            if includes is not None:
+                                instances = len(includes)
+
+                            # API jobs/state
+                            objectsCount = veeam_job.get("objectsCount")
+                            if objectsCount is not None:
+                                instances = objectsCount
+
+                            job = self.veeam_job_to_job(veeam_job, site)
+                            job.update({"instances": instances})
+                            jobs.append(job)
+                        return jobs
+
+                    queries.append((site.name, "vsphere", get_veeam_jobs))
                 except OrchestratorError as oe:
-                    self.logger.error("+++++ error orchestrator veeam")
-                    self.logger.error(oe)  # , exc_info=True)
+                    self.logger.error("get backup jobs - site: %s - veeam orchestrator error: %s" % (site.name, oe))
+                    report.append(
+                        {"site": site.name, "hypervisor": "vsphere", "count": 0, "elapsed": 0, "error": str(oe)}
+                    )
 
             # trilio
             if hypervisor == "all" or hypervisor == "openstack":
@@ -1021,20 +1081,29 @@ class ComputeZone(ComputeProviderResource):
 
                 try:
                     project: OpenstackProject = availabilityZone.get_openstack_project(hypervisor_tag)
-                    workloads = project.get_backup_jobs()
-                    for workload in workloads:
-                        job = self.trilio_workload_to_job(workload, site)
-                        job.update(
-                            {
-                                "instances": len(workload.get("instances")),
-                            }
-                        )
-                        jobs.append(job)
+                    project.verify_permisssions("use")
+                    trilio_conn = project.get_trilio_manager(project.oid)
+
+                    def get_trilio_jobs(trilio_conn=trilio_conn, site=site):
+                        jobs = []
+                        for workload in OpenstackProject.list_backup_jobs(trilio_conn):
+                            job = self.trilio_workload_to_job(workload, site)
+                            job.update({"instances": len(workload.get("instances"))})
+                            jobs.append(job)
+                        return jobs
+
+                    queries.append((site.name, "openstack", get_trilio_jobs))
                 except OrchestratorError as oe:
-                    self.logger.error("+++++ error orchestrator openstack")
-                    self.logger.error(oe)  # , exc_info=True)
+                    self.logger.error("get backup jobs - site: %s - openstack orchestrator error: %s" % (site.name, oe))
+                    report.append(
+                        {"site": site.name, "hypervisor": "openstack", "count": 0, "elapsed": 0, "error": str(oe)}
+                    )
 
-        return jobs
+        jobs, query_report = self.__run_backup_queries(queries)
+        report.extend(query_report)
+        jobs.sort(key=lambda job: (job.get("name") or "", job.get("site") or ""))
+        self.logger.debug("get compute zone %s backup jobs: %s" % (self.oid, report))
+        return jobs, report
 
     @trace(op="use")
     def get_backup_job(self, job_id: str, hypervisor_tag="default", resource_type=None):
@@ -1543,36 +1612,38 @@ class ComputeZone(ComputeProviderResource):
                 restore_point_total = 1
 
             else:
+                # read all the restore points of all the job backups, then get the requested page
                 veeam_backup = veeamManager.backup.list(job_id)
-                veeam_backup_data = veeam_backup["data"]
-                for backup in veeam_backup_data:
+                queries = []
+                for backup in veeam_backup["data"]:
                     backup_id = backup["id"]
-                    self.logger.debug("+++++ AAA - get_backup_restore_points - backup_id: %s" % backup_id)
-
-                    page = page + 1
+                    self.logger.debug("get backup restore points - backup_id: %s" % backup_id)
 
-                    from beedrones.veeam.restore_point import VeeamRestorePoint
+                    def get_restore_points(backup_id=backup_id):
+                        return [
+                            {
+                                "id": restore_point.get("id"),
+                                "name": restore_point.get("name"),
+                                "desc": "-",
+                                "created": restore_point.get("creationTime"),
+                                "type": "-",
+                                "status": "-",
+                                "hypervisor": hypervisor,
+                                "site": site.name,
+                                "resource_type": resource_type,
+                            }
+                            for restore_point in self.list_veeam_pages(veeamManager.restorepoint.list, backup_id)
+                        ]
 
-                    veeamRestorePoint: VeeamRestorePoint = veeamManager.restorepoint
-                    veeam_restore_point = veeamRestorePoint.list(backup_id, page_size=size, page=page)
-                    veeam_restore_point_data = veeam_restore_point["data"]
-                    veeam_restore_point_pagination = veeam_restore_point["pagination"]
-                    restore_point_total = veeam_restore_point_pagination["total"]
+                    queries.append((site.name, hypervisor, get_restore_points))
 
-                    restore_points = [
-                        {
-                            "id": restore_point.get("id"),
-                            "name": restore_point.get("name"),
-                            "desc": "-",
-                            "created": restore_point.get("creationTime"),
-                            "type": "-",
-                            "status": "-",
-                            "hypervisor": hypervisor,
-                            "site": site.name,
-                            "resource_type": resource_type,
-                        }
-                        for restore_point in veeam_restore_point_data
-                    ]
+                restore_points, report = self.__run_backup_queries(queries)
+                errors = [item["error"] for item in report if item["error"] is not None]
+                if len(errors) > 0:
+                    raise ApiManagerError("veeam restore points query error: %s" % ", ".join(errors))
+                restore_points.sort(key=lambda restore_point: restore_point.get("created") or "", reverse=True)
+                restore_point_total = len(restore_points)
+                restore_points = restore_points[page * size : (page + 1) * size]
 
         if hypervisor == "openstack":
             (
@@ -1745,15 +1816,23 @@ class ComputeZone(ComputeProviderResource):
         ttl = 86400
         zone_metric_vm_bck = 0
 
+        # resources measured in bulk by a registered metric collector
+        from . import gateway, elasticip  # noqa: F401 import modules to register their metric collectors
+
+        collector_objdefs = list(metric_collectors.keys())
+
+        # get all the children in one query
+        all_childs, total = self.container.get_resources(
+            parent_id=self.oid,
+            with_perm_tag=False,
+            size=-1,
+            run_customize=False,
+            type=",".join([entity_class.objdef for entity_class, run_customize in entity_classes] + collector_objdefs),
+        )
+
         for entity_class, run_customize in entity_classes:
             # self.logger.debug('+++++ get_metrics - entity_class: %s' % (entity_class))
-            childs, total = self.container.get_resources(
-                parent_id=self.oid,
-                with_perm_tag=False,
-                size=-1,
-                run_customize=False,
-                type=entity_class.objdef,
-            )
+            childs = [item for item in all_childs if item.objdef == entity_class.objdef]
 
             for item in childs:
                 # if resource quotas must not be calculated bypass resource
@@ -1795,6 +1874,33 @@ class ComputeZone(ComputeProviderResource):
                 #     backup_status = item.get_physical_backup()
                 #     zone_metric_vm_bck += backup_status.get('usage', 0)
 
+        for objdef in collector_objdefs:
+            childs = [
+                item
+                for item in all_childs
+                if item.objdef == objdef and item.has_quotas() is not False and item.state in [2, 3]
+            ]
+
+            # read cached metrics and collect the missing ones with a single collector run
+            missing = []
+            for item in childs:
+                internalkey = "metrics.%s" % item.oid
+                metrics = None
+                if operation.cache is not False:
+                    metrics = self.controller.cache.get(internalkey)
+                if metrics is None or metrics == {} or metrics == []:
+                    missing.append(item)
+                else:
+                    self.controller.cache.expire(internalkey, ttl)
+                    res.append(metrics)
+
+            if len(missing) > 0:
+                collected = metric_collectors[objdef](self.controller).run(missing, zone_id=self.oid)
+                for item in missing:
+                    metrics = collected[item.oid]
+                    self.controller.cache.set("metrics.%s" % item.oid, metrics, ttl=ttl)
+                    res.append(metrics)
+
         # get backup metrics
         # avzs = self.get_availability_zones()
         # for avz in avzs:
@@ -1822,6 +1928,33 @@ class ComputeZone(ComputeProviderResource):
         self.logger.debug("Get compute zone %s metrics: %s" % (self.uuid, truncate(res)))
         return res
 
+    def get_metric_collector_stats(self):
+        """Get the last run of the metric collectors used by get_metrics of this compute zone
+
+        :return: list of dict
+
+            [{
+                "type": "Provider.ComputeZone.ComputeGateway",
+                "elapsed": 0.0124,
+                "resources": 12,
+                "date": "2018-03-04T12:00:34Z"
+            }.. ]
+        """
+        # verify permissions
+        self.verify_permisssions("use")
+
+        from . import gateway, elasticip  # noqa: F401 import modules to register their metric collectors
+
+        stats = MetricCollector.get_stats(self.controller, self.oid)
+        res = []
+        for objdef in sorted(metric_collectors.keys()):
+            item = {"type": objdef, "elapsed": None, "resources": None, "date": None}
+            item.update(stats.get(objdef, {}))
+            res.append(item)
+
+        self.logger.debug("Get compute zone %s metric collector stats: %s" % (self.uuid, res))
+        return res
+
     def delete_metrics_cache(self):
         # verify permissions
         self.verify_permisssions("use")
@@ -1832,6 +1965,7 @@ class ComputeZone(ComputeProviderResource):
         from .stack_v2 import ComputeStackV2
         from .share import ComputeFileShare
         from .volume import ComputeVolume
+        from . import gateway, elasticip  # noqa: F401 import modules to register their metric collectors
 
         entity_classes = [
             (ComputeInstance, True),
@@ -1841,22 +1975,23 @@ class ComputeZone(ComputeProviderResource):
             (ComputeVolume, False),
         ]
 
-        for entity_class, run_customize in entity_classes:
-            childs, total = self.container.get_resources(
-                parent_id=self.oid,
-                with_perm_tag=False,
-                size=-1,
-                run_customize=False,
-                type=entity_class.objdef,
-            )
+        childs, total = self.container.get_resources(
+            parent_id=self.oid,
+            with_perm_tag=False,
+            size=-1,
+            run_customize=False,
+            type=",".join(
+                [entity_class.objdef for entity_class, run_customize in entity_classes] + list(metric_collectors.keys())
+            ),
+        )
 
-            for item in childs:
-                from beehive_resource.container import Resource
+        from beehive_resource.container import Resource
 
-                resource: Resource = item
-                internalkey = "metrics.%s" % item.oid
-                self.controller.cache.delete(internalkey)
-                self.logger.debug("delete_metrics_cache per resource %s - %s" % (resource.oid, resource.name))
+        for item in childs:
+            resource: Resource = item
+            internalkey = "metrics.%s" % item.oid
+            self.controller.cache.delete(internalkey)
+            self.logger.debug("delete_metrics_cache per resource %s - %s" % (resource.oid, resource.name))
 
     #
     # childs
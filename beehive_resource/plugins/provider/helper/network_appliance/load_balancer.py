@@ -10,7 +10,7 @@ from beehive.common.apimanager import ApiManagerError
 from beehive_resource.plugins.provider.entity.gateway import ComputeGateway
 from beehive_resource.plugins.provider.helper.network_appliance import AbstractProviderNetworkApplianceHelper
 from beehive_resource.plugins.vsphere.entity.nsx_edge import NsxEdge
-from beehive_resource.plugins.provider.entity.vpc_v2 import SiteNetwork
+from beehive_resource.plugins.provider.entity.vpc_v2 import SiteNetwork, IpPoolAllocation
 
 
 class VsphereNsxEdgeFirewallRuleTemplate(object):
@@ -157,11 +157,11 @@ class ProviderVsphereHelper(AbstractProviderNetworkApplianceHelper):
         self.edge.post_get()
 
     def __get_ippool(self, site_id, site_network_id=None, gateway_id=None):
-        """Get ip pool ext id
+        """Get ip pool allocation
 
         :param gateway_id: internet gateway id
         :param site_id: site id
-        :return: ip pool ext id
+        :return: IpPoolAllocation instance
         """
         site_network: SiteNetwork = None
         if gateway_id is not None:
@@ -184,18 +184,13 @@ class ProviderVsphereHelper(AbstractProviderNetworkApplianceHelper):
         if site_network is None:
             raise Exception("Ip pool not found")
 
-        # get network subnets
-        subnets = site_network.get_attribs(key="configs.subnets", default=[])
-
         # get allocable subnet
-        subnets = [subnet for subnet in subnets if subnet.get("allocable") is True]
+        subnets = [subnet for subnet in site_network.get_subnets() if subnet.get("allocable") is True]
         if len(subnets) != 1:
             raise ApiManagerError("Ip pool not found")
-        subnet = subnets[0]
 
         # get ip pool
-        ippool_id = subnet.get("vsphere_id")
-        return ippool_id
+        return site_network.get_ip_allocation(subnets[0].get("cidr"), orchestrator_type="vsphere")
 
     def reserve_ip_address(self, site_id, site_network_id, gateway_id, static_ip):
         """Allocate an IP address for the load balancer
@@ -207,14 +202,23 @@ class ProviderVsphereHelper(AbstractProviderNetworkApplianceHelper):
         :return: dict with reserved ip address and other info
         """
         # get ip pool
-        ippool_id = self.__get_ippool(site_id, site_network_id=site_network_id, gateway_id=gateway_id)
+        ippool = self.__get_ippool(site_id, site_network_id=site_network_id, gateway_id=gateway_id)
+        ippool_id = ippool.pool_id
 
         # allocate ip address
         conn = self.container.conn
-        allocated_ips = conn.network.nsx.ippool.allocations(ippool_id)
-        if static_ip is not None and static_ip in allocated_ips:
-            raise ApiManagerError("Ip address %s specified by user is already allocated" % static_ip)
-        new_ip = conn.network.nsx.ippool.allocate(ippool_id, static_ip=static_ip)
+        if static_ip is not None:
+            ippool.load(container=self.container)
+            if ippool.reserve(static_ip) is False:
+                raise ApiManagerError("Ip address %s specified by user is already allocated" % static_ip)
+        try:
+            new_ip = conn.network.nsx.ippool.allocate(ippool_id, static_ip=static_ip)
+        except Exception:
+            if static_ip is not None:
+                ippool.release(static_ip)
+            raise
+        if static_ip is None and ippool.is_synced() is True:
+            ippool.reserve(new_ip.get("ipAddress"))
 
         return {
             "ip": new_ip.get("ipAddress"),
@@ -232,6 +236,9 @@ class ProviderVsphereHelper(AbstractProviderNetworkApplianceHelper):
         :return:
         """
         self.container.conn.network.nsx.ippool.release(ip_pool, ip_addr)
+        ippool = IpPoolAllocation.from_pool(self.controller, ip_pool)
+        if ippool is not None:
+            ippool.release(ip_addr)
         self.logger.info("Release ip address %s from ip pool %s" % (ip_addr, ip_pool))
 
     @staticmethod
@@ -57,74 +57,12 @@ class AppliedComputeCustomizationTask(AbstractProviderResourceTask):
         site_id = site.oid
         abstractResourceTask.progress(step_id, msg="Get resources")
 
-        # get instances
-        compute_instance = None
-        hosts = []
-        for instance in instances:
-            # obj = task.get_simple_resource(instance['id'])
-            # per caricare anche l'image della resource per check os
-            from beehive_resource.plugins.provider.entity.instance import (
-                ComputeInstance,
-            )
+        # get instances inventory
+        from beehive_resource.plugins.provider.entity.instance import ComputeInstance
 
-            compute_instance: ComputeInstance = abstractResourceTask.get_resource(instance["id"])
-            zone_objs, total = compute_instance.get_linked_resources(
-                link_type_filter="relation.%s" % compute_instance.availability_zone_id
-            )
-            obj_availability_zone_id = zone_objs[0].parent_id
-            # credential = obj.get_credential()
-            if obj_availability_zone_id == availability_zone_id:
-                inst_extra_vars = instance.get("extra_vars")
-
-                ssh_creds = compute_instance.get_real_admin_credential()
-
-                if compute_instance.is_windows() is True:
-                    inst_extra_vars.update(
-                        {
-                            # vedi https://docs.ansible.com/ansible/latest/os_guide/windows_winrm.html
-                            # "ansible_user": obj.get_real_admin_user(),
-                            "ansible_connection": "winrm",
-                            "ansible_winrm_server_cert_validation": "ignore",
-                            # "ansible_port": "5985", # default https 5986
-                            # "ansible_winrm_scheme": "http", # https by default
-                            # "ansible_winrm_transport": "basic", # default kerberos, basic
-                        }
-                    )
-
-                    from beehive_resource.plugins.provider.entity.bastion import ComputeBastion
-                    from beehive_resource.plugins.provider.entity.zone import ComputeZone
-
-                    computeZone: ComputeZone = compute_instance.get_parent()
-                    bastion_host: ComputeBastion = computeZone.get_bastion_host()
-                    if bastion_host is not None:
-                        raise Exception("Ansible connection with winrm is not supported through bastion")
-
-                else:
-                    inst_extra_vars.update(
-                        {
-                            # "ansible_user": compute_instance.get_real_admin_user(),
-                            "ansible_user": ssh_creds["username"],
-                            # 'ansible_password': credential.get('password'),
-                            "ansible_port": compute_instance.get_real_ssh_port(),
-                            # 'ansible_host': obj.get_ip_address(),
-                            # 'ansible_pipelining': True,
-                            "ansible_connection": "ssh",
-                            "ansible_ssh_common_args": "-o UserKnownHostsFile=/dev/null -o StrictHostKeyChecking=no",
-                        }
-                    )
-                    # add data per account private
-                    inst_extra_vars = compute_instance.set_ansible_ssh_common_args(inst_extra_vars)
-
-                # get instance ip address
-                ip_address = compute_instance.get_real_ip_address()
-                # vpc_links, total = obj.get_links(type='vpc')
-                # ip_address = vpc_links[0].attribs.get('fixed_ip', {}).get('ip', '')
-                hosts.append(
-                    {
-                        "ip_addr": ip_address,
-                        "extra_vars": ";".join(["%s:%s" % (k, v) for k, v in inst_extra_vars.items()]),
-                    }
-                )
+        hosts, ssh_creds = ComputeInstance.get_ansible_inventory(
+            abstractResourceTask.controller, instances, availability_zone_id, site_id
+        )
 
         # if obj is not None:
         #     credential = obj.get_credential()
@@ -7,7 +7,7 @@ from logging import getLogger
 from time import sleep
 
 from beecell.simple import random_password
-from beehive_resource.plugins.provider.entity.bastion import ComputeBastion
+from beehive_resource.plugins.provider.entity.bastion import BastionContext, ComputeBastion
 from beehive.common.task_v2 import task_step, run_sync_task
 from beehive_resource.plugins.provider.entity.rule import ComputeRule
 from beehive_resource.plugins.provider.entity.security_group import SecurityGroup
@@ -28,6 +28,25 @@ class ComputeBastionTask(AbstractProviderResourceTask):
     def __init__(self, *args, **kwargs):
         super(ComputeBastionTask, self).__init__(*args, **kwargs)
 
+    @staticmethod
+    def get_gateway(task, provider, context, compute_zone_id):
+        """Get compute zone default gateway from bastion context. Search it in compute zone when context has no gateway
+
+        :param task: parent celery task
+        :param provider: provider container
+        :param context: BastionContext
+        :param compute_zone_id: compute zone id
+        :return: ComputeGateway instance
+        """
+        if context.gateway is not None:
+            gw = task.get_simple_resource(context.gateway)
+            gw.set_container(provider)
+        else:
+            compute_zone = task.get_simple_resource(compute_zone_id)
+            compute_zone.set_container(provider)
+            gw = compute_zone.get_default_gateway()
+        return gw
+
     @staticmethod
     @task_step()
     def link_compute_bastion_step(task, step_id, params, *args, **kvargs):
@@ -91,6 +110,7 @@ class ComputeBastionTask(AbstractProviderResourceTask):
 
         # add SgBastionHost01 to bastion security group
         params["security_groups"].append(sg_id)
+        params.setdefault("bastion_context", {})["security_group"] = sg_id
 
         # wait task complete
         run_sync_task(prepared_task, task, step_id)
@@ -135,17 +155,16 @@ class ComputeBastionTask(AbstractProviderResourceTask):
         oid = params.get("id")
         cid = params.get("cid")
         compute_zone_id = params.get("parent")
-        nat_data = dict_get(params, "attribute.nat")
+        context = BastionContext.load(params.get("bastion_context"))
+        nat_data = context.nat or dict_get(params, "attribute.nat")
         acls = params.get("acl", [])
 
         resource = task.get_simple_resource(oid)
         provider = task.get_container(cid)
-        compute_zone = task.get_simple_resource(compute_zone_id)
-        compute_zone.set_container(provider)
         task.progress(step_id, msg="get resource %s" % oid)
 
         # get nat ipaddress and port
-        gw = compute_zone.get_default_gateway()
+        gw = ComputeBastionTask.get_gateway(task, provider, context, compute_zone_id)
         nat_ip_address = nat_data.get("ip_address")
         nat_port = nat_data.get("port")
 
@@ -195,7 +214,9 @@ class ComputeBastionTask(AbstractProviderResourceTask):
         resource = task.get_resource(oid)
         task.progress(step_id, msg="get resource %s" % oid)
 
-        prepared_task, code = resource.action("install_zabbix_proxy", sync=True)
+        prepared_task, code = resource.action(
+            "install_zabbix_proxy", bastion_context=params.get("bastion_context"), sync=True
+        )
         run_sync_task(prepared_task, task, step_id)
         task.progress(step_id, msg="install zabbix proxy on gateway %s" % oid)
 
@@ -312,7 +333,13 @@ class ComputeBastionTask(AbstractProviderResourceTask):
         provider = task.get_container(cid)
         task.progress(step_id, msg="get resource %s" % oid)
 
-        sg_bastion = resource.get_bastion_security_group()
+        context = BastionContext.load(params.get("bastion_context"))
+        if params.get("bastion_context") is None:
+            sg_bastion = resource.get_bastion_security_group()
+        elif context.security_group is not None:
+            sg_bastion = task.get_simple_resource(context.security_group)
+        else:
+            sg_bastion = None
         if sg_bastion is not None:
             rules = sg_bastion.get_rules()
 
@@ -353,13 +380,12 @@ class ComputeBastionTask(AbstractProviderResourceTask):
 
         resource: ComputeBastion = task.get_simple_resource(oid)
         provider = task.get_container(cid)
-        compute_zone = resource.get_parent()
-        compute_zone.set_container(provider)
+        context = BastionContext.load(params.get("bastion_context"))
         task.progress(step_id, msg="get resource %s" % oid)
 
         # get nat ipaddress and port
-        nat_data = resource.get_attribs(key="nat")
-        gw = compute_zone.get_default_gateway()
+        nat_data = context.nat or resource.get_attribs(key="nat")
+        gw = ComputeBastionTask.get_gateway(task, provider, context, resource.parent_id)
         nat_ip_address = nat_data.get("ip_address")
         nat_port = nat_data.get("port")
 
@@ -703,8 +703,13 @@ class GatewayTask(AbstractProviderResourceTask):
         compute_gateway: ComputeGateway = task.get_simple_resource(oid)
         task.progress(step_id, msg="get compute_gateway %s" % oid)
 
-        compute_gateway.unset_default_internet_route(role=compute_gateway.get_default_role())
-        compute_gateway.set_default_internet_route(role=role)
+        # build route plan once for unset and set
+        plan = None
+        if compute_gateway.get_hypervisor() == "vsphere":
+            plan = compute_gateway.get_route_plan()
+
+        compute_gateway.unset_default_internet_route(role=compute_gateway.get_default_role(), plan=plan)
+        compute_gateway.set_default_internet_route(role=role, plan=plan)
         task.progress(step_id, msg="set default gateway %s route for role %s" % (oid, role))
 
         return oid, params
@@ -62,6 +62,7 @@ class SiteTask(AbstractProviderResourceTask):
         attribute = resource.get_attribs()
         attribute["orchestrators"].append(data)
         resource.update_internal(attribute=attribute)
+        Site.invalidate_topology(resource.oid)
         task.progress(step_id, msg="Update resource %s" % site_id)
 
         return orchestrator_id, params
@@ -102,6 +103,7 @@ class SiteTask(AbstractProviderResourceTask):
         attribute = resource.get_attribs()
         attribute["orchestrators"] = list(orchestrators.values())
         resource.update_internal(attribute=attribute)
+        Site.invalidate_topology(resource.oid)
         task.progress(
             step_id,
             msg="Delete orchestrator %s from site %s" % (orchestrator_id, site_id),
@@ -611,19 +611,7 @@ class GetComputeZoneMetrics(ProviderComputeZone):
         return {"compute_zone": resource_metrics}
 
     def getResourcetree(self, controller, parent_oid):
-        resources = []
-        childrens = []
-        try:
-            childrens, total = controller.get_resources(parent_id=parent_oid)
-        except Exception:
-            self.logger.debug("Children none for %s" % parent_oid)
-
-        for r in childrens:
-            self.logger.debug("Children  %s" % r)
-            resources.append(r)
-            resources = resources + self.getResourcetree(controller, r.oid)
-
-        return resources
+        return controller.get_resource_descendants_internal(parent_oid, entities=True)
 
     def generate_metrics(self):
         metric_type_nums = [1, 2, 3, 7]  # Numeric type
@@ -653,6 +641,38 @@ class GetComputeZoneMetrics(ProviderComputeZone):
         return metrics
 
 
+class GetComputeZoneMetricCollectorStatsItemResponseSchema(Schema):
+    type = fields.String(required=True, example="Provider.ComputeZone.ComputeGateway", description="resource type")
+    elapsed = fields.Float(required=True, example=0.0124, allow_none=True, description="last run time in seconds")
+    resources = fields.Integer(required=True, example=12, allow_none=True, description="resources of the last run")
+    date = fields.String(required=True, example="1990-12-31T23:59:59Z", allow_none=True, description="last run date")
+
+
+class GetComputeZoneMetricCollectorStatsResponseSchema(Schema):
+    metric_collectors = fields.Nested(
+        GetComputeZoneMetricCollectorStatsItemResponseSchema, required=True, many=True, allow_none=True
+    )
+
+
+class GetComputeZoneMetricCollectorStats(ProviderComputeZone):
+    definitions = {
+        "GetComputeZoneMetricCollectorStatsResponseSchema": GetComputeZoneMetricCollectorStatsResponseSchema,
+    }
+    parameters = SwaggerHelper().get_parameters(GetApiObjectRequestSchema)
+    responses = SwaggerApiView.setResponses(
+        {200: {"description": "success", "schema": GetComputeZoneMetricCollectorStatsResponseSchema}}
+    )
+
+    def get(self, controller, data, oid, *args, **kwargs):
+        """
+        Get compute_zone metric collectors
+        Get last run time of the metric collectors used by compute zone metrics
+        """
+        compute_zone: ComputeZone = self.get_resource_reference(controller, oid)
+        res = compute_zone.get_metric_collector_stats()
+        return {"metric_collectors": res}
+
+
 class DeleteComputeZoneMetricsCache(ProviderComputeZone):
     tags = ["resource"]
     definitions = {
@@ -743,6 +763,14 @@ class GetComputeZoneBackupJobsItemResponseSchema(Schema):
     schedule = fields.Dict(required=True, example="job1", description="job schedule")
 
 
+class GetComputeZoneBackupJobsZoneResponseSchema(Schema):
+    site = fields.String(required=True, example="site1", description="availability zone name")
+    hypervisor = fields.String(required=True, example="openstack", description="hypervisor like openstack or vsphere")
+    count = fields.Int(required=True, example=1, description="number of jobs read")
+    elapsed = fields.Float(required=True, example=0.5, description="query elapsed time in seconds")
+    error = fields.String(required=True, allow_none=True, example=None, description="query error")
+
+
 class GetComputeZoneBackupJobsResponseSchema(Schema):
     jobs = fields.Nested(
         GetComputeZoneBackupJobsItemResponseSchema,
@@ -750,6 +778,12 @@ class GetComputeZoneBackupJobsResponseSchema(Schema):
         many=True,
         allow_none=True,
     )
+    zones = fields.Nested(
+        GetComputeZoneBackupJobsZoneResponseSchema,
+        required=True,
+        many=True,
+        allow_none=True,
+    )
 
 
 class GetComputeZoneBackupJobsRequestSchema(Schema):
@@ -787,8 +821,8 @@ class GetComputeZoneBackupJobs(ProviderComputeZone):
     def get(self, controller, data, oid, *args, **kwargs):
         hypervisor = dict_get(data, "hypervisor")
         compute_zone: ComputeZone = controller.get_resource(oid)
-        resp = compute_zone.get_backup_jobs(hypervisor=hypervisor)
-        return {"jobs": resp}
+        jobs, zones = compute_zone.get_backup_jobs(hypervisor=hypervisor)
+        return {"jobs": jobs, "zones": zones}
 
 
 class GetComputeZoneBackupJobItemResponseSchema(GetComputeZoneBackupJobsItemResponseSchema):
@@ -1348,6 +1382,12 @@ class ComputeZoneAPI(ProviderAPI):
             ("%s/compute_zones/<oid>/manage" % base, "POST", AddManage, {}),
             ("%s/compute_zones/<oid>/manage" % base, "DELETE", DeleteManage, {}),
             ("%s/compute_zones/<oid>/metrics" % base, "GET", GetComputeZoneMetrics, {}),
+            (
+                "%s/compute_zones/<oid>/metrics/collectors" % base,
+                "GET",
+                GetComputeZoneMetricCollectorStats,
+                {},
+            ),
             (
                 "%s/compute_zones/<oid>/metrics/cache" % base,
                 "DELETE",
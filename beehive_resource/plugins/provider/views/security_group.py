@@ -310,7 +310,10 @@ class HasSecurityGroupAcl(ProviderSecurityGroup):
     def get(self, controller, data, oid, *args, **kwargs):
         """
         Check security group acl
-        Check security group acl
+        Check security group acl. Required acl is permitted when it is contained in the available acls: a Cidr
+        source is permitted by an acl with a Cidr that contains it (10.0.0.0/8 permits 10.1.0.0/16), a protocol
+        with subprotocol by an acl with the same protocol and any subprotocol (1:* permits 1:8) and ports when the
+        port ranges of the matching acls cover them.
         """
         resource = self.get_resource_reference(controller, oid, run_customize=False)
         data["source"] = data.get("source").replace("SecurityGroup", "Sg")
@@ -318,6 +321,65 @@ class HasSecurityGroupAcl(ProviderSecurityGroup):
         return {"security_group_acl_check": res}
 
 
+class CheckSecurityGroupAclParamRequestSchema(Schema):
+    source = fields.String(
+        required=False,
+        example="*:*",
+        missing="*:*",
+        description="acl source. Can be *:*, Cidr:<>, SecurityGroup:<>",
+    )
+    protocol = fields.String(
+        required=False,
+        example="*:*",
+        missing="*:*",
+        description="acl protocol. Can be *:*, 7:*, 9:0 or tcp:*",
+    )
+    ports = fields.String(
+        required=False,
+        example="*",
+        missing="*",
+        description="Comma separated acl ports (80,8000), single port (80) or port interval " "(4001-4002). * for all",
+    )
+
+
+class CheckSecurityGroupAclsRequestSchema(Schema):
+    security_group_acls = fields.Nested(CheckSecurityGroupAclParamRequestSchema, many=True, required=True)
+
+
+class CheckSecurityGroupAclsBodyRequestSchema(GetApiObjectRequestSchema):
+    body = fields.Nested(CheckSecurityGroupAclsRequestSchema, context="body")
+
+
+class CheckSecurityGroupAclsParamResponseSchema(CheckSecurityGroupAclParamRequestSchema):
+    check = fields.Boolean(required=True)
+
+
+class CheckSecurityGroupAclsResponseSchema(Schema):
+    security_group_acl_checks = fields.Nested(CheckSecurityGroupAclsParamResponseSchema, many=True, required=True)
+
+
+class CheckSecurityGroupAcls(ProviderSecurityGroup):
+    definitions = {
+        "CheckSecurityGroupAclsRequestSchema": CheckSecurityGroupAclsRequestSchema,
+        "CheckSecurityGroupAclsResponseSchema": CheckSecurityGroupAclsResponseSchema,
+    }
+    parameters = SwaggerHelper().get_parameters(CheckSecurityGroupAclsBodyRequestSchema)
+    parameters_schema = CheckSecurityGroupAclsRequestSchema
+    responses = SwaggerApiView.setResponses(
+        {200: {"description": "success", "schema": CheckSecurityGroupAclsResponseSchema}}
+    )
+
+    def post(self, controller, data, oid, *args, **kwargs):
+        """
+        Check a list of security group acls
+        Check a list of security group acls. Every acl is checked like in GET acls/check: Cidr sources are matched
+        by containment, protocols with subprotocol by acls with any subprotocol and ports by port range coverage.
+        """
+        resource = self.get_resource_reference(controller, oid, run_customize=False)
+        res = resource.has_acls(data.get("security_group_acls"))
+        return {"security_group_acl_checks": res}
+
+
 #
 # zabbix
 #
@@ -410,6 +472,12 @@ class SecurityGroupProviderAPI(ProviderAPI):
                 HasSecurityGroupAcl,
                 {},
             ),
+            (
+                "%s/security_groups/<oid>/acls/check" % base,
+                "POST",
+                CheckSecurityGroupAcls,
+                {},
+            ),
             ("%s/security_groups/<oid>/acls" % base, "POST", AddSecurityGroupAcl, {}),
             ("%s/security_groups/<oid>/acls" % base, "DELETE", DelSecurityGroupAcl, {}),
         ]
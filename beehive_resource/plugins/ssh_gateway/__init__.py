@@ -3,18 +3,10 @@
 # (C) Copyright 2018-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from beehive_resource.plugins.ssh_gateway.controller import SshGatewayContainer
+from beehive_resource.plugins import ResourcePlugin
 
 
-class SshGatewayPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = SshGatewayContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = []
-        self.module.set_apis(apis)
-        self.module.add_container(SshGatewayContainer.objdef, SshGatewayContainer)
+class SshGatewayPlugin(ResourcePlugin):
+    name = "ssh_gateway"
+    container_class = "beehive_resource.plugins.ssh_gateway.controller.SshGatewayContainer"
+    api_classes = []
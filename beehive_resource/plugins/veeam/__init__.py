@@ -3,20 +3,12 @@
 # (C) Copyright 2020-2022 Regione Piemonte
 # (C) Copyright 2018-2024 CSI-Piemonte
 
-from beehive_resource.plugins.veeam.controller import VeeamContainer
-from beehive_resource.plugins.veeam.views.veeam_job import VeeamJobAPI
+from beehive_resource.plugins import ResourcePlugin
 
 
-class VeeamPlugin(object):
-    def __init__(self, module):
-        self.module = module
-
-    def init(self):
-        service = VeeamContainer(self.module.get_controller())
-        service.init_object()
-
-    def register(self):
-        apis = [VeeamJobAPI]
-        self.module.set_apis(apis)
-
-        self.module.add_container(VeeamContainer.objdef, VeeamContainer)
+class VeeamPlugin(ResourcePlugin):
+    name = "veeam"
+    container_class = "beehive_resource.plugins.veeam.controller.VeeamContainer"
+    api_classes = [
+        "beehive_resource.plugins.veeam.views.veeam_job.VeeamJobAPI",
+    ]
@@ -4,7 +4,6 @@
 # (C) Copyright 2018-2024 CSI-Piemonte
 
 import json
-from time import sleep
 from datetime import datetime
 from beedrones.veeam.client_veeam import VeeamManager, VeeamError
 from beehive.common.apimanager import ApiManagerError
@@ -212,27 +211,3 @@ class VeeamContainer(Orchestrator):
         """ """
         if self.conn_veeam is None:
             pass
-
-    def wait_for_veeam_job(self, job_query_func, job_id, maxtime=600, delta=1, job_error_func=None):
-        job = job_query_func(job_id)
-        status = job["status"]
-        elapsed = 0
-        while status not in ["successful", "failed", "error", "canceled"]:
-            self.logger.debug("wait for veeam job %s" % job_id)
-            job = job_query_func(job_id)
-            status = job["status"]
-            sleep(delta)
-            elapsed += delta
-            if elapsed >= maxtime:
-                raise TimeoutError("veeam job %s query timeout" % job_id)
-        if status in ["failed", "error"]:
-            self.logger.error(job["result_traceback"])
-            err = ""
-            if job_error_func is not None:
-                err = job_error_func()
-            raise ApiManagerError("veeam job %s error: %s" % (job_id, err))
-        elif status == "cancelled":
-            self.logger.error(job["veeam job %s cancelled" % job_id])
-            raise ApiManagerError("veeam job %s cancelled" % job_id)
-        else:
-            self.logger.info("veeam job %s successful" % job_id)
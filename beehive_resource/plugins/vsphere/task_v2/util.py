@@ -23,7 +23,7 @@ class VsphereServerBaseHelper(object):
     """Some vsphere server base helper methods"""
 
     def __init__(self, task, step_id, orchestrator, params, username="root", password=None):
-        from beehive_resource.plugins.vsphere import VsphereContainer
+        from beehive_resource.plugins.vsphere.controller import VsphereContainer
         from beedrones.vsphere.client import VsphereManager
 
         vsphereContainer: VsphereContainer = orchestrator
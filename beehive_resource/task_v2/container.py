@@ -157,6 +157,9 @@ class ResourceContainerTask(BaseTask):
         cid = params.get("cid")
         container = task.get_container(cid)
 
+        # reload ext_id index used to resolve the parents of the discovered entities
+        container.load_extid_index(force=True)
+
         # get resource classes
         resource_types = params.get("types", None)
         new = params.get("new", True)
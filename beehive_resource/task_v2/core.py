@@ -2,6 +2,7 @@
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
 
+from functools import wraps
 import ujson as json
 from celery.utils.log import get_task_logger
 
@@ -11,6 +12,7 @@ from beehive.common.task_v2 import BaseTask, task_step, run_sync_task
 from beehive.common.task_v2.manager import task_manager
 from beehive_resource.container import Resource
 from beehive_resource.model import Resource as ModelResource, ResourceState
+from beehive_resource.util import StepProfiler
 from beecell.simple import jsonDumps
 
 logger = get_task_logger(__name__)
@@ -20,11 +22,35 @@ class ResourceTaskException(Exception):
     pass
 
 
+def profile_step():
+    """use this decorator under task_step to profile a step. Profiling runs only when the task enables it. See
+    AbstractResourceTask.is_profiling.
+    """
+
+    def wrapper(fn):
+        @wraps(fn)
+        def profile_step_decorated(task, step_id, params, *args, **kvargs):
+            if task.is_profiling(params) is False:
+                return fn(task, step_id, params, *args, **kvargs)
+
+            profiler = StepProfiler(task.controller)
+            try:
+                with profiler:
+                    return fn(task, step_id, params, *args, **kvargs)
+            finally:
+                task.save_step_profile(step_id, fn.__name__, profiler.summary(), params)
+
+        return profile_step_decorated
+
+    return wrapper
+
+
 class AbstractResourceTask(BaseTask):
     """AbstractResource task"""
 
     name = "resource_task"
     entity_class = Resource
+    profiling = False  #: if True profile the steps decorated with profile_step
 
     def __init__(self, *args, **kwargs):
         super(AbstractResourceTask, self).__init__(*args, **kwargs)
@@ -45,6 +71,28 @@ class AbstractResourceTask(BaseTask):
             return None
         return self._data.get(key, default_value)
 
+    def is_profiling(self, params):
+        """Check step profiling is enabled. Enable it for all the runs of a task with the class attribute profiling or
+        for a single run with the param profile.
+
+        :param params: step params
+        :return: True if step must be profiled
+        """
+        return self.profiling is True or params.get("profile", False) is True
+
+    def save_step_profile(self, step_id, step_name, profile, params):
+        """Save step profile in the step params, that are returned with the step result, in task trace and in the list
+        of the slowest task steps
+
+        :param step_id: step id
+        :param step_name: step name
+        :param profile: profile summary returned by StepProfiler
+        :param params: step params. Profile is added to params.step_profiles with the step name as key
+        """
+        params.setdefault("step_profiles", {})[step_name] = profile
+        self.progress(step_id, msg="Profile step %s: %s" % (step_name, jsonDumps(profile)))
+        self.controller.add_task_step_profile(self.request.id, self.name, step_name, profile)
+
     def is_ext_id_valid(self, ext_id):
         """Validate ext_id"""
         if ext_id is not None and ext_id != "":
@@ -228,6 +276,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def create_resource_pre_step(task, step_id, params, *args, **kvargs):
         """Create resource in beehive - pre step
 
@@ -284,6 +333,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def create_resource_post_step(task: "AbstractResourceTask", step_id, params, *args, **kvargs):
         """Create resource in beehive database - post step
 
@@ -328,6 +378,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def update_resource_pre_step(task, step_id, params, *args, **kvargs):
         """Update resource in beehive database - pre step
 
@@ -370,6 +421,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def update_resource_post_step(task, step_id, params, *args, **kvargs):
         """Update resource in beehive database - post step
 
@@ -403,6 +455,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def patch_resource_pre_step(task, step_id, params, *args, **kvargs):
         """Patch resource in beehive database - pre step
 
@@ -429,6 +482,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def patch_resource_post_step(task, step_id, params, *args, **kvargs):
         """Patch resource in beehive database - post step
 
@@ -459,6 +513,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def expunge_resource_pre_step(task, step_id, params, *args, **kvargs):
         """Hard delete resource from beehive database - pre step
 
@@ -484,6 +539,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def expunge_resource_post_step(task, step_id, params, *args, **kvargs):
         """Hard delete resource from beehive database - post step
 
@@ -508,6 +564,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def action_resource_pre_step(task, step_id, params, *args, **kvargs):
         """Run action on a resource - pre step
 
@@ -540,6 +597,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def action_resource_post_step(task, step_id, params, *args, **kvargs):
         """Run action on a resource - post step
 
@@ -563,6 +621,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def delete_resource_list(task, step_id, params, *args, **kvargs):
         """Remove resource list from beehive database.
 
@@ -586,6 +645,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def delete_resourcelink_list(task, step_id, params, *args, **kvargs):
         """Remove resource link list from beehive database.
 
@@ -608,6 +668,7 @@ class AbstractResourceTask(BaseTask):
 
     @staticmethod
     @task_step()
+    @profile_step()
     def remove_child_step(task, step_id, params, resource_id, *args, **kvargs):
         """Remove compute resource childs.
 
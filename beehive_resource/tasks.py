@@ -6,7 +6,6 @@ from celery.utils.log import get_task_logger
 from beecell.simple import import_func
 from beehive.common.task.job import Job, JobTask, task_local, job_task, job
 from beehive_resource.container import *
-from beehive_resource.plugins.openstack.controller import *
 from beehive.common.task.util import end_task, start_task
 from beecell.simple import jsonDumps
 
@@ -36,6 +35,8 @@ class AbstractResourceTask(object):
         return False
 
     def __get_openstack_connection(self, container, projectid=None):
+        from beedrones.openstack.client import OpenstackError, OpenstackManager
+
         try:
             # get connection params
             conn_params = container.conn_params["api"]
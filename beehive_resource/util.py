@@ -1,10 +1,35 @@
 # SPDX-License-Identifier: EUPL-1.2
 #
 # (C) Copyright 2018-2024 CSI-Piemonte
+from contextvars import ContextVar
 from functools import wraps
 from logging import getLogger
+from time import time
+
+try:
+    from gevent import sleep, spawn
+    from gevent.event import Event
+    from gevent.lock import RLock
+except ImportError:
+    from threading import Event, RLock, Thread
+    from time import sleep
+
+    def spawn(func, *args, **kvargs):
+        thread = Thread(target=func, args=args, kwargs=kvargs, daemon=True)
+        thread.start()
+        return thread
+
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from urllib3.connectionpool import HTTPConnectionPool
+except ImportError:
+    HTTPConnectionPool = None
 
 from beecell.types.type_string import str2bool
+from beehive.common.data import operation
 from beehive_resource.model import ResourceState
 
 logger = getLogger(__name__)
@@ -196,3 +221,499 @@ def expunge_resource():
         return create_expunge_decorated
 
     return wrapper
+
+
+class QueryCounter(object):
+    """Count the sql statements run by a db session and the time spent running them. Use as context manager:
+
+        with QueryCounter(controller.manager.get_session()) as counter:
+            ...
+        counter.count, counter.elapsed
+
+    Pass an engine instead of a session to count also the statements of the sessions opened inside the block.
+
+    :param session: sqlalchemy session or engine. If None nothing is counted
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.count = 0
+        self.elapsed = 0.0
+        self.__starts = []
+
+    def __on_execute(self, orm_execute_state):
+        start = time()
+        try:
+            return orm_execute_state.invoke_statement()
+        finally:
+            self.count += 1
+            self.elapsed += time() - start
+
+    def __on_before_cursor_execute(self, *args, **kvargs):
+        self.__starts.append(time())
+
+    def __on_after_cursor_execute(self, *args, **kvargs):
+        self.count += 1
+        if len(self.__starts) > 0:
+            self.elapsed += time() - self.__starts.pop()
+
+    def __events(self):
+        if isinstance(self.session, Engine):
+            return [
+                ("before_cursor_execute", self.__on_before_cursor_execute),
+                ("after_cursor_execute", self.__on_after_cursor_execute),
+            ]
+        return [("do_orm_execute", self.__on_execute)]
+
+    def __enter__(self):
+        if self.session is not None:
+            for name, func in self.__events():
+                event.listen(self.session, name, func)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.session is not None:
+            for name, func in self.__events():
+                event.remove(self.session, name, func)
+        return False
+
+
+#: profilers of the blocks running in the current greenlet or thread. Every greenlet has its own context
+_step_profilers = ContextVar("step_profilers", default=())
+#: counting hooks installed while profilers are active. {key: [number of profilers, uninstall function]}
+_profile_hooks = {}
+_profile_hooks_lock = RLock()
+
+
+def _get_step_profilers():
+    return _step_profilers.get()
+
+
+def _profile_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if len(_get_step_profilers()) > 0:
+        conn.info.setdefault("step_profile_start", []).append(time())
+
+
+def _profile_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("step_profile_start")
+    if not starts:
+        return
+    elapsed = time() - starts.pop()
+    for profiler in _get_step_profilers():
+        profiler.sql_count += 1
+        profiler.sql_elapsed += elapsed
+
+
+def _profile_method(func, counter):
+    """Wrap a method so that every call is counted by the profilers of the current context. Without profilers the
+    method is called directly.
+
+    :param func: method to wrap
+    :param counter: function that receives profiler, elapsed and the method result
+    :return: wrapped method
+    """
+
+    @wraps(func)
+    def profiled(*args, **kvargs):
+        profilers = _get_step_profilers()
+        if len(profilers) == 0:
+            return func(*args, **kvargs)
+        start = time()
+        res = None
+        try:
+            res = func(*args, **kvargs)
+            return res
+        finally:
+            elapsed = time() - start
+            for profiler in profilers:
+                counter(profiler, elapsed, res)
+
+    return profiled
+
+
+def _count_cache_get(profiler, elapsed, res):
+    profiler.cache_elapsed += elapsed
+    if res is None:
+        profiler.cache_misses += 1
+    else:
+        profiler.cache_hits += 1
+
+
+def _count_http(profiler, elapsed, res):
+    profiler.http_count += 1
+    profiler.http_elapsed += elapsed
+
+
+class ProfiledCache(object):
+    """Cache wrapper set on the controller while a StepProfiler is active. Reads are counted by the profilers of the
+    current context, all the other methods are those of the wrapped cache.
+
+    :param cache: cache instance
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.get = _profile_method(cache.get, _count_cache_get)
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+
+def _install_sql_hook(engine):
+    event.listen(engine, "before_cursor_execute", _profile_before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _profile_after_cursor_execute)
+
+    def uninstall():
+        event.remove(engine, "before_cursor_execute", _profile_before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", _profile_after_cursor_execute)
+
+    return uninstall
+
+
+def _install_cache_hook(controller):
+    cache = controller.cache
+    controller.cache = ProfiledCache(cache)
+
+    def uninstall():
+        controller.cache = cache
+
+    return uninstall
+
+
+def _install_http_hook():
+    # remote platform clients do not expose their http sessions, so an adapter can not be mounted. The connection
+    # pool method is wrapped only while a profiler is active and restored by the last one
+    urlopen = HTTPConnectionPool.urlopen
+    HTTPConnectionPool.urlopen = _profile_method(urlopen, _count_http)
+
+    def uninstall():
+        HTTPConnectionPool.urlopen = urlopen
+
+    return uninstall
+
+
+def _acquire_profile_hook(key, install):
+    with _profile_hooks_lock:
+        item = _profile_hooks.get(key, None)
+        if item is None:
+            item = _profile_hooks[key] = [0, install()]
+        item[0] += 1
+
+
+def _release_profile_hook(key):
+    with _profile_hooks_lock:
+        item = _profile_hooks.get(key, None)
+        if item is None:
+            return
+        item[0] -= 1
+        if item[0] == 0:
+            _profile_hooks.pop(key)
+            item[1]()
+
+
+class StepProfiler(object):
+    """Profile a block of code. Count sql statements, cache reads and outbound http calls and the time spent running
+    them. Use as context manager:
+
+        with StepProfiler(controller) as profiler:
+            ...
+        profiler.summary()
+
+    Counting hooks are installed when the first profiler starts and removed when the last one ends: listeners on the
+    db engine, a ProfiledCache on the controller and a wrapper of the urllib3 connection pool. Counters are kept in
+    the context of the greenlet or thread that runs the block, so calls of other greenlets are not counted. Calls of
+    the greenlets spawned inside the block are not counted either. Profilers can be nested and every one counts the
+    calls of its block.
+
+    :param controller: controller instance
+    :param engine: db engine whose statements are counted [default=engine of the controller session]
+    """
+
+    def __init__(self, controller, engine=None):
+        self.controller = controller
+        self.engine = engine
+        self.start = None
+        self.elapsed = 0.0
+        self.sql_count = 0
+        self.sql_elapsed = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_elapsed = 0.0
+        self.http_count = 0
+        self.http_elapsed = 0.0
+        self.__hooks = []
+        self.__active = False
+
+    def __get_hooks(self):
+        hooks = []
+        engine = self.engine
+        if engine is None:
+            try:
+                engine = self.controller.manager.get_session().get_bind()
+            except Exception:
+                logger.warning("Step profiler can not get db engine, sql statements are not counted", exc_info=True)
+        if engine is not None:
+            hooks.append((("sql", id(engine)), lambda: _install_sql_hook(engine)))
+        if getattr(self.controller, "cache", None) is not None:
+            hooks.append((("cache", id(self.controller)), lambda: _install_cache_hook(self.controller)))
+        if HTTPConnectionPool is not None:
+            hooks.append((("http",), _install_http_hook))
+        return hooks
+
+    def __enter__(self):
+        for key, install in self.__get_hooks():
+            _acquire_profile_hook(key, install)
+            self.__hooks.append(key)
+        self.start = time()
+        self.__active = True
+        _step_profilers.set(_get_step_profilers() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.__active is False:
+            return False
+        self.__active = False
+        # remove only this profiler, so profilers that exit in a different order do not remove the others
+        _step_profilers.set(tuple(p for p in _get_step_profilers() if p is not self))
+        self.elapsed = time() - self.start
+        while len(self.__hooks) > 0:
+            _release_profile_hook(self.__hooks.pop())
+        return False
+
+    def summary(self):
+        """Get profile summary
+
+        :return: {"elapsed": .., "sql": {"count": .., "elapsed": ..}, "cache": {"hits": .., "misses": ..,
+            "elapsed": ..}, "http": {"count": .., "elapsed": ..}}
+        """
+        return {
+            "elapsed": round(self.elapsed, 4),
+            "sql": {"count": self.sql_count, "elapsed": round(self.sql_elapsed, 4)},
+            "cache": {"hits": self.cache_hits, "misses": self.cache_misses, "elapsed": round(self.cache_elapsed, 4)},
+            "http": {"count": self.http_count, "elapsed": round(self.http_elapsed, 4)},
+        }
+
+
+def remote_cache(key, ttl=600, pickling=False, stale_ttl=None, lock_timeout=60):
+    """use this decorator with the static getters that read an entity from a remote platform. Signature of the
+    decorated function must be (controller, postfix, *args, **kvargs). Value is cached with key <key>.<postfix>.
+
+    When the cached value is missing only one caller, across all the api workers, runs the remote query. The others
+    wait for it to finish and read the value it cached.
+
+    When stale_ttl is set the value is kept stale_ttl seconds after ttl expires. In this time window one caller
+    refreshes it while the others get the stale value without waiting.
+
+    Empty values are not cached because the getters return them when the remote query fails.
+
+    The decorated function exposes get_cached(controller, postfix) and set_cached(controller, postfix, value) to
+    read and fill the cache from queries that return many entities at once, and delete_cached(controller, postfix) to
+    drop the value after the entity is changed.
+
+    :param key: cache key prefix
+    :param ttl: cache time to live [default=600]
+    :param pickling: if True use pickle to serialize the value [default=False]
+    :param stale_ttl: seconds a value can be returned after ttl expires [optional]
+    :param lock_timeout: max seconds a caller holds the lock and the others wait for it [default=60]
+    """
+
+    def is_empty(value):
+        return value is None or value == {} or value == []
+
+    def wrapper(fn):
+        @wraps(fn)
+        def remote_cache_decorated(controller, postfix, *args, **kvargs):
+            if operation.cache is False:
+                return fn(controller, postfix, *args, **kvargs)
+
+            cache = controller.cache
+            cache_key = "%s.%s" % (key, postfix)
+            fresh_key = "%s:fresh" % cache_key
+            lock = controller.redis_cache.lock("%s:lock" % cache_key, timeout=lock_timeout, blocking_timeout=0)
+
+            def load():
+                value = fn(controller, postfix, *args, **kvargs)
+                set_cached(controller, postfix, value)
+                return value
+
+            def release():
+                try:
+                    lock.release()
+                except Exception:
+                    logger.warning("Cache lock %s expired before release" % cache_key)
+
+            value = cache.get(cache_key)
+            if is_empty(value) is False:
+                if stale_ttl is None or cache.get(fresh_key) is not None:
+                    return value
+
+                # stale value. Refresh only if no one else is doing it
+                if lock.acquire(blocking=False) is False:
+                    logger.debug("Cache %s is stale, refresh in progress" % cache_key)
+                    return value
+                try:
+                    logger.debug("Cache %s is stale, refresh it" % cache_key)
+                    return load()
+                finally:
+                    release()
+
+            # missing value. First caller queries the remote platform, the others wait for it
+            if lock.acquire(blocking=True, blocking_timeout=lock_timeout) is True:
+                try:
+                    value = cache.get(cache_key)
+                    if is_empty(value) is False:
+                        return value
+                    return load()
+                finally:
+                    release()
+
+            value = cache.get(cache_key)
+            if is_empty(value) is False:
+                return value
+            logger.warning("Cache %s lock wait timed out" % cache_key)
+            return fn(controller, postfix, *args, **kvargs)
+
+        def get_cached(controller, postfix):
+            """Get the cached value without running the remote query. Return None if missing"""
+            if operation.cache is False:
+                return None
+            value = controller.cache.get("%s.%s" % (key, postfix))
+            if is_empty(value) is True:
+                return None
+            return value
+
+        def set_cached(controller, postfix, value):
+            """Cache a value read in bulk from the remote platform"""
+            if operation.cache is False or is_empty(value) is True:
+                return
+            cache_key = "%s.%s" % (key, postfix)
+            if stale_ttl is None:
+                controller.cache.set(cache_key, value, ttl=ttl, pickling=pickling)
+            else:
+                controller.cache.set(cache_key, value, ttl=ttl + stale_ttl, pickling=pickling)
+                controller.cache.set("%s:fresh" % cache_key, True, ttl=ttl)
+
+        def delete_cached(controller, postfix):
+            """Delete the cached value. Next call runs the remote query"""
+            cache_key = "%s.%s" % (key, postfix)
+            controller.cache.delete(cache_key)
+            if stale_ttl is not None:
+                controller.cache.delete("%s:fresh" % cache_key)
+
+        remote_cache_decorated.get_cached = get_cached
+        remote_cache_decorated.set_cached = set_cached
+        remote_cache_decorated.delete_cached = delete_cached
+        return remote_cache_decorated
+
+    return wrapper
+
+
+class RemoteJobWaiter(object):
+    """Wait for jobs running on a remote platform like awx or veeam. All the pending jobs are polled from a single
+    loop, so a task waiting for a job does not query the remote platform and sleeps until the loop wakes it up.
+    Poll interval of every job starts from delta and grows with backoff until max_delta.
+
+    Use the shared instance job_waiter:
+
+        job = job_waiter.wait(conn.job.get, job_id, maxtime=3600, delta=2, name="awx.%s.job" % container.oid)
+
+    The waiter blocks the caller until the job ends or maxtime expires.
+
+    :param max_delta: max seconds between two polls of the same job [default=30]
+    :param backoff: poll interval multiplier [default=1.5]
+    """
+
+    final_status = ["successful", "failed", "error", "canceled"]
+
+    def __init__(self, max_delta=30, backoff=1.5):
+        self.max_delta = max_delta
+        self.backoff = backoff
+        self.jobs = {}
+        self.lock = RLock()
+        self.poller = None
+
+    def __poll(self, key, item):
+        try:
+            item["job"] = item["query_func"](item["job_id"])
+            item["error"] = None
+        except Exception as ex:
+            logger.warning("Poll remote job %s error: %s" % (item["job_id"], ex))
+            item["error"] = ex
+            item["errors"] += 1
+
+        status = None if item["job"] is None else item["job"].get("status")
+        if status in self.final_status or item["errors"] >= 3:
+            with self.lock:
+                self.jobs.pop(key, None)
+            item["event"].set()
+        else:
+            item["delta"] = min(item["delta"] * self.backoff, self.max_delta)
+            item["next_poll"] = time() + item["delta"]
+
+    def __run(self):
+        """Poll loop. Exit when there are no more pending jobs"""
+        while True:
+            with self.lock:
+                if len(self.jobs) == 0:
+                    self.poller = None
+                    return
+                items = list(self.jobs.items())
+
+            now = time()
+            for key, item in items:
+                if item["next_poll"] <= now:
+                    self.__poll(key, item)
+
+            with self.lock:
+                next_poll = min([item["next_poll"] for item in self.jobs.values()], default=now)
+            sleep(max(next_poll - time(), 0.1))
+
+    def wait(self, job_query_func, job_id, maxtime=600, delta=1, name=None):
+        """Wait for a remote job to end. Callers waiting for the same job share the same poll.
+
+        :param job_query_func: function used to get the job. It receives job_id and returns a dict with key status
+        :param job_id: remote job id
+        :param maxtime: max seconds to wait [default=600]
+        :param delta: first poll interval [default=1]
+        :param name: name of the job type, e.g. awx.<container oid>.job. Used with job_id to identify the job
+            [default=qualified name of job_query_func]
+        :return: last job returned by job_query_func
+        :raise TimeoutError: if job does not end in maxtime
+        """
+        if name is None:
+            name = getattr(job_query_func, "__qualname__", repr(job_query_func))
+        key = "%s:%s" % (name, job_id)
+        with self.lock:
+            item = self.jobs.get(key)
+            if item is None:
+                item = {
+                    "query_func": job_query_func,
+                    "job_id": job_id,
+                    "job": None,
+                    "error": None,
+                    "errors": 0,
+                    "delta": delta,
+                    "next_poll": time(),
+                    "event": Event(),
+                    "waiters": 0,
+                }
+                self.jobs[key] = item
+            item["waiters"] += 1
+            if self.poller is None:
+                self.poller = spawn(self.__run)
+
+        logger.debug("Wait for remote job %s" % job_id)
+        ended = item["event"].wait(maxtime)
+        with self.lock:
+            item["waiters"] -= 1
+            # stop polling only when no other caller is waiting for the job
+            if ended is False and item["waiters"] == 0 and self.jobs.get(key) is item:
+                self.jobs.pop(key)
+        if ended is False:
+            raise TimeoutError("remote job %s query timeout" % job_id)
+        if item["error"] is not None:
+            raise item["error"]
+        return item["job"]
+
+
+job_waiter = RemoteJobWaiter()
@@ -105,10 +105,27 @@ class ListResourcesRequestSchema(PaginatedRequestQuerySchema):
         missing=False,
         description="If True show expired resources",
     )
+    cursor = fields.String(
+        context="query",
+        required=False,
+        example="aWQ6MTIz",
+        description="keyset pagination cursor. Use empty value for the first page, then next_cursor of the previous "
+        "page. Resources are ordered by id, page and field are ignored",
+    )
+    with_total = fields.Boolean(
+        context="query",
+        required=False,
+        example=True,
+        missing=True,
+        description="With cursor if False do not count resources and return null as total",
+    )
 
 
 class ListResourcesResponseSchema(PaginatedResponseSchema):
     resources = fields.Nested(ResourceResponseSchema, many=True, required=True, allow_none=True)
+    next_cursor = fields.String(
+        required=False, allow_none=True, example="aWQ6MTIz", description="keyset pagination cursor of the next page"
+    )
 
 
 class ListResources(ResourceApiView):
@@ -129,9 +146,13 @@ class ListResources(ResourceApiView):
         from beehive_resource.controller import ResourceController
 
         resourceController: ResourceController = controller
-        resources, total = resourceController.get_resources(**data)
+        cursor_info = {}
+        resources, total = resourceController.get_resources(cursor_info=cursor_info, **data)
         res = [r.info() for r in resources]
-        return self.format_paginated_response(res, "resources", total, **data)
+        resp = self.format_paginated_response(res, "resources", total, **data)
+        if data.get("cursor", None) is not None:
+            resp["next_cursor"] = cursor_info.get("next_cursor")
+        return resp
 
 
 class ListResourceTypesRequestSchema(Schema):
@@ -180,6 +201,57 @@ class CountResources(ResourceApiView):
         return {"count": int(resp)}
 
 
+class ListTaskStepProfilesRequestSchema(Schema):
+    days = fields.Integer(
+        context="query", required=False, missing=1, validate=Range(min=1, max=7), description="number of days to read"
+    )
+    size = fields.Integer(
+        context="query", required=False, missing=20, validate=Range(min=1, max=1000), description="max number of steps"
+    )
+    task = fields.String(context="query", required=False, example="resource_task", description="task name")
+    step = fields.String(context="query", required=False, example="create_resource_post_step", description="step name")
+
+
+class TaskStepProfileCounterResponseSchema(Schema):
+    count = fields.Integer(required=False, example=10)
+    hits = fields.Integer(required=False, example=10)
+    misses = fields.Integer(required=False, example=2)
+    elapsed = fields.Float(required=True, example=0.23)
+
+
+class TaskStepProfileResponseSchema(Schema):
+    task_id = fields.String(required=True, example="4cdf0ea4-159a-45aa-96f2-708e461130e1")
+    task = fields.String(required=True, example="resource_task")
+    step = fields.String(required=True, example="create_resource_post_step")
+    date = fields.String(required=True, example="1990-12-31T23:59:59Z")
+    elapsed = fields.Float(required=True, example=1.34)
+    sql = fields.Nested(TaskStepProfileCounterResponseSchema, required=True)
+    cache = fields.Nested(TaskStepProfileCounterResponseSchema, required=True)
+    http = fields.Nested(TaskStepProfileCounterResponseSchema, required=True)
+
+
+class ListTaskStepProfilesResponseSchema(Schema):
+    steps = fields.Nested(TaskStepProfileResponseSchema, required=True, many=True, allow_none=True)
+    count = fields.Integer(required=True, example=1)
+
+
+class ListTaskStepProfiles(ResourceApiView):
+    tags = ["resource"]
+    definitions = {
+        "ListTaskStepProfilesRequestSchema": ListTaskStepProfilesRequestSchema,
+        "ListTaskStepProfilesResponseSchema": ListTaskStepProfilesResponseSchema,
+    }
+    parameters = SwaggerHelper().get_parameters(ListTaskStepProfilesRequestSchema)
+    parameters_schema = ListTaskStepProfilesRequestSchema
+    responses = SwaggerApiView.setResponses(
+        {200: {"description": "success", "schema": ListTaskStepProfilesResponseSchema}}
+    )
+
+    def get(self, controller, data, *args, **kwargs):
+        res = controller.get_task_step_profiles(**data)
+        return {"steps": res, "count": len(res)}
+
+
 class GetResourceResponseSchema(Schema):
     resource = fields.Nested(ResourceResponseSchema, required=True, allow_none=True)
 
@@ -864,6 +936,7 @@ class ResourceEntityAPI(ApiView):
             ("%s/entities/clone" % module.base_path, "POST", CloneResource, {}),
             ("%s/entities/count" % module.base_path, "GET", CountResources, {}),
             ("%s/entities/types" % module.base_path, "GET", ListResourceTypes, {}),
+            ("%s/entities/taskprofiles" % module.base_path, "GET", ListTaskStepProfiles, {}),
             ("%s/entities/<oid>" % module.base_path, "GET", GetResource, {}),
             ("%s/entities/<oid>" % module.base_path, "PUT", UpdateResource, {}),
             ("%s/entities/<oid>" % module.base_path, "PATCH", PatchResource, {}),
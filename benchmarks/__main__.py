@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import logging
+from argparse import ArgumentParser
+from sys import argv
+
+import ujson as json
+from beehive_resource import __version__
+from beehive_resource.plugins.provider import LocalProviderPlugin
+from benchmarks.bootstrap import (
+    create_controller,
+    create_dummy_container,
+    create_provider_container,
+    seed_compute_volumes,
+)
+from benchmarks.cases import ResourceBenchmark, benchmark_project_levels, benchmark_compute_volume_list
+
+
+def run(args):
+    controller = create_controller(args.db)
+    container = create_dummy_container(controller)
+    bench = ResourceBenchmark(
+        controller, container, size=args.size, tags=args.tags, repeat=args.repeat, page_size=args.page_size
+    )
+    try:
+        bench.run()
+        return bench.dump(args.output or "benchmark-%s.json" % __version__.strip())
+    finally:
+        bench.clean()
+
+
+def compare(args):
+    return ResourceBenchmark.compare(args.old, args.new, key=args.key)
+
+
+def project_levels(args):
+    return benchmark_project_levels(size=args.size, repeat=args.repeat)
+
+
+def volume_list(args):
+    controller = create_controller(args.db, plugins=[LocalProviderPlugin])
+    container = create_provider_container(controller)
+    seed = seed_compute_volumes(controller, container, args.size)
+    return benchmark_compute_volume_list(controller, parent=seed["compute_zone"], page_sizes=args.page_sizes)
+
+
+def main(params):
+    parser = ArgumentParser(prog="python -m benchmarks", description="beehive resource benchmarks")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log benchmark cases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("run", help="seed a dummy_v2 container and time the resource hot paths")
+    cmd.add_argument("--db", default="sqlite://", help="sqlalchemy database uri [default=sqlite in memory]")
+    cmd.add_argument("--size", type=int, default=100, help="number of resources to seed")
+    cmd.add_argument("--tags", type=int, default=2, help="number of tags of every resource")
+    cmd.add_argument("--repeat", type=int, default=3, help="number of runs of every case")
+    cmd.add_argument("--page-size", type=int, default=20, help="page size of the list cases")
+    cmd.add_argument("--output", help="results file [default=benchmark-<version>.json]")
+    cmd.set_defaults(func=run)
+
+    cmd = commands.add_parser("compare", help="compare two results files")
+    cmd.add_argument("old", help="reference results file")
+    cmd.add_argument("new", help="new results file")
+    cmd.add_argument("--key", default="avg", help="case value to compare")
+    cmd.set_defaults(func=compare)
+
+    cmd = commands.add_parser("project-levels", help="time the openstack project hierarchy sort")
+    cmd.add_argument("--size", type=int, default=50000, help="number of projects")
+    cmd.add_argument("--repeat", type=int, default=3, help="number of runs")
+    cmd.set_defaults(func=project_levels)
+
+    cmd = commands.add_parser("volume-list", help="count the sql statements of the compute volume list")
+    cmd.add_argument("--db", default="sqlite://", help="sqlalchemy database uri [default=sqlite in memory]")
+    cmd.add_argument("--size", type=int, default=100, help="number of compute volumes to seed")
+    cmd.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100], help="page sizes to run")
+    cmd.set_defaults(func=volume_list)
+
+    args = parser.parse_args(params)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    print(json.dumps(args.func(args), indent=2))
+
+
+if __name__ == "__main__":
+    main(argv[1:])
@@ -0,0 +1,246 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import pickle
+from logging import getLogger
+
+try:
+    from fakeredis import FakeRedis
+except ImportError:
+    FakeRedis = None
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from beecell.simple import jsonDumps
+from beecell.types.type_id import id_gen
+from beehive.common.data import operation
+from beehive_resource.model import Base
+from beehive_resource.mod import ResourceModule
+from beehive_resource.plugins.dummy_v2 import DummyPluginV2
+
+logger = getLogger(__name__)
+
+
+class OfflineCache(object):
+    """Cache manager with the api used by the resource module over an in process redis. Values are always pickled.
+
+    :param redis: redis client
+    :param prefix: key prefix [default=cache.]
+    """
+
+    def __init__(self, redis, prefix="cache."):
+        self.redis = redis
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.redis.get(self.prefix + key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=600, pickling=False):
+        self.redis.setex(self.prefix + key, ttl, pickle.dumps(value))
+
+    def expire(self, key, ttl):
+        self.redis.expire(self.prefix + key, ttl)
+
+    def delete(self, key):
+        self.redis.delete(self.prefix + key)
+
+    def get_by_pattern(self, pattern):
+        keys = self.redis.keys(self.prefix + pattern)
+        return [self.get(key.decode("utf-8")[len(self.prefix) :]) for key in keys]
+
+    def delete_by_pattern(self, pattern):
+        for key in self.redis.keys(self.prefix + pattern):
+            self.redis.delete(key)
+
+
+class OfflineApiManager(object):
+    """Api manager with the attributes read by the resource module. There is no flask app, no auth service and no
+    remote platform: database is the one of db_uri and redis runs in process.
+
+    :param db_uri: sqlalchemy database uri
+    :param redis: redis client [default=new FakeRedis]
+    """
+
+    def __init__(self, db_uri, redis=None):
+        if redis is None:
+            if FakeRedis is None:
+                raise ImportError("fakeredis is required to run the benchmarks without a redis server")
+            redis = FakeRedis()
+
+        self.db_uri = db_uri
+        self.engine = create_engine(db_uri)
+        self.db_manager = sessionmaker(bind=self.engine)
+        self.redis_manager = redis
+        self.cache_manager = OfflineCache(redis)
+        self.app = None
+        self.app_name = "beehive-benchmark"
+        self.app_id = "benchmark"
+        self.app_env = "benchmark"
+        self.modules = {}
+        self.stacks_uri = None
+        self.cluster_app_uri = None
+        self.http_proxy = None
+        self.git = {}
+
+    def create_tables(self):
+        """Create resource tables"""
+        Base.metadata.create_all(self.engine)
+
+    def open_session(self):
+        """Open a database session and set it as the session of the current operation
+
+        :return: session
+        """
+        operation.session = self.db_manager()
+        return operation.session
+
+    def close_session(self):
+        """Close the session of the current operation"""
+        if getattr(operation, "session", None) is not None:
+            operation.session.close()
+            operation.session = None
+
+
+def add_resource_types(controller, resource_classes, added=None):
+    """Add the resource types of some resource classes and of all their child classes
+
+    :param controller: resource controller
+    :param resource_classes: resource classes
+    :param added: objdefs already added [optional]
+    :return: set of added objdefs
+    """
+    if added is None:
+        added = set()
+    for resource_class in resource_classes:
+        if resource_class.objdef in added:
+            continue
+        objclass = "%s.%s" % (resource_class.__module__, resource_class.__name__)
+        controller.manager.add_resource_type(resource_class.objdef, objclass)
+        added.add(resource_class.objdef)
+        add_resource_types(controller, resource_class(controller, oid=None).child_classes, added=added)
+    return added
+
+
+def create_controller(db_uri="sqlite://", redis=None, plugins=None):
+    """Create a resource controller that runs without external services. Tables are created in db_uri, the plugins are
+    registered and their container and resource types are added. Authorization is disabled for the current operation.
+
+    Queries that use mysql functions, like the resource tag filter, need a mysql db_uri.
+
+    :param db_uri: sqlalchemy database uri [default=sqlite in memory]
+    :param redis: redis client [default=new FakeRedis]
+    :param plugins: plugin classes to register [default=dummy_v2 plugin]
+    :return: resource controller
+    """
+    if plugins is None:
+        plugins = [DummyPluginV2]
+
+    api_manager = OfflineApiManager(db_uri, redis=redis)
+    api_manager.create_tables()
+    api_manager.open_session()
+    operation.authorize = False
+    operation.cache = True
+    operation.user = ("benchmark", "localhost", None)
+    operation.id = id_gen()
+
+    module = ResourceModule(api_manager)
+    api_manager.modules[module.name] = module
+    for plugin_class in plugins:
+        plugin_class(module).register()
+
+    controller = module.get_controller()
+    manager = controller.manager
+    added = set()
+    for container_class in controller.container_classes.values():
+        objclass = "%s.%s" % (container_class.__module__, container_class.__name__)
+        manager.add_container_type(container_class.category, container_class.objdef, objclass)
+        add_resource_types(controller, container_class(controller).child_classes, added=added)
+
+    logger.info("Create offline resource controller on %s" % db_uri)
+    return controller
+
+
+def create_dummy_container(controller, name=None, remote_size=0):
+    """Add an active dummy_v2 container
+
+    :param controller: resource controller
+    :param name: container name [default=random]
+    :param remote_size: number of entities of the simulated remote platform [default=0]
+    :return: container id
+    """
+    from beehive_resource.plugins.dummy_v2.controller import DummyContainerV2
+
+    manager = controller.manager
+    ctype = manager.get_container_type(value=DummyContainerV2.objdef, category=DummyContainerV2.category)[0]
+    name = name or "bench-%s" % id_gen(length=6)
+    conn = jsonDumps({"test": {"remote_size": remote_size}})
+    model = manager.add_container(id_gen(), name, ctype, conn, desc=name, active=True)
+    return model.id
+
+
+def create_provider_container(controller, name=None):
+    """Add an active local provider container. Provider plugin must be registered by create_controller
+
+    :param controller: resource controller
+    :param name: container name [default=random]
+    :return: container id
+    """
+    from beehive_resource.plugins.provider.controller import LocalProvider
+
+    manager = controller.manager
+    ctype = manager.get_container_type(value=LocalProvider.objdef, category=LocalProvider.category)[0]
+    name = name or "bench-provider-%s" % id_gen(length=6)
+    model = manager.add_container(id_gen(), name, ctype, "{}", desc=name, active=True)
+    return model.id
+
+
+def seed_compute_volumes(controller, container, count):
+    """Add compute volumes to a local provider container without a remote platform. Every volume has a main zone
+    volume in the same availability zone and is attached to a compute instance. There is no physical volume, so
+    volumes have no flavor.
+
+    :param controller: resource controller
+    :param container: local provider container id
+    :param count: number of volumes
+    :return: {"compute_zone": compute zone id, "site": site id, "volumes": list of compute volume ids}
+    """
+    from beehive_resource.plugins.provider.entity.site import Site
+    from beehive_resource.plugins.provider.entity.zone import ComputeZone, AvailabilityZone
+    from beehive_resource.plugins.provider.entity.volume import ComputeVolume, Volume
+    from beehive_resource.plugins.provider.entity.instance import ComputeInstance
+
+    manager = controller.manager
+
+    def add(resource_class, name, parent=None, attribute=None):
+        rtype = manager.get_resource_types(value=resource_class.objdef)[0]
+        return manager.add_resource(
+            objid="%s//%s" % (container, id_gen()),
+            name=name,
+            rtype=rtype,
+            container=container,
+            ext_id=None,
+            attribute=jsonDumps(attribute or {}),
+            parent_id=parent,
+        )
+
+    site = add(Site, "bench-site")
+    avz = add(AvailabilityZone, "bench-avz", parent=site.id)
+    compute_zone = add(ComputeZone, "bench-compute-zone")
+
+    volumes = []
+    for idx in range(count):
+        volume = add(
+            ComputeVolume, "bench-volume-%s" % idx, parent=compute_zone.id, attribute={"availability_zone": site.id}
+        )
+        zone_volume = add(Volume, "bench-zone-volume-%s" % idx, parent=avz.id, attribute={"main": True})
+        instance = add(ComputeInstance, "bench-instance-%s" % idx, parent=compute_zone.id)
+        manager.add_link(id_gen(), "%s-zone-link" % volume.id, "relation.%s" % site.id, volume.id, zone_volume.id, "{}")
+        manager.add_link(id_gen(), "%s-volume-link" % instance.id, "volume.1", instance.id, volume.id, "{}")
+        volumes.append(volume.id)
+
+    logger.info("Seed %s compute volumes in container %s" % (count, container))
+    return {"compute_zone": compute_zone.id, "site": site.id, "volumes": volumes}
@@ -0,0 +1,353 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from logging import getLogger
+from subprocess import check_output
+from sys import executable
+from time import time
+from datetime import datetime
+import ujson as json
+from beecell.types.type_id import id_gen
+from beehive.common.data import operation
+from beehive_resource import __version__, __git_last_commit__
+from beehive_resource.controller import ResourceController
+from beehive_resource.plugins.dummy_v2.entity.dummy_sync import DummySyncResourceV2
+from beehive_resource.util import QueryCounter
+
+logger = getLogger(__name__)
+
+# run in a new process by benchmark_plugin_loading. argv: mode, plugin classes, enabled plugin names
+PLUGIN_LOADING_SCRIPT = """
+import sys
+from time import time
+from resource import getrusage, RUSAGE_SELF
+import ujson as json
+from beecell.simple import import_class
+
+start = time()
+mode, plugin_classes, enabled = sys.argv[1], sys.argv[2].split(","), sys.argv[3].split(",")
+for plugin_class in plugin_classes:
+    plugin = import_class(plugin_class)
+    if mode == "full" or plugin.name in enabled:
+        for item in [plugin.container_class] + plugin.api_classes:
+            import_class(item)
+print(json.dumps({"elapsed": round(time() - start, 4), "maxrss": getrusage(RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def benchmark_plugin_loading(plugin_classes, enabled, repeat=3):
+    """Compare start time and resident memory of a process that loads all the plugins with a process that loads only
+    the enabled ones. Every run is a new python process so module cache does not affect results.
+
+    :param plugin_classes: dotted paths of the plugin classes configured in the api manager
+    :param enabled: names of the enabled plugins
+    :param repeat: number of runs of every mode [default=3]
+    :return: {"full": {"elapsed": .., "maxrss": ..}, "lazy": {"elapsed": .., "maxrss": ..}}. elapsed is in seconds,
+        maxrss in KB. Values are the minimum of the runs
+    """
+    res = {}
+    for mode in ["full", "lazy"]:
+        runs = []
+        for idx in range(repeat):
+            output = check_output(
+                [executable, "-c", PLUGIN_LOADING_SCRIPT, mode, ",".join(plugin_classes), ",".join(enabled)]
+            )
+            runs.append(json.loads(output.decode("utf-8").strip().split("\n")[-1]))
+        res[mode] = {
+            "elapsed": min(r["elapsed"] for r in runs),
+            "maxrss": min(r["maxrss"] for r in runs),
+        }
+        logger.info("Plugin loading %s: %s" % (mode, res[mode]))
+    return res
+
+
+def benchmark_project_levels(size=50000, fanout=3, repeat=3):
+    """Time the openstack project hierarchy sort used by project discover on a synthetic tree
+
+    :param size: number of projects [default=50000]
+    :param fanout: children of every project [default=3]
+    :param repeat: number of runs [default=3]
+    :return: {"size", "max_level", "min", "max", "avg"}. Times are in seconds
+    """
+    from beehive_resource.plugins.openstack.entity.ops_project import OpenstackProject
+
+    domain_id = "bench-domain"
+    elapsed = []
+    max_level = 0
+    for idx in range(repeat):
+        items = [
+            {
+                "id": "bench-%s" % i,
+                "parent_id": domain_id if i == 0 else "bench-%s" % ((i - 1) // fanout),
+                "domain_id": domain_id,
+            }
+            for i in range(size)
+        ]
+        # remote platform does not return projects in hierarchy order
+        items.reverse()
+        start = time()
+        items = OpenstackProject.sort_projects(items)
+        elapsed.append(round(time() - start, 4))
+        max_level = items[-1]["level"]
+
+    res = {
+        "size": size,
+        "max_level": max_level,
+        "min": min(elapsed),
+        "max": max(elapsed),
+        "avg": round(sum(elapsed) / len(elapsed), 4),
+    }
+    logger.info("Project levels: %s" % res)
+    return res
+
+
+def benchmark_compute_volume_list(controller, parent=None, page_sizes=(10, 50, 100)):
+    """Count the sql statements run by the compute volume list customization on pages of growing size. Volumes are
+    read from the database of the controller, so it requires a provider with compute volumes, like the ones added by
+    benchmarks.bootstrap.seed_compute_volumes. Authorization is disabled while cases run.
+
+    :param controller: resource controller instance
+    :param parent: compute zone id used to select volumes [optional]
+    :param page_sizes: page sizes to run [default=(10, 50, 100)]
+    :return: {"pages": {size: {"volumes", "queries", "elapsed"}}, "constant": True if queries do not grow with the
+        page size}
+    """
+    from beehive_resource.plugins.provider.entity.volume import ComputeVolume
+
+    authorize = operation.authorize
+    operation.authorize = False
+    pages = {}
+    try:
+        for size in page_sizes:
+            entities, total = controller.get_resources(
+                type=ComputeVolume.objdef, objdef=ComputeVolume.objdef, parent=parent, size=size, run_customize=False
+            )
+            with QueryCounter(controller.manager.get_session()) as counter:
+                start = time()
+                ComputeVolume.customize_list(controller, entities)
+                elapsed = round(time() - start, 4)
+            pages[size] = {"volumes": len(entities), "queries": counter.count, "elapsed": elapsed}
+            logger.info("Compute volume list page %s: %s" % (size, pages[size]))
+    finally:
+        operation.authorize = authorize
+
+    res = {"pages": pages, "constant": len({p["queries"] for p in pages.values()}) <= 1}
+    if res["constant"] is False:
+        logger.warning("Compute volume list queries grow with page size: %s" % pages)
+    return res
+
+
+class ResourceBenchmark(object):
+    """Time the resource hot paths without a remote platform. Resources are seeded as DummySyncResourceV2 of a
+    dummy_v2 container, whose discover simulates a remote platform of remote_size entities.
+
+    Database and cache are the ones of the controller. benchmarks.bootstrap.create_controller creates a controller on
+    sqlite and an in process redis, so the benchmark runs offline. Run it with python -m benchmarks or use as:
+
+        controller = create_controller("sqlite:////tmp/benchmark.db")
+        container_oid = create_dummy_container(controller)
+        bench = ResourceBenchmark(controller, container_oid, size=1000)
+        try:
+            results = bench.run()
+            bench.dump("benchmark-%s.json" % __version__)
+        finally:
+            bench.clean()
+
+    Compare two result files with ResourceBenchmark.compare.
+
+    :param controller: resource controller instance
+    :param container: dummy_v2 container id, uuid or name
+    :param size: number of resources to seed [default=100]
+    :param tags: number of tags assigned to every resource [default=2]
+    :param repeat: number of times every case is run [default=3]
+    :param page_size: page size used by the list cases [default=20]
+    """
+
+    def __init__(
+        self,
+        controller: ResourceController,
+        container,
+        size=100,
+        tags=2,
+        repeat=3,
+        page_size=20,
+    ):
+        self.controller = controller
+        self.manager = controller.manager
+        self.container = controller.get_container(container, connect=False)
+        self.size = size
+        self.tags = tags
+        self.repeat = repeat
+        self.page_size = page_size
+
+        self.resources = []
+        self.links = []
+        self.tag_models = []
+        self.results = {}
+
+    def seed(self):
+        """Create size resources. Resource i is linked to resource i+1 and gets the same tags of the others. Remote
+        platform is sized so that discover finds size/10 new entities and size/10 died entities.
+
+        :return: list of resource ids
+        """
+        rtype = self.manager.get_resource_types(value=DummySyncResourceV2.objdef)[0]
+        tag_names = ["bench-%s-%s" % (id_gen(length=6), idx) for idx in range(self.tags)]
+        self.tag_models = [self.manager.add_tag(name, id_gen()) for name in tag_names]
+
+        died = self.size // 10
+        for idx in range(self.size):
+            objid = "%s//%s" % (self.container.objid, id_gen())
+            ext_id = "dummy-%s" % idx if idx >= died else "died-%s" % idx
+            model = self.manager.add_resource(
+                objid=objid,
+                name="bench-%s" % idx,
+                rtype=rtype,
+                container=self.container.oid,
+                ext_id=ext_id,
+                attribute="{}",
+            )
+            for tag in self.tag_models:
+                self.manager.add_resource_tag(model, tag)
+            self.resources.append(model.id)
+
+        for start, end in zip(self.resources[:-1], self.resources[1:]):
+            link = self.manager.add_link(id_gen(), "bench-%s-%s" % (start, end), "relation", start, end, "{}")
+            self.links.append(link.id)
+
+        self.container.conn_params.setdefault("test", {})["remote_size"] = self.size + died
+        logger.info("Seed %s resources in container %s" % (self.size, self.container.oid))
+        return self.resources
+
+    def clean(self):
+        """Remove seeded resources, links and tags"""
+        for oid in self.links:
+            self.manager.delete_link(oid=oid)
+        for oid in self.resources:
+            self.manager.expunge_resource(oid=oid)
+        for tag in self.tag_models:
+            self.manager.delete_tag(oid=tag.id)
+        self.resources, self.links, self.tag_models = [], [], []
+        logger.info("Clean benchmark resources in container %s" % self.container.oid)
+
+    def measure(self, name, func, *args, **kvargs):
+        """Run a case repeat times and record elapsed time and sql statements of every run
+
+        :param name: case name
+        :param func: function to run
+        :param args: function positional params
+        :param kvargs: function key value params
+        :return: case result {"min", "max", "avg", "queries"}
+        """
+        elapsed = []
+        queries = 0
+        for idx in range(self.repeat):
+            with QueryCounter(self.manager.get_session()) as counter:
+                start = time()
+                func(*args, **kvargs)
+                elapsed.append(round(time() - start, 4))
+            queries = counter.count
+
+        res = {
+            "min": min(elapsed),
+            "max": max(elapsed),
+            "avg": round(sum(elapsed) / len(elapsed), 4),
+            "queries": queries,
+        }
+        self.results[name] = res
+        logger.info("Benchmark case %s: %s" % (name, res))
+        return res
+
+    def run(self):
+        """Seed resources if required and run all the cases. Authorization is disabled while cases run.
+
+        :return: {case: {"min", "max", "avg", "queries"}}
+        """
+        if len(self.resources) == 0:
+            self.seed()
+
+        authorize = operation.authorize
+        operation.authorize = False
+        try:
+            objdef = DummySyncResourceV2.objdef
+            container = self.container.oid
+            self.measure(
+                "get_resources", self.controller.get_resources, ids=self.resources, size=-1, run_customize=False
+            )
+            self.measure("get_resources.page", self.controller.get_resources, container=container, size=self.page_size)
+            self.measure(
+                "get_resources.keyset",
+                self.controller.get_resources,
+                container=container,
+                size=self.page_size,
+                cursor="",
+                with_total=False,
+            )
+            self.measure(
+                "get_paginated_entities.customize",
+                self.controller.get_resources,
+                ids=self.resources,
+                size=-1,
+                run_customize=True,
+            )
+
+            root = self.controller.get_resource(self.resources[0])
+            self.measure("resource.tree", root.tree)
+
+            entities, total = self.controller.get_resources(ids=self.resources, size=-1, run_customize=False)
+            self.measure("resource.clean_cache", lambda: [e.clean_cache() for e in entities])
+
+            self.measure("discover_new_entities", self.container.discover_new_entities, objdef)
+            self.measure("discover_died_entities", self.container.discover_died_entities, objdef)
+        finally:
+            operation.authorize = authorize
+
+        return self.results
+
+    def dump(self, filename):
+        """Write results as json
+
+        :param filename: output file name
+        :return: written data
+        """
+        data = {
+            "version": __version__.strip(),
+            "commit": __git_last_commit__.strip(),
+            "date": datetime.today().isoformat(),
+            "params": {"size": self.size, "tags": self.tags, "repeat": self.repeat, "page_size": self.page_size},
+            "cases": self.results,
+        }
+        with open(filename, "w") as f:
+            f.write(json.dumps(data, indent=2))
+        return data
+
+    @staticmethod
+    def compare(old_filename, new_filename, key="avg"):
+        """Compare two result files written by dump
+
+        :param old_filename: reference results file name
+        :param new_filename: new results file name
+        :param key: case value to compare [default=avg]
+        :return: {case: {"old", "new", "ratio", "old_queries", "new_queries"}}. ratio is new/old
+        """
+        with open(old_filename) as f:
+            old = json.loads(f.read())["cases"]
+        with open(new_filename) as f:
+            new = json.loads(f.read())["cases"]
+
+        res = {}
+        for case, value in new.items():
+            if case not in old:
+                continue
+            ratio = None
+            if old[case][key] > 0:
+                ratio = round(value[key] / old[case][key], 2)
+            res[case] = {
+                "old": old[case][key],
+                "new": value[key],
+                "ratio": ratio,
+                "old_queries": old[case]["queries"],
+                "new_queries": value["queries"],
+            }
+        return res
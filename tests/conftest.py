@@ -0,0 +1,118 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from threading import Lock
+from time import time
+
+import pytest
+
+
+class FakeCache(object):
+    """In memory replacement of the beehive cache client. Expired keys are removed when they are read."""
+
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+        self.sets = 0
+
+    def get(self, key):
+        self.gets += 1
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expire = item
+        if expire is not None and expire <= time():
+            self.data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl=600, pickling=False):
+        self.sets += 1
+        self.data[key] = (value, time() + ttl if ttl is not None else None)
+        return True
+
+    def expire(self, key, ttl):
+        if key in self.data:
+            self.data[key] = (self.data[key][0], time() + ttl)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeRedisLock(object):
+    """Redis lock with the redis-py interface backed by a threading lock"""
+
+    def __init__(self, lock, timeout=None, blocking_timeout=None):
+        self.lock = lock
+        self.blocking_timeout = blocking_timeout
+
+    def acquire(self, blocking=True, blocking_timeout=None):
+        if blocking_timeout is None:
+            blocking_timeout = self.blocking_timeout
+        if blocking is False:
+            return self.lock.acquire(False)
+        if blocking_timeout is None:
+            return self.lock.acquire(True)
+        return self.lock.acquire(True, blocking_timeout)
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class FakeRedis(object):
+    """In memory replacement of the redis client used for locks, sets and hashes"""
+
+    def __init__(self):
+        self.locks = {}
+        self.guard = Lock()
+        self.hashes = {}
+        self.sets = {}
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        with self.guard:
+            lock = self.locks.setdefault(name, Lock())
+        return FakeRedisLock(lock, timeout=timeout, blocking_timeout=blocking_timeout)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    def sadd(self, name, *values):
+        self.sets.setdefault(name, set()).update(v.encode() for v in values)
+
+    def srem(self, name, *values):
+        self.sets.get(name, set()).difference_update(v.encode() for v in values)
+
+    def smembers(self, name):
+        return set(self.sets.get(name, set()))
+
+    def expire(self, name, ttl):
+        return name in self.sets or name in self.hashes
+
+    def delete(self, *names):
+        for name in names:
+            self.sets.pop(name, None)
+            self.hashes.pop(name, None)
+
+
+class FakeController(object):
+    """Controller with the cache clients only"""
+
+    def __init__(self):
+        self.cache = FakeCache()
+        self.redis_cache = FakeRedis()
+
+
+@pytest.fixture
+def controller():
+    return FakeController()
@@ -0,0 +1,286 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from collections import Counter
+from logging import getLogger
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.plugins.provider.entity.gateway import ComputeGateway, GatewayRoutePlan
+
+calls = Counter()
+
+
+class DummyEntity(object):
+    def __init__(self, oid, **kvargs):
+        self.oid = oid
+        self.__dict__.update(kvargs)
+
+
+class DummyEdge(DummyEntity):
+    def get_vnics(self, portgroup=None):
+        calls["edge.get_vnics"] += 1
+        return [{"addressGroups": {"addressGroup": {"primaryAddress": self.transport_ip}}}]
+
+
+class DummyRouter(DummyEntity):
+    def __init__(self, oid, **kvargs):
+        DummyEntity.__init__(self, oid, **kvargs)
+        self.routes = []
+
+    def get_ports(self):
+        calls["router.get_ports"] += 1
+        port = DummyEntity("port-%s" % self.oid, network=DummyEntity(self.transport_network))
+        port.get_main_ip_address = lambda: self.transport_ip
+        return [port]
+
+    def add_routes(self, routes):
+        self.routes.append(("add", routes))
+
+    def del_routes(self, routes):
+        self.routes.append(("del", routes))
+
+
+class DummySite(DummyEntity):
+    def get_orchestrators_by_tag(self, tag, index_field=None):
+        calls["site.get_orchestrators_by_tag"] += 1
+        return {"vsphere": {"config": {"clusters": {"default": {"dvs": "dvs-1"}}}}}
+
+
+class DummyGateway(DummyEntity):
+    def get_site(self):
+        return self.site
+
+    def get_nsx_edge(self):
+        calls["gateway.get_nsx_edge"] += 1
+        return self.edge
+
+    def get_openstack_router(self):
+        calls["gateway.get_openstack_router"] += 1
+        return self.router
+
+    def get_role(self):
+        return self.role
+
+
+class DummyTransportNetwork(DummyEntity):
+    def get_vsphere_network(self, dvs=None):
+        return DummyEntity("portgroup-%s" % self.oid)
+
+    def get_openstack_network(self):
+        return DummyEntity("ops-transport-%s" % self.oid)
+
+
+class DummyTransportVpc(DummyEntity):
+    def get_network_by_site(self, site_id):
+        calls["transport_vpc.get_network_by_site"] += 1
+        return DummyTransportNetwork(site_id)
+
+
+class DummyPrivateNetwork(DummyEntity):
+    def get_vsphere_network(self):
+        switch = DummyEntity("switch-%s" % self.oid)
+        switch.get_gateway = lambda: "10.%s.0.1" % self.oid
+        switch.get_private_subnet = lambda: "10.%s.0.0/24" % self.oid
+        return switch
+
+    def get_openstack_network(self):
+        network = DummyEntity("ops-net-%s" % self.oid)
+        network.get_gateway = lambda: "10.%s.1.1" % self.oid
+        network.get_private_subnet_entity = lambda: DummyEntity("ops-subnet-%s" % self.oid)
+        network.get_private_subnet = lambda: "10.%s.1.0/24" % self.oid
+        return network
+
+
+class DummyVpc(DummyEntity):
+    def get_network_by_site(self, site_id):
+        return DummyPrivateNetwork(site_id)
+
+
+class DummyController(object):
+    def __init__(self, resources):
+        self.resources = resources
+
+    def get_simple_resource(self, oid):
+        return self.resources[oid]
+
+    def get_resource(self, oid):
+        return self.resources[oid]
+
+
+class DummyComputeGateway(ComputeGateway):
+    """Compute gateway over dummy site gateways. Database and remote platforms are not used"""
+
+    def __init__(self, controller, gateways, transport_vpc):
+        self.controller = controller
+        self.logger = getLogger(__name__)
+        self.oid = 100
+        self.gateways = gateways
+        self.transport_vpc = transport_vpc
+        self.default_role = ""
+
+    def get_linked_resources(self, *args, **kvargs):
+        calls["compute_gateway.get_linked_resources"] += 1
+        return self.gateways, len(self.gateways)
+
+    def get_transport_vpc(self):
+        return self.transport_vpc
+
+    def get_hostgroup(self):
+        return "default"
+
+    def get_hypervisor_tag(self):
+        return "default"
+
+    def get_hypervisor(self):
+        return "vsphere"
+
+    def set_default_role(self, role):
+        self.default_role = role
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+    yield
+    calls.clear()
+
+
+@pytest.fixture
+def compute_gateway():
+    gateways = []
+    for site_id, role in [(1, "primary"), (2, "secondary")]:
+        transport_network = "ops-transport-%s" % site_id
+        gateways.append(
+            DummyGateway(
+                "gw-%s" % site_id,
+                site=DummySite(site_id),
+                role=role,
+                edge=DummyEdge("edge-%s" % site_id, transport_ip="192.168.96.%s" % site_id),
+                router=DummyRouter(
+                    "router-%s" % site_id,
+                    transport_network=transport_network,
+                    transport_ip="192.168.96.%s" % (10 + site_id),
+                ),
+            )
+        )
+    resources = {"dvs-1": DummyEntity("dvs-1"), "vpc-1": DummyVpc("vpc-1")}
+    resources.update({g.router.oid: g.router for g in gateways})
+    return DummyComputeGateway(DummyController(resources), gateways, DummyTransportVpc("transport"))
+
+
+def router_routes(compute_gateway):
+    res = {}
+    for gateway in compute_gateway.gateways:
+        res[gateway.router.oid] = list(gateway.router.routes)
+        gateway.router.routes.clear()
+    return res
+
+
+def route_info(routes):
+    """Replace edge and router of the vpc route info with their oid"""
+    return [dict(route, router=route["router"].oid) for route in routes]
+
+
+#: vpc route info of the dummy topology. Site 1 is primary, site 2 is secondary
+VPC_ROUTES = [
+    {
+        "role": "primary",
+        "router": "edge-1",
+        "gateway": "10.1.0.1",
+        "network": "switch-1",
+        "cidr": "10.1.0.0/24",
+        "transport_gateway": "192.168.96.1",
+    },
+    {
+        "role": "primary",
+        "router": "router-1",
+        "gateway": "10.1.1.1",
+        "network": ("ops-net-1", "ops-subnet-1"),
+        "cidr": "10.1.1.0/24",
+        "transport_gateway": "192.168.96.11",
+    },
+    {
+        "role": "secondary",
+        "router": "edge-2",
+        "gateway": "10.2.0.1",
+        "network": "switch-2",
+        "cidr": "10.2.0.0/24",
+        "transport_gateway": "192.168.96.2",
+    },
+    {
+        "role": "secondary",
+        "router": "router-2",
+        "gateway": "10.2.1.1",
+        "network": ("ops-net-2", "ops-subnet-2"),
+        "cidr": "10.2.1.0/24",
+        "transport_gateway": "192.168.96.12",
+    },
+]
+
+#: next hop of the default internet route of every openstack router by role
+INTERNET_NEXT_HOPS = {
+    "default": {"router-1": "192.168.96.1", "router-2": "192.168.96.2"},
+    "primary": {"router-1": "192.168.96.1", "router-2": "192.168.96.1"},
+    "secondary": {"router-1": "192.168.96.2", "router-2": "192.168.96.2"},
+}
+
+
+def internet_routes(role):
+    res = {}
+    for router, next_hop in INTERNET_NEXT_HOPS[role].items():
+        route = [{"destination": "0.0.0.0/0", "nexthop": next_hop}]
+        res[router] = [("add", route), ("del", route)]
+    return res
+
+
+def test_route_plan_reads_gateways_once(compute_gateway):
+    plan = compute_gateway.get_route_plan()
+
+    assert isinstance(plan, GatewayRoutePlan)
+    assert [item.role for item in plan] == ["primary", "secondary"]
+    assert plan.get_by_role("secondary").edge_transport_ip == "192.168.96.2"
+    assert plan.get_by_role("primary").router_transport_ip == "192.168.96.11"
+    assert calls["compute_gateway.get_linked_resources"] == 1
+    assert calls["gateway.get_nsx_edge"] == 2
+    assert calls["edge.get_vnics"] == 2
+    assert calls["router.get_ports"] == 2
+
+    with pytest.raises(AttributeError):
+        plan.items = ()
+
+
+def test_vpc_route_info(compute_gateway):
+    assert route_info(compute_gateway.get_vpc_route_info("vpc-1")) == VPC_ROUTES
+
+
+def test_vpc_route_info_with_plan(compute_gateway):
+    plan = compute_gateway.get_route_plan()
+    calls.clear()
+
+    assert route_info(compute_gateway.get_vpc_route_info("vpc-1", plan=plan)) == VPC_ROUTES
+    assert calls["compute_gateway.get_linked_resources"] == 0
+
+
+@pytest.mark.parametrize("role", ["default", "primary", "secondary"])
+def test_internet_route(compute_gateway, role):
+    compute_gateway.set_default_internet_route(role=role)
+    compute_gateway.unset_default_internet_route(role=role)
+
+    assert router_routes(compute_gateway) == internet_routes(role)
+    assert compute_gateway.default_role == ""
+
+
+@pytest.mark.parametrize("role", ["default", "primary", "secondary"])
+def test_internet_route_with_plan(compute_gateway, role):
+    plan = compute_gateway.get_route_plan()
+    calls.clear()
+    compute_gateway.set_default_internet_route(role=role, plan=plan)
+    compute_gateway.unset_default_internet_route(role=role, plan=plan)
+
+    assert router_routes(compute_gateway) == internet_routes(role)
+    assert calls["compute_gateway.get_linked_resources"] == 0
+    assert compute_gateway.default_role == ""
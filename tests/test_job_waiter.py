@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.request import urlopen
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.util import RemoteJobWaiter
+
+
+class JobServer(object):
+    """Http stub of a remote platform. Every job is running for the first polls, then it ends with status"""
+
+    def __init__(self, polls=3, status="successful"):
+        self.polls = polls
+        self.status = status
+        self.calls = {}
+        self.lock = Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                job_id = self.path.strip("/").split("/")[-1]
+                with server.lock:
+                    server.calls[job_id] = server.calls.get(job_id, 0) + 1
+                    calls = server.calls[job_id]
+                status = "running" if calls < server.polls else server.status
+                body = json.dumps({"id": job_id, "status": status}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%s/api/v2/jobs" % self.httpd.server_address[1]
+        Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def get(self, job_id):
+        with urlopen("%s/%s/" % (self.url, job_id), timeout=5) as res:
+            return json.loads(res.read())
+
+
+@pytest.fixture
+def job_server():
+    server = JobServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def test_waiter_polls_http_job(job_server):
+    waiter = RemoteJobWaiter(max_delta=0.1)
+
+    job = waiter.wait(job_server.get, "10", maxtime=10, delta=0.05, name="awx.1.job")
+
+    assert job["status"] == "successful"
+    assert job_server.calls["10"] == 3
+
+
+def test_waiter_shares_poll_of_same_job(job_server):
+    waiter = RemoteJobWaiter(max_delta=0.1)
+    results = []
+
+    def wait():
+        results.append(waiter.wait(job_server.get, "11", maxtime=10, delta=0.05, name="awx.1.job"))
+
+    threads = [Thread(target=wait) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert [job["status"] for job in results] == ["successful"] * 10
+    assert job_server.calls["11"] == 3
+
+
+def test_waiter_timeout(job_server):
+    job_server.polls = 1000
+    waiter = RemoteJobWaiter(max_delta=0.1)
+
+    with pytest.raises(TimeoutError):
+        waiter.wait(job_server.get, "12", maxtime=0.3, delta=0.05, name="awx.1.job")
+
+
+def test_waiter_timeout_keeps_job_of_other_waiters(job_server):
+    job_server.polls = 8
+    waiter = RemoteJobWaiter(max_delta=0.05)
+    results = []
+
+    def wait():
+        results.append(waiter.wait(job_server.get, "13", maxtime=10, delta=0.05, name="awx.1.job"))
+
+    thread = Thread(target=wait)
+    thread.start()
+    with pytest.raises(TimeoutError):
+        waiter.wait(job_server.get, "13", maxtime=0.1, delta=0.05, name="awx.1.job")
+    thread.join(10)
+
+    assert [job["status"] for job in results] == ["successful"]
+    assert job_server.calls["13"] == 8
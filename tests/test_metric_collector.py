@@ -0,0 +1,39 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.plugins.provider.entity.aggregate import MetricCollector
+
+
+class CountCollector(MetricCollector):
+    """Collector with one metric equal to the resource id"""
+
+    objdef = "Test.Resource"
+
+    def collect(self, resources):
+        return {resource.oid: {"count": resource.oid} for resource in resources}
+
+
+def make_resource(oid):
+    return SimpleNamespace(oid=oid, uuid="uuid-%s" % oid, objdef=CountCollector.objdef)
+
+
+def test_collector_stats_are_saved_by_zone(controller):
+    res = CountCollector(controller).run([make_resource(1), make_resource(2)], zone_id=10)
+    CountCollector(controller).run([make_resource(3)], zone_id=20)
+
+    assert res[2]["metrics"] == [{"key": "count", "value": 2, "type": 1, "unit": "#"}]
+    assert MetricCollector.get_stats(controller, 10)[CountCollector.objdef]["resources"] == 2
+    assert MetricCollector.get_stats(controller, 20)[CountCollector.objdef]["resources"] == 1
+
+
+def test_collector_run_without_zone_does_not_save_stats(controller):
+    CountCollector(controller).run([make_resource(1)])
+
+    assert controller.redis_cache.hashes == {}
@@ -0,0 +1,66 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.plugins.openstack.entity.ops_project import OpenstackProject
+
+
+def project(oid, parent_id, domain_id="domain"):
+    return {"id": oid, "parent_id": parent_id, "domain_id": domain_id}
+
+
+def test_levels_of_a_tree():
+    items = [
+        project("c", "b"),
+        project("a", "domain"),
+        project("b", "a"),
+        project("d", "a"),
+        project("e", None),
+    ]
+
+    assert OpenstackProject.get_project_levels(items) == {"a": 0, "b": 1, "c": 2, "d": 1, "e": 0}
+
+
+def test_orphan_parent_is_first_level():
+    items = [project("a", "missing"), project("b", "a")]
+
+    assert OpenstackProject.get_project_levels(items) == {"a": 0, "b": 1}
+
+
+def test_cycles_do_not_loop():
+    items = [
+        project("a", "b"),
+        project("b", "a"),
+        project("self", "self"),
+        project("child", "a"),
+    ]
+
+    levels = OpenstackProject.get_project_levels(items)
+
+    assert set(levels.keys()) == {"a", "b", "self", "child"}
+    assert levels["self"] == 0
+    assert {levels["a"], levels["b"]} == {0, 1}
+    assert levels["child"] == levels["a"] + 1
+
+
+def test_deep_chain():
+    depth = 5000
+    items = [project("p0", "domain")] + [project("p%s" % i, "p%s" % (i - 1)) for i in range(1, depth)]
+    items.reverse()
+
+    levels = OpenstackProject.get_project_levels(items)
+
+    assert levels == {"p%s" % i: i for i in range(depth)}
+
+
+def test_sort_projects_puts_parents_first():
+    items = [project("c", "b"), project("b", "a"), project("a", "domain")]
+
+    res = OpenstackProject.sort_projects(items)
+
+    assert [item["id"] for item in res] == ["a", "b", "c"]
+    assert [item["level"] for item in res] == [0, 1, 2]
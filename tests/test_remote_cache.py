@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from threading import Barrier, Event, Thread
+from time import sleep
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource import util
+from beehive_resource.util import remote_cache
+
+
+class FakeBackend(object):
+    """Remote platform that counts the calls and returns a new version of the entity every call"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.release = Event()
+        self.release.set()
+
+    def get(self, controller, postfix):
+        self.calls += 1
+        version = self.calls
+        sleep(self.delay)
+        self.release.wait(5)
+        return {"id": postfix, "version": version}
+
+
+@pytest.fixture(autouse=True)
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(util, "operation", SimpleNamespace(cache=True))
+
+
+def run_concurrent(func, size):
+    barrier = Barrier(size)
+    results = [None] * size
+
+    def run(idx):
+        barrier.wait()
+        results[idx] = func()
+
+    threads = [Thread(target=run, args=(idx,)) for idx in range(size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_single_flight(controller):
+    backend = FakeBackend()
+    getter = remote_cache("test.entity", ttl=60)(backend.get)
+
+    results = run_concurrent(lambda: getter(controller, "e1"), 20)
+
+    assert backend.calls == 1
+    assert results == [{"id": "e1", "version": 1}] * 20
+    assert getter.get_cached(controller, "e1") == {"id": "e1", "version": 1}
+
+
+def test_single_flight_by_postfix(controller):
+    backend = FakeBackend(delay=0.05)
+    getter = remote_cache("test.entity", ttl=60)(backend.get)
+
+    run_concurrent(lambda: getter(controller, "e1"), 10)
+    run_concurrent(lambda: getter(controller, "e2"), 10)
+
+    assert backend.calls == 2
+
+
+def test_empty_value_is_not_cached(controller):
+    calls = []
+
+    def get(controller, postfix):
+        calls.append(postfix)
+        return {}
+
+    getter = remote_cache("test.entity", ttl=60)(get)
+    getter(controller, "e1")
+    getter(controller, "e1")
+
+    assert len(calls) == 2
+    assert getter.get_cached(controller, "e1") is None
+
+
+def test_stale_while_revalidate(controller):
+    backend = FakeBackend(delay=0)
+    getter = remote_cache("test.entity", ttl=60, stale_ttl=600)(backend.get)
+
+    assert getter(controller, "e1") == {"id": "e1", "version": 1}
+
+    # ttl expires: value is stale
+    controller.cache.delete("test.entity.e1:fresh")
+
+    # one caller refreshes while the others get the stale value without waiting
+    backend.release.clear()
+    refresh = Thread(target=getter, args=(controller, "e1"))
+    refresh.start()
+    while backend.calls < 2:
+        sleep(0.01)
+
+    results = run_concurrent(lambda: getter(controller, "e1"), 10)
+    assert results == [{"id": "e1", "version": 1}] * 10
+    assert backend.calls == 2
+
+    backend.release.set()
+    refresh.join(5)
+
+    # refreshed value is fresh again
+    assert getter(controller, "e1") == {"id": "e1", "version": 2}
+    assert backend.calls == 2
+
+
+def test_set_cached_fills_fresh_value(controller):
+    backend = FakeBackend(delay=0)
+    getter = remote_cache("test.entity", ttl=60, stale_ttl=600)(backend.get)
+
+    getter.set_cached(controller, "e1", {"id": "e1", "version": 0})
+
+    assert getter(controller, "e1") == {"id": "e1", "version": 0}
+    assert backend.calls == 0
+
+
+def test_delete_cached_reloads_value(controller):
+    backend = FakeBackend(delay=0)
+    getter = remote_cache("test.entity", ttl=60, stale_ttl=600)(backend.get)
+
+    assert getter(controller, "e1") == {"id": "e1", "version": 1}
+    getter.delete_cached(controller, "e1")
+
+    assert getter.get_cached(controller, "e1") is None
+    assert getter(controller, "e1") == {"id": "e1", "version": 2}
+    assert backend.calls == 2
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.plugins.provider.entity import aggregate
+from beehive_resource.plugins.provider.entity.aggregate import ComputeProviderResource
+
+
+@pytest.fixture(autouse=True)
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(aggregate, "operation", SimpleNamespace(cache=True))
+
+
+def make_resource(controller, uuid):
+    resource = ComputeProviderResource.__new__(ComputeProviderResource)
+    resource.controller = controller
+    resource.model = object()
+    resource.uuid = uuid
+    return resource
+
+
+def test_reset_cache_deletes_recorded_keys(controller):
+    resource = make_resource(controller, "r1")
+    other = make_resource(controller, "r2")
+    resource.set_cache("site_resources", {"a": 1})
+    resource.set_cache("acl_matcher", [1, 2])
+    other.set_cache("site_resources", {"b": 2})
+
+    assert controller.redis_cache.smembers("ComputeProviderResource.cachekeys.r1") == {
+        b"ComputeProviderResource.site_resources.r1",
+        b"ComputeProviderResource.acl_matcher.r1",
+    }
+
+    resource.reset_cache("*")
+
+    assert resource.get_cached("site_resources") is None
+    assert resource.get_cached("acl_matcher") is None
+    assert other.get_cached("site_resources") == {"b": 2}
+    assert controller.redis_cache.smembers("ComputeProviderResource.cachekeys.r1") == set()
+
+
+def test_reset_cache_of_one_method(controller):
+    resource = make_resource(controller, "r1")
+    resource.set_cache("site_resources", {"a": 1})
+    resource.set_cache("acl_matcher", [1, 2])
+
+    resource.reset_cache("acl_matcher")
+
+    assert resource.get_cached("acl_matcher") is None
+    assert resource.get_cached("site_resources") == {"a": 1}
+    assert controller.redis_cache.smembers("ComputeProviderResource.cachekeys.r1") == {
+        b"ComputeProviderResource.site_resources.r1"
+    }
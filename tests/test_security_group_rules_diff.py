@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from beehive_resource.plugins.openstack.entity.ops_security_group import OpenstackSecurityGroup
+
+
+def rule(**kvargs):
+    res = {
+        "direction": "ingress",
+        "ethertype": "IPv4",
+        "protocol": "tcp",
+        "port_range_min": 22,
+        "port_range_max": 22,
+        "remote_group_id": None,
+        "remote_ip_prefix": "10.0.0.0/24",
+    }
+    res.update(kvargs)
+    return res
+
+
+def test_equal_rules_are_kept():
+    remote_rules = [rule(id="r1"), rule(id="r2", port_range_min=80, port_range_max=80)]
+    rules = [rule(), rule(port_range_min=80, port_range_max=80)]
+
+    assert OpenstackSecurityGroup.diff_rules(remote_rules, rules) == ([], [])
+
+
+def test_missing_and_extra_rules():
+    remote_rules = [rule(id="r1"), rule(id="r2", protocol="udp")]
+    rules = [rule(), rule(port_range_min=443, port_range_max=443)]
+
+    to_create, to_delete = OpenstackSecurityGroup.diff_rules(remote_rules, rules)
+
+    assert to_create == [rule(port_range_min=443, port_range_max=443)]
+    assert [item["id"] for item in to_delete] == ["r2"]
+
+
+def test_duplicated_remote_rules_are_deleted():
+    remote_rules = [rule(id="r1"), rule(id="r2"), rule(id="r3")]
+
+    to_create, to_delete = OpenstackSecurityGroup.diff_rules(remote_rules, [rule()])
+
+    assert to_create == []
+    assert [item["id"] for item in to_delete] == ["r2", "r3"]
+
+
+def test_duplicated_rules_are_created_once():
+    to_create, to_delete = OpenstackSecurityGroup.diff_rules([], [rule(), rule()])
+
+    assert to_create == [rule()]
+    assert to_delete == []
+
+
+def test_none_and_empty_values_are_equal():
+    remote_rules = [rule(id="r1", protocol=None, port_range_min=None, port_range_max=None, remote_ip_prefix="")]
+    rules = [rule(protocol="", port_range_min="", port_range_max=None, remote_ip_prefix=None)]
+
+    assert OpenstackSecurityGroup.diff_rules(remote_rules, rules) == ([], [])
+
+
+def test_values_are_compared_as_lower_strings():
+    remote_rules = [rule(id="r1", ethertype="ipv4", protocol="TCP", port_range_min="22", port_range_max="22")]
+
+    assert OpenstackSecurityGroup.diff_rules(remote_rules, [rule()]) == ([], [])
@@ -0,0 +1,119 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+from threading import Event, Thread
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("beehive")
+
+from sqlalchemy import create_engine, event, text
+from beehive_resource import util
+from beehive_resource.util import ProfiledCache, StepProfiler
+
+
+class HitCache(object):
+    """Cache with a value for every key starting with hit"""
+
+    def get(self, key):
+        if key.startswith("hit"):
+            return key
+        return None
+
+
+@pytest.fixture
+def engine():
+    return create_engine("sqlite://")
+
+
+@pytest.fixture
+def profiled_controller():
+    return SimpleNamespace(cache=HitCache())
+
+
+def run_queries(engine, count):
+    with engine.connect() as conn:
+        for i in range(count):
+            conn.execute(text("SELECT 1"))
+
+
+def test_profiler_counts_block_calls(engine, profiled_controller):
+    with StepProfiler(profiled_controller, engine=engine) as profiler:
+        run_queries(engine, 3)
+        profiled_controller.cache.get("hit.1")
+        profiled_controller.cache.get("miss.1")
+
+    summary = profiler.summary()
+    assert summary["sql"]["count"] == 3
+    assert summary["cache"]["hits"] == 1
+    assert summary["cache"]["misses"] == 1
+
+    # calls after the block are not counted
+    run_queries(engine, 2)
+    profiled_controller.cache.get("hit.2")
+    assert profiler.summary()["sql"]["count"] == 3
+    assert profiler.summary()["cache"]["hits"] == 1
+
+
+def test_profiler_exit_is_idempotent(engine, profiled_controller):
+    profiler = StepProfiler(profiled_controller, engine=engine)
+    with profiler:
+        profiled_controller.cache.get("hit.1")
+    profiler.__exit__(None, None, None)
+
+    profiled_controller.cache.get("hit.2")
+    assert profiler.summary()["cache"]["hits"] == 1
+
+
+def test_profilers_exit_in_any_order(engine, profiled_controller):
+    outer = StepProfiler(profiled_controller, engine=engine).__enter__()
+    run_queries(engine, 1)
+    inner = StepProfiler(profiled_controller, engine=engine).__enter__()
+    run_queries(engine, 2)
+    outer.__exit__(None, None, None)
+    run_queries(engine, 4)
+    inner.__exit__(None, None, None)
+
+    assert outer.summary()["sql"]["count"] == 3
+    assert inner.summary()["sql"]["count"] == 6
+
+
+def test_profiler_ignores_other_threads(engine, profiled_controller):
+    started = Event()
+    done = Event()
+
+    def other():
+        started.wait(5)
+        run_queries(engine, 5)
+        for i in range(5):
+            profiled_controller.cache.get("hit.%s" % i)
+        done.set()
+
+    thread = Thread(target=other)
+    thread.start()
+    with StepProfiler(profiled_controller, engine=engine) as profiler:
+        started.set()
+        done.wait(5)
+        run_queries(engine, 1)
+    thread.join(5)
+
+    assert profiler.summary()["sql"]["count"] == 1
+    assert profiler.summary()["cache"]["hits"] == 0
+
+
+def test_profiler_hooks_are_removed_by_the_last_profiler(engine, profiled_controller):
+    cache = profiled_controller.cache
+    outer = StepProfiler(profiled_controller, engine=engine).__enter__()
+    inner = StepProfiler(profiled_controller, engine=engine).__enter__()
+    assert isinstance(profiled_controller.cache, ProfiledCache)
+    assert event.contains(engine, "before_cursor_execute", util._profile_before_cursor_execute)
+
+    outer.__exit__(None, None, None)
+    assert isinstance(profiled_controller.cache, ProfiledCache)
+
+    inner.__exit__(None, None, None)
+    assert profiled_controller.cache is cache
+    assert not event.contains(engine, "before_cursor_execute", util._profile_before_cursor_execute)
+    assert util._profile_hooks == {}
@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: EUPL-1.2
+#
+# (C) Copyright 2018-2024 CSI-Piemonte
+
+import pytest
+
+pytest.importorskip("beehive")
+pytest.importorskip("fakeredis")
+
+from beehive_resource.plugins.provider import LocalProviderPlugin
+from beehive_resource.plugins.provider.entity.volume import ComputeVolume
+from beehive_resource.util import QueryCounter
+from benchmarks.bootstrap import create_controller, create_provider_container, seed_compute_volumes
+from benchmarks.cases import benchmark_compute_volume_list
+
+
+@pytest.fixture(scope="module")
+def provider():
+    controller = create_controller(plugins=[LocalProviderPlugin])
+    container = create_provider_container(controller)
+    seed = seed_compute_volumes(controller, container, 40)
+    return controller, seed
+
+
+def test_volume_list_queries_do_not_grow_with_page_size(provider):
+    controller, seed = provider
+
+    res = benchmark_compute_volume_list(controller, parent=seed["compute_zone"], page_sizes=(5, 20, 40))
+
+    assert [page["volumes"] for page in res["pages"].values()] == [5, 20, 40]
+    assert len({page["queries"] for page in res["pages"].values()}) == 1
+    assert res["constant"] is True
+
+
+def test_volume_list_links_are_loaded(provider):
+    controller, seed = provider
+    entities, total = controller.get_resources(
+        type=ComputeVolume.objdef,
+        objdef=ComputeVolume.objdef,
+        parent=seed["compute_zone"],
+        size=10,
+        run_customize=False,
+    )
+
+    with QueryCounter(controller.manager.get_session()) as counter:
+        ComputeVolume.customize_list(controller, entities)
+
+    assert counter.count > 0
+    for entity in entities:
+        assert entity.availability_zone.oid == seed["site"]
+        assert entity.main_zone_instance is not None
+        assert entity.instance is not None